@@ -1,7 +1,22 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import filedialog
+from tkinter import simpledialog
 import tkinter.font as tkFont # Import tkFont for custom font definitions
+import bisect
+import functools
+import heapq
+import operator
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from itertools import chain, islice
 
 # ############################################################################
 #
@@ -11,9 +26,25 @@ import tkinter.font as tkFont # Import tkFont for custom font definitions
 # (No changes needed in the model part as the request is UI-related)
 # ############################################################################
 
+# Ids, codes, majors and departments repeat across the model (every
+# enrollment names a student and a course on both sides), so they are
+# interned: each distinct string is stored once however many records load it.
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+# Most students have completed or waitlisted nothing, so empty sets share
+# this one dict. It is never written to: adding replaces it with a new dict.
+_EMPTY_SET = {}
+
+def _interned_set(values):
+    return dict.fromkeys(map(_intern, values)) if values else _EMPTY_SET
+
+# Entities use __slots__: no per-instance __dict__ for 100k+ students
 class Person:
+    __slots__ = ("_id", "_name")
+
     def __init__(self, id, name):
-        self._id = id
+        self._id = _intern(id)
         self._name = name
 
     @property
@@ -28,10 +59,22 @@ class Person:
         raise NotImplementedError
 
 class Student(Person):
+    __slots__ = ("_major", "_enrolled_course_codes", "_completed_course_codes", "_waitlisted_course_codes",
+                 "_credit_load", "_schedule")
+
     def __init__(self, id, name, major):
         super().__init__(id, name)
-        self._major = major
-        self._enrolled_course_codes = []
+        self._major = _intern(major)
+        # Ordered set: dict keys keep enrollment order with O(1) membership
+        self._enrolled_course_codes = _EMPTY_SET
+        self._completed_course_codes = _EMPTY_SET # Passed courses, used for prerequisites
+        self._waitlisted_course_codes = _EMPTY_SET # Full courses the student is queued for
+        # New: Credits enrolled in, kept up to date by the University. None
+        # until first needed when loaded with enrollments, see _student_credits().
+        self._credit_load = 0
+        # New: IntervalTree of the enrolled courses' meetings, built by the
+        # University on the first clash check and kept current after that
+        self._schedule = None
 
     @property
     def major(self):
@@ -39,19 +82,49 @@ class Student(Person):
 
     @major.setter
     def major(self, major):
-        self._major = major
+        self._major = _intern(major)
 
     @property
     def enrolled_course_codes(self):
-        return self._enrolled_course_codes
+        return list(self._enrolled_course_codes)
+
+    def is_enrolled(self, course_code):
+        return course_code in self._enrolled_course_codes
 
     def enroll_course(self, course_code):
-        if course_code not in self._enrolled_course_codes:
-            self._enrolled_course_codes.append(course_code)
+        if self._enrolled_course_codes is _EMPTY_SET:
+            self._enrolled_course_codes = {}
+        self._enrolled_course_codes[_intern(course_code)] = None
 
     def drop_course(self, course_code):
-        if course_code in self._enrolled_course_codes:
-            self._enrolled_course_codes.remove(course_code)
+        self._enrolled_course_codes.pop(course_code, None)
+
+    @property
+    def completed_course_codes(self):
+        return list(self._completed_course_codes)
+
+    def has_completed(self, course_code):
+        return course_code in self._completed_course_codes
+
+    def complete_course(self, course_code):
+        if self._completed_course_codes is _EMPTY_SET:
+            self._completed_course_codes = {}
+        self._completed_course_codes[_intern(course_code)] = None
+
+    @property
+    def waitlisted_course_codes(self):
+        return list(self._waitlisted_course_codes)
+
+    def is_waitlisted(self, course_code):
+        return course_code in self._waitlisted_course_codes
+
+    def join_waitlist(self, course_code):
+        if self._waitlisted_course_codes is _EMPTY_SET:
+            self._waitlisted_course_codes = {}
+        self._waitlisted_course_codes[_intern(course_code)] = None
+
+    def leave_waitlist(self, course_code):
+        self._waitlisted_course_codes.pop(course_code, None)
 
     def to_dict(self):
         return {
@@ -59,14 +132,30 @@ class Student(Person):
             "name": self.name,
             "major": self.major,
             "enrolled_courses": self.enrolled_course_codes,
+            "completed_courses": self.completed_course_codes,
+            "waitlisted_courses": self.waitlisted_course_codes,
             "type": "student",
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        student = cls(data["id"], data["name"], data["major"])
+        student._enrolled_course_codes = _interned_set(data.get("enrolled_courses", ()))
+        student._completed_course_codes = _interned_set(data.get("completed_courses", ()))
+        student._waitlisted_course_codes = _interned_set(data.get("waitlisted_courses", ()))
+        if student._enrolled_course_codes:
+            student._credit_load = None
+        return student
+
 class Faculty(Person):
+    __slots__ = ("_department", "_assigned_course_codes", "_teaching_load", "_schedule")
+
     def __init__(self, id, name, department):
         super().__init__(id, name)
-        self._department = department
-        self._assigned_course_codes = []
+        self._department = _intern(department)
+        self._assigned_course_codes = _EMPTY_SET # Ordered set, see Student
+        self._teaching_load = 0 # New: Credits taught, like Student._credit_load
+        self._schedule = None # New: Meetings of the assigned courses, like Student._schedule
 
     @property
     def department(self):
@@ -74,19 +163,22 @@ class Faculty(Person):
 
     @department.setter
     def department(self, department):
-        self._department = department
+        self._department = _intern(department)
 
     @property
     def assigned_course_codes(self):
-        return self._assigned_course_codes
+        return list(self._assigned_course_codes)
+
+    def is_assigned(self, course_code):
+        return course_code in self._assigned_course_codes
 
     def assign_course(self, course_code):
-        if course_code not in self._assigned_course_codes:
-            self._assigned_course_codes.append(course_code)
+        if self._assigned_course_codes is _EMPTY_SET:
+            self._assigned_course_codes = {}
+        self._assigned_course_codes[_intern(course_code)] = None
 
     def unassign_course(self, course_code):
-        if course_code in self._assigned_course_codes:
-            self._assigned_course_codes.remove(course_code)
+        self._assigned_course_codes.pop(course_code, None)
 
     def to_dict(self):
         return {
@@ -97,14 +189,86 @@ class Faculty(Person):
             "type": "faculty",
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        faculty = cls(data["id"], data["name"], data["department"])
+        faculty._assigned_course_codes = _interned_set(data.get("assigned_courses", ()))
+        if faculty._assigned_course_codes:
+            faculty._teaching_load = None
+        return faculty
+
+# New: A weekly class meeting. start and end are minutes after midnight and
+# end is exclusive, so a 9:00-10:00 class and a 10:00-11:00 one do not clash.
+Meeting = namedtuple("Meeting", "day start end room")
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_DAY_INDEX = {day.lower(): index for index, day in enumerate(DAYS)}
+MINUTES_PER_DAY = 24 * 60
+_WEEK_OFFSET = {day: index * MINUTES_PER_DAY for index, day in enumerate(DAYS)}
+
+def _clock(value):
+    if isinstance(value, str): # "9:30" or "09:30"
+        hours, _, minutes = value.strip().partition(":")
+        if not (hours.isdigit() and minutes.isdigit() and len(minutes) == 2):
+            raise ValueError(f"'{value}' is not a time, expected HH:MM")
+        value = int(hours) * 60 + int(minutes)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MINUTES_PER_DAY:
+        raise ValueError(f"'{value}' is not a time of day")
+    return value
+
+# A Meeting from a Meeting or any [day, start, end, room] sequence (as stored
+# by to_dict()), with times as minutes or "HH:MM". Raises ValueError.
+def make_meeting(value):
+    if len(value) != 4:
+        raise ValueError(f"a meeting needs a day, start, end and room, got {list(value)}")
+    day, start, end, room = value
+    index = _DAY_INDEX.get(str(day).strip().lower()[:3])
+    if index is None:
+        raise ValueError(f"'{day}' is not a day, expected one of {', '.join(DAYS)}")
+    start, end = _clock(start), _clock(end)
+    if start >= end:
+        raise ValueError(f"a meeting must end after it starts ({format_clock(start)}-{format_clock(end)})")
+    return Meeting(DAYS[index], start, end, _intern(str(room or "").strip()))
+
+def format_clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def format_meeting(meeting):
+    text = f"{meeting.day} {format_clock(meeting.start)}-{format_clock(meeting.end)}"
+    return f"{text} {meeting.room}" if meeting.room else text
+
+# "Mon 09:00-10:30 B12; Wed 09:00-10:30 B12" -> [Meeting, Meeting], the
+# format the UI and CSV files use. The room is optional.
+def parse_meetings(text):
+    meetings = []
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        match = re.fullmatch(r"\s*(\S+)\s+(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})(?:\s+(.+?))?\s*", part)
+        if not match:
+            raise ValueError(f"'{part.strip()}' is not a meeting, expected e.g. 'Mon 09:00-10:30 B12'")
+        meetings.append(make_meeting(match.groups()))
+    return meetings
+
 class Course:
-    def __init__(self, course_code, title, credits, prerequisites=None):
-        self._course_code = course_code
+    __slots__ = ("_course_code", "_title", "_credits", "_prerequisite_codes", "_enrolled_student_ids",
+                 "_assigned_faculty_id", "_capacity", "_waitlist", "_waitlist_entries", "_waitlist_seq", "_meetings")
+
+    def __init__(self, course_code, title, credits, prerequisites=None, capacity=None, meetings=None):
+        self._course_code = _intern(course_code)
         self._title = title
         self._credits = credits
-        self._prerequisite_codes = prerequisites if prerequisites else []
-        self._enrolled_student_ids = []
+        self._prerequisite_codes = [_intern(code) for code in prerequisites] if prerequisites else []
+        self._enrolled_student_ids = _EMPTY_SET # Ordered set, see Student
         self._assigned_faculty_id = None
+        self._capacity = capacity # Seat limit, None for unlimited
+        # Waitlist heap of [priority, seq, student_id] entries: lowest priority
+        # first, then in joining order. Leaving only drops the entry from
+        # _waitlist_entries, so joining, leaving and promotion are O(log n).
+        self._waitlist = []
+        self._waitlist_entries = {} # student_id -> live heap entry
+        self._waitlist_seq = 0
+        self._meetings = tuple(map(make_meeting, meetings)) if meetings else () # New: weekly timetable
 
     @property
     def course_code(self):
@@ -124,7 +288,10 @@ class Course:
 
     @property
     def enrolled_student_ids(self):
-        return self._enrolled_student_ids
+        return list(self._enrolled_student_ids)
+
+    def has_student(self, student_id):
+        return student_id in self._enrolled_student_ids
 
     @property
     def assigned_faculty_id(self):
@@ -132,15 +299,93 @@ class Course:
 
     @assigned_faculty_id.setter
     def assigned_faculty_id(self, faculty_id):
-        self._assigned_faculty_id = faculty_id
+        self._assigned_faculty_id = _intern(faculty_id)
 
     def add_student_id(self, student_id):
-        if student_id not in self._enrolled_student_ids:
-            self._enrolled_student_ids.append(student_id)
+        if self._enrolled_student_ids is _EMPTY_SET:
+            self._enrolled_student_ids = {}
+        self._enrolled_student_ids[_intern(student_id)] = None
 
     def remove_student_id(self, student_id):
-        if student_id in self._enrolled_student_ids:
-            self._enrolled_student_ids.remove(student_id)
+        self._enrolled_student_ids.pop(student_id, None)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, capacity):
+        self._capacity = capacity
+
+    def has_free_seat(self):
+        return self._capacity is None or len(self._enrolled_student_ids) < self._capacity
+
+    @property
+    def meetings(self):
+        return self._meetings
+
+    @meetings.setter
+    def meetings(self, meetings):
+        self._meetings = tuple(map(make_meeting, meetings))
+
+    # (start, end, course_code) per meeting, in minutes from Monday 00:00
+    def meeting_intervals(self):
+        code = self._course_code
+        return [(_WEEK_OFFSET[day] + start, _WEEK_OFFSET[day] + end, code) for day, start, end, _ in self._meetings]
+
+    # In promotion order
+    @property
+    def waitlisted_student_ids(self):
+        return [entry[2] for entry in sorted(self._waitlist_entries.values())]
+
+    # [[student_id, priority, seq], ...] in promotion order
+    @property
+    def waitlist_entries(self):
+        return [[entry[2], entry[0], entry[1]] for entry in sorted(self._waitlist_entries.values())]
+
+    def waitlist_count(self):
+        return len(self._waitlist_entries)
+
+    def is_waitlisted(self, student_id):
+        return student_id in self._waitlist_entries
+
+    # 1-based place in the queue, None if not waitlisted
+    def waitlist_position(self, student_id):
+        entry = self._waitlist_entries.get(student_id)
+        if entry is None:
+            return None
+        return 1 + sum(1 for other in self._waitlist_entries.values() if other < entry)
+
+    # seq is only passed when restoring an entry (it keeps the original order)
+    def add_to_waitlist(self, student_id, priority=0, seq=None):
+        if seq is None:
+            seq = self._waitlist_seq
+        self._waitlist_seq = max(self._waitlist_seq, seq + 1)
+        student_id = _intern(student_id)
+        entry = [priority, seq, student_id]
+        self._waitlist_entries[student_id] = entry
+        heapq.heappush(self._waitlist, entry)
+        return entry
+
+    def remove_from_waitlist(self, student_id):
+        entry = self._waitlist_entries.pop(student_id, None)
+        if entry is None:
+            return None
+        # The stale heap entry is skipped by pop_waitlist. Rebuild once the heap
+        # is mostly stale entries.
+        if len(self._waitlist) > 2 * len(self._waitlist_entries) + 64:
+            self._waitlist = list(self._waitlist_entries.values())
+            heapq.heapify(self._waitlist)
+        return entry
+
+    # Next student in line as a (priority, seq, student_id) entry, or None
+    def pop_waitlist(self):
+        while self._waitlist:
+            entry = heapq.heappop(self._waitlist)
+            if self._waitlist_entries.get(entry[2]) is entry: # Not a stale entry
+                del self._waitlist_entries[entry[2]]
+                return entry
+        return None
 
     def to_dict(self):
         return {
@@ -150,110 +395,1534 @@ class Course:
             "prerequisites": self.prerequisite_codes,
             "enrolled_students": self.enrolled_student_ids,
             "faculty_id": self.assigned_faculty_id,
+            "capacity": self.capacity,
+            "waitlist": self.waitlist_entries,
+            "meetings": [list(meeting) for meeting in self._meetings],
         }
 
-class University:
+    @classmethod
+    def from_dict(cls, data):
+        course = cls(data["course_code"], data["title"], data["credits"], list(data.get("prerequisites") or []),
+                     data.get("capacity"), data.get("meetings"))
+        course._enrolled_student_ids = _interned_set(data.get("enrolled_students", ()))
+        course.assigned_faculty_id = _intern(data.get("faculty_id"))
+        for student_id, priority, seq in data.get("waitlist", ()):
+            student_id = _intern(student_id)
+            course._waitlist_entries[student_id] = [priority, seq, student_id]
+            course._waitlist_seq = max(course._waitlist_seq, seq + 1)
+        course._waitlist = list(course._waitlist_entries.values())
+        heapq.heapify(course._waitlist)
+        return course
+
+class PrerequisiteGraph:
+    # Course dependency DAG. Each course's transitive prerequisites are computed
+    # once and cached; changing a course only drops the cached closures of that
+    # course and of the courses that (transitively) depend on it.
+    def __init__(self, courses=()):
+        self._prerequisites = {} # code -> tuple of direct prerequisite codes
+        self._dependents = {} # code -> set of codes listing it as a direct prerequisite
+        self._closure = {} # code -> frozenset of all transitive prerequisites
+        for course in courses:
+            self.set_course(course.course_code, course.prerequisite_codes)
+
+    def set_course(self, course_code, prerequisite_codes):
+        for code in self._prerequisites.get(course_code, ()):
+            self._dependents[code].discard(course_code)
+        self._prerequisites[course_code] = tuple(prerequisite_codes)
+        for code in prerequisite_codes:
+            self._dependents.setdefault(code, set()).add(course_code)
+        self._invalidate(course_code)
+
+    # A cycle appears iff one of the new prerequisites already depends on
+    # course_code, so walk the (usually short) dependents chain from it
+    def would_create_cycle(self, course_code, prerequisite_codes):
+        targets = set(prerequisite_codes)
+        if course_code in targets:
+            return True
+        seen = {course_code}
+        pending = [course_code]
+        while pending:
+            for dependent in self._dependents.get(pending.pop(), ()):
+                if dependent in targets:
+                    return True
+                if dependent not in seen:
+                    seen.add(dependent)
+                    pending.append(dependent)
+        return False
+
+    def all_prerequisites(self, course_code):
+        closure = self._closure.get(course_code)
+        if closure is not None:
+            return closure
+        # Iterative post-order walk so long chains cannot hit the recursion limit.
+        # A course already on the stack is a cycle and is skipped here;
+        # find_cycles() reports those.
+        on_stack = {course_code}
+        stack = [(course_code, iter(self._prerequisites.get(course_code, ())))]
+        while stack:
+            code, children = stack[-1]
+            for child in children:
+                if child not in self._closure and child not in on_stack:
+                    on_stack.add(child)
+                    stack.append((child, iter(self._prerequisites.get(child, ()))))
+                    break
+            else:
+                stack.pop()
+                on_stack.discard(code)
+                closure = set()
+                for child in self._prerequisites.get(code, ()):
+                    closure.add(child)
+                    closure.update(self._closure.get(child, ()))
+                self._closure[code] = frozenset(closure)
+        return self._closure[course_code]
+
+    def _invalidate(self, course_code):
+        # A dependent without a cached closure has no cached dependents either
+        self._closure.pop(course_code, None)
+        pending = list(self._dependents.get(course_code, ()))
+        while pending:
+            code = pending.pop()
+            if self._closure.pop(code, None) is not None:
+                pending.extend(self._dependents.get(code, ()))
+
+    # Strongly connected components with more than one course (or a course
+    # requiring itself), found with an iterative Tarjan walk
+    def find_cycles(self):
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        scc_stack = []
+        cycles = []
+        counter = 0
+        for root in self._prerequisites:
+            if root in index:
+                continue
+            work = [(root, iter(self._prerequisites.get(root, ())))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            scc_stack.append(root)
+            on_stack.add(root)
+            while work:
+                code, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        scc_stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self._prerequisites.get(child, ()))))
+                        break
+                    if child in on_stack:
+                        lowlink[code] = min(lowlink[code], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[code])
+                    if lowlink[code] == index[code]:
+                        component = []
+                        while True:
+                            member = scc_stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == code:
+                                break
+                        if len(component) > 1 or code in self._prerequisites.get(code, ()):
+                            cycles.append(component[::-1])
+        return cycles
+
+class IntervalTree:
+    # New: Interval tree over half-open (start, end, value) intervals, values
+    # being comparable (course codes). The intervals are kept in start order
+    # and the array is read as an implicit balanced BST (the middle of each
+    # range is its root); _max_end[i] is the latest end in the subtree rooted
+    # at i, so a query skips whole subtrees that finish before it starts.
+    # O(n log n) to build, O(log n + k) to query, O(n) for add() and
+    # remove(), which is cheap for the dozen or so meetings of a timetable.
+    def __init__(self, intervals=()):
+        self._intervals = sorted(intervals)
+        self._refill()
+
+    def _refill(self):
+        self._max_end = [interval[1] for interval in self._intervals]
+        if self._intervals:
+            self._fill(0, len(self._intervals))
+
+    def _fill(self, low, high):
+        middle = (low + high) // 2
+        max_end = self._max_end
+        if low < middle:
+            max_end[middle] = max(max_end[middle], self._fill(low, middle))
+        if middle + 1 < high:
+            max_end[middle] = max(max_end[middle], self._fill(middle + 1, high))
+        return max_end[middle]
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def add(self, intervals):
+        for interval in intervals:
+            bisect.insort(self._intervals, interval)
+        self._refill()
+
+    # Drops every interval with this value
+    def remove(self, value):
+        kept = [interval for interval in self._intervals if interval[2] != value]
+        if len(kept) != len(self._intervals):
+            self._intervals = kept
+            self._refill()
+
+    # Intervals that share some time with [start, end)
+    def overlapping(self, start, end):
+        intervals, max_end = self._intervals, self._max_end
+        if not intervals or intervals[0][0] >= end or max_end[len(intervals) // 2] <= start:
+            return [] # All of them start too late or end too early
+        found = []
+        ranges = [0, len(intervals)] # Flat (low, high) pairs of subtrees left to visit
+        push, pop = ranges.append, ranges.pop
+        while ranges:
+            high = pop()
+            low = pop()
+            middle = (low + high) // 2
+            if max_end[middle] <= start:
+                continue # Everything below ends too early
+            if low < middle:
+                push(low)
+                push(middle)
+            interval = intervals[middle]
+            if interval[0] < end: # Otherwise the right subtree starts too late
+                if interval[1] > start:
+                    found.append(interval)
+                if middle + 1 < high:
+                    push(middle + 1)
+                    push(high)
+        return found
+
+    # Every pair of overlapping intervals with different values, as sorted
+    # (value, value) tuples in order. In start order, the intervals that
+    # overlap one from a later start are the run right after it, so this is
+    # a single sweep with no queries: O(n + clashes).
+    def clashes(self):
+        intervals = self._intervals
+        count = len(intervals)
+        pairs = set()
+        for index, (_, end, value) in enumerate(intervals):
+            following = index + 1
+            while following < count and intervals[following][0] < end:
+                other = intervals[following][2]
+                if other != value:
+                    pairs.add((value, other) if value < other else (other, value))
+                following += 1
+        return sorted(pairs)
+
+# ----------------------------------------------------------------------------
+# Queries
+#
+# Field("major") == "Computer Science", Field("credits") >= 4 and friends
+# build Filters, which combine with &, | and ~. University.query() asks the
+# secondary indexes for candidates and only checks the filter on those.
+# ----------------------------------------------------------------------------
+
+class Filter:
+    def __init__(self, op, field=None, value=None, parts=()):
+        self.op = op # eq/ne/lt/le/gt/ge/in/between on field, or and/or/not of parts
+        self.field = field
+        self.value = value
+        self.parts = parts
+        self._predicate = None
+
+    def __and__(self, other):
+        return Filter("and", parts=(self, other))
+
+    def __or__(self, other):
+        return Filter("or", parts=(self, other))
+
+    def __invert__(self):
+        return Filter("not", parts=(self,))
+
+    def matches(self, entity):
+        return self.predicate()(entity)
+
+    # The filter compiled to a plain function once, since query() calls it
+    # for every candidate
+    def predicate(self):
+        if self._predicate is None:
+            self._predicate = self._compile()
+        return self._predicate
+
+    def _compile(self):
+        if self.op in ("and", "or"):
+            first, second = (part.predicate() for part in self.parts)
+            if self.op == "and":
+                return lambda entity: first(entity) and second(entity)
+            return lambda entity: first(entity) or second(entity)
+        if self.op == "not":
+            inner = self.parts[0].predicate()
+            return lambda entity: not inner(entity)
+        get, value = operator.attrgetter(self.field), self.value
+        if self.op == "eq":
+            return lambda entity: get(entity) == value
+        if self.op == "ne":
+            return lambda entity: get(entity) != value
+        if self.op == "in":
+            return lambda entity: get(entity) in value
+        if self.op == "between":
+            low, high = value
+            # None (e.g. an unlimited capacity) is neither above nor below anything
+            return lambda entity: (actual := get(entity)) is not None and low <= actual <= high
+        compare = _COMPARISONS[self.op]
+        return lambda entity: (actual := get(entity)) is not None and compare(actual, value)
+
+    def __repr__(self):
+        if self.parts:
+            return f"{self.op}({', '.join(map(repr, self.parts))})"
+        return f"{self.field} {self.op} {self.value!r}"
+
+_COMPARISONS = {"lt": operator.lt, "le": operator.le, "gt": operator.gt, "ge": operator.ge}
+
+class Field:
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, value):
+        return Filter("eq", self.name, value)
+
+    def __ne__(self, value):
+        return Filter("ne", self.name, value)
+
+    def __lt__(self, value):
+        return Filter("lt", self.name, value)
+
+    def __le__(self, value):
+        return Filter("le", self.name, value)
+
+    def __gt__(self, value):
+        return Filter("gt", self.name, value)
+
+    def __ge__(self, value):
+        return Filter("ge", self.name, value)
+
+    def is_in(self, values):
+        return Filter("in", self.name, frozenset(values))
+
+    def between(self, low, high): # Inclusive
+        return Filter("between", self.name, (low, high))
+
+class HashIndex:
+    # attribute value -> ordered set of entity keys, for eq/in lookups
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self._buckets = {}
+
+    def add(self, key, entity):
+        self._buckets.setdefault(getattr(entity, self.attribute), {})[key] = None
+
+    def remove(self, key, entity):
+        value = getattr(entity, self.attribute)
+        bucket = self._buckets.get(value)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._buckets[value]
+
+    def _matching_values(self, op, value):
+        if op == "eq":
+            return (value,)
+        if op == "in":
+            return value
+        return None
+
+    # Number of candidates for a leaf filter, None if this index can't answer it
+    def estimate(self, op, value):
+        values = self._matching_values(op, value)
+        if values is None:
+            return None
+        return sum(len(self._buckets.get(match, ())) for match in values)
+
+    def lookup(self, op, value): # Lazy, so a query with a limit stops early
+        for match in self._matching_values(op, value):
+            yield from self._buckets.get(match, ())
+
+    # {value: number of entities}, for group-by style reports
+    def counts(self):
+        return {value: len(bucket) for value, bucket in self._buckets.items()}
+
+class SortedIndex(HashIndex):
+    # Hash buckets plus the distinct values kept sorted, so range filters only
+    # bisect the (usually short) list of distinct values
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self._sorted_values = []
+
+    def add(self, key, entity):
+        value = getattr(entity, self.attribute)
+        if value not in self._buckets and value is not None:
+            bisect.insort(self._sorted_values, value)
+        super().add(key, entity)
+
+    def remove(self, key, entity):
+        super().remove(key, entity)
+        value = getattr(entity, self.attribute)
+        if value not in self._buckets and value is not None:
+            index = bisect.bisect_left(self._sorted_values, value)
+            if index < len(self._sorted_values) and self._sorted_values[index] == value:
+                del self._sorted_values[index]
+
+    def _matching_values(self, op, value):
+        values = self._sorted_values
+        if op == "lt":
+            return values[:bisect.bisect_left(values, value)]
+        if op == "le":
+            return values[:bisect.bisect_right(values, value)]
+        if op == "gt":
+            return values[bisect.bisect_right(values, value):]
+        if op == "ge":
+            return values[bisect.bisect_left(values, value):]
+        if op == "between":
+            return values[bisect.bisect_left(values, value[0]):bisect.bisect_right(values, value[1])]
+        return super()._matching_values(op, value)
+
+# Looks entities up by their primary key (id or course code)
+class KeyIndex:
+    def __init__(self, registry):
+        self._registry = registry
+
+    def estimate(self, op, value):
+        if op == "eq":
+            return 1 if value in self._registry else 0
+        if op == "in":
+            return sum(1 for key in value if key in self._registry)
+        return None
+
+    def lookup(self, op, value):
+        return (key for key in ((value,) if op == "eq" else value) if key in self._registry)
+
+# Secondary indexes per entity kind, see University.query()
+INDEXES = {
+    "students": (("major", HashIndex),),
+    "faculty": (("department", HashIndex),),
+    "courses": (("credits", SortedIndex),),
+}
+
+# Kinds with a name, see University.find_by_name()
+PEOPLE = ("students", "faculty")
+
+def _unique(iterables):
+    seen = set()
+    for iterable in iterables:
+        for key in iterable:
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+def _entity_key(entity):
+    return entity.course_code if isinstance(entity, Course) else entity.id
+
+# Lowercased strings an entity can be found by: its key, and its name or
+# title from the start of every word ("smith" finds "Alice Smith")
+def _search_terms(entity):
+    text = " ".join((entity.title if isinstance(entity, Course) else entity.name).lower().split())
+    terms = [_entity_key(entity).lower(), text]
+    start = text.find(" ")
+    while start != -1:
+        terms.append(text[start + 1:])
+        start = text.find(" ", start + 1)
+    return terms
+
+class SearchIndex:
+    # Prefix search over one registry: a sorted list of (term, key) pairs, so a
+    # lookup is a bisect plus a short scan. Additions are buffered and merged
+    # on the next search; removals leave stale entries behind that the search
+    # skips (like the waitlist heap) until they outnumber the live ones.
+    def __init__(self, registry):
+        self._registry = registry
+        self._entries = sorted((term, key) for key, entity in registry.items() for term in _search_terms(entity))
+        self._pending = []
+        self._stale = 0
+
+    def add(self, key, entity):
+        self._pending.extend((term, key) for term in _search_terms(entity))
+
+    def remove(self, key, entity):
+        self._stale += len(_search_terms(entity))
+
+    def search(self, prefix, limit=10):
+        if len(self._pending) > 1000:
+            self._entries.extend(self._pending)
+            self._entries.sort() # Two sorted runs, which sort() merges in one pass
+        else:
+            for entry in self._pending: # Cheaper than a full merge for a few entries
+                bisect.insort(self._entries, entry)
+        self._pending = []
+        prefix = " ".join(prefix.lower().split())
+        entries = self._entries
+        found = {}
+        skipped = 0
+        for index in range(bisect.bisect_left(entries, (prefix,)), len(entries)):
+            term, key = entries[index]
+            if not term.startswith(prefix):
+                break
+            entity = self._registry.get(key)
+            if entity is not None and term in _search_terms(entity):
+                found[key] = entity
+                if len(found) == limit:
+                    break
+            else:
+                skipped += 1
+                if skipped > 256 and self._stale:
+                    self._compact() # A run of removed entities, drop them all and retry
+                    return self.search(prefix, limit)
+        return list(found.values())
+
+    # Drops the entries of keys that are gone; the rest are still checked by search()
+    def _compact(self):
+        self._entries = [entry for entry in self._entries if entry[1] in self._registry]
+        self._stale = 0
+
+# Lowercased words of a person's name, each once: "Dr. Mary-Ann O'Neil" ->
+# ["dr", "mary", "ann", "oneil"]
+def _name_words(name):
+    return list(dict.fromkeys(re.findall(r"\w+", name.lower().replace("'", ""))))
+
+# The trigrams of a word padded at both ends: "jon" -> "  j", " jo", "jon", "on "
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+# Typos allowed in a query word of this length
+def _typo_budget(word):
+    return 0 if len(word) <= 2 else 1 if len(word) <= 7 else 2
+
+# Edit distance between a and b, counting a swap of two neighbouring letters
+# as one edit ("jhon" -> "john"), or limit + 1 once it is known to be larger
+def _edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    return _bit_distance(_letter_masks(a), len(a), b, limit)
+
+# {letter: bit i set where a[i] is that letter}, the pattern for _bit_distance()
+def _letter_masks(a):
+    masks = {}
+    for index, letter in enumerate(a):
+        masks[letter] = masks.get(letter, 0) | 1 << index
+    return masks
+
+# Bit-parallel edit distance with swaps (Myers' algorithm as extended by
+# Hyyro): one column of the distance table per letter of b, held in the bits
+# of a few integers, instead of one table cell at a time
+def _bit_distance(masks, length, b, limit):
+    if not length:
+        return min(len(b), limit + 1)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    plus, minus, zero, previous_match = full, 0, 0, 0
+    distance = length
+    remaining = len(b)
+    for letter in b:
+        match = masks.get(letter, 0)
+        swap = ((~zero & match) << 1) & previous_match
+        zero = ((((match & plus) + plus) ^ plus) | match | minus | swap) & full
+        up = minus | (~(zero | plus) & full)
+        down = zero & plus
+        if up & last:
+            distance += 1
+        elif down & last:
+            distance -= 1
+        remaining -= 1
+        if distance - remaining > limit: # Each letter left can only take one off
+            return limit + 1
+        up = ((up << 1) | 1) & full
+        down = (down << 1) & full
+        plus = down | (~(zero | up) & full)
+        minus = zero & up
+        previous_match = match
+    return min(distance, limit + 1)
+
+# Ranking score of a name word for a query word: typos times _TYPO, plus one
+# if the query word is only the beginning of the name word ("john" for
+# "johnson"), so that a whole word beats a completion and a completion beats
+# a typo
+_TYPO = 64
+
+class FuzzyNameIndex:
+    # Typo-tolerant search over the names in one registry. Every distinct name
+    # word keeps the keys of the people who have it, and every trigram the
+    # words that contain it, so a query word is matched against the vocabulary
+    # rather than against every person, and only the words sharing enough
+    # trigrams with the query word get their edit distance computed. A sorted
+    # copy of the vocabulary finds the words a query word is the beginning of.
+    # Names never change, add() and remove() keep the index current.
+    def __init__(self, registry):
+        self._registry = registry
+        self._keys = {} # word -> set of keys
+        self._words = {} # trigram -> set of words
+        self._grams = {} # word -> number of distinct trigrams
+        self._lengths = {} # word length -> set of words, for words too short to filter by trigrams
+        self._sorted = [] # The vocabulary in order, for prefixes
+        for key, entity in registry.items():
+            self.add(key, entity)
+
+    def add(self, key, entity):
+        for word in _name_words(entity.name):
+            keys = self._keys.get(word)
+            if keys is None:
+                keys = self._keys[word] = set()
+                grams = _trigrams(word)
+                self._grams[word] = len(grams)
+                for gram in grams:
+                    self._words.setdefault(gram, set()).add(word)
+                self._lengths.setdefault(len(word), set()).add(word)
+                bisect.insort(self._sorted, word)
+            keys.add(key)
+
+    def remove(self, key, entity):
+        for word in _name_words(entity.name):
+            keys = self._keys.get(word)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys: # Last one with this word, drop it from the vocabulary
+                del self._keys[word]
+                del self._grams[word]
+                for gram in _trigrams(word):
+                    words = self._words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._words[gram]
+                self._lengths[len(word)].discard(word)
+                del self._sorted[bisect.bisect_left(self._sorted, word)]
+
+    # {vocabulary word: edit distance} for the words within limit of word
+    def matches(self, word, limit):
+        grams = _trigrams(word)
+        masks = _letter_masks(word)
+        length = len(word)
+        # An edit changes at most three trigrams of each word, a swap four: a
+        # word within limit keeps all but 3 * limit + 1 of them unless two or
+        # more of its edits are swaps. A word short enough to lose all of them
+        # is compared with every word of a close length instead.
+        slack = 3 * limit + 1
+        least = len(grams) - slack
+        if least <= 0:
+            candidates = chain.from_iterable(self._lengths.get(size, ())
+                                             for size in range(max(length - limit, 1), length + limit + 1))
+        else:
+            shared = Counter(chain.from_iterable(self._words.get(gram, ()) for gram in grams))
+            sizes = self._grams
+            candidates = [candidate for candidate, count in shared.items() if count >= least
+                          and count >= sizes[candidate] - slack and abs(len(candidate) - length) <= limit]
+        found = {}
+        for candidate in candidates:
+            distance = _bit_distance(masks, length, candidate, limit)
+            if distance <= limit:
+                found[candidate] = distance
+        return found
+
+    # Vocabulary words that start with word and are longer
+    def completions(self, word):
+        words = self._sorted
+        index = bisect.bisect_right(words, word)
+        found = []
+        while index < len(words) and words[index].startswith(word):
+            found.append(words[index])
+            index += 1
+        return found
+
+    # [(entity, typos)] for the people with a name word close to every word of
+    # text, or starting with it (two letters or more); typos is the sum over
+    # the query words. Fewest typos first, whole words before completions,
+    # then by key.
+    def search(self, text, limit=10):
+        return [(entity, score // _TYPO) for entity, score in self.ranked(text, limit)]
+
+    # The same with the ranking scores, see _TYPO
+    def ranked(self, text, limit=10):
+        per_word = []
+        for word in _name_words(text):
+            scores = {match: typos * _TYPO for match, typos in self.matches(word, _typo_budget(word)).items()}
+            if len(word) > 1:
+                scores.update(dict.fromkeys(self.completions(word), 1)) # Better than any typo
+            best = {}
+            # Worst first so that a better word of the same person wins
+            for match, score in sorted(scores.items(), key=operator.itemgetter(1), reverse=True):
+                best.update(dict.fromkeys(self._keys[match], score))
+            if not best:
+                return []
+            per_word.append(best)
+        if not per_word:
+            return []
+        per_word.sort(key=len) # Narrowed down from the rarest query word
+        scores = per_word[0]
+        for best in per_word[1:]:
+            scores = {key: score + best[key] for key, score in scores.items() if key in best}
+        ranked = heapq.nsmallest(limit, scores.items(), key=operator.itemgetter(1, 0))
+        return [(self._registry[key], score) for key, score in ranked]
+
+# A single change to the model. entity_type is "student", "faculty", "course",
+# "enrollment", "completion" or "waitlist" (key=student id, related=course
+# code), "assignment" (key=faculty id, related=course code) or "credit_limit"
+# (key=major, None for the default; entity=the new limit). entity is the
+# affected object for added/removed/updated events.
+ChangeEvent = namedtuple("ChangeEvent", "kind entity_type key related entity", defaults=(None, None))
+
+ADDED = "added"
+REMOVED = "removed"
+UPDATED = "updated"
+ENROLLED = "enrolled"
+DROPPED = "dropped"
+ASSIGNED = "assigned"
+UNASSIGNED = "unassigned"
+COMPLETED = "completed"
+WAITLISTED = "waitlisted"
+UNWAITLISTED = "unwaitlisted"
+
+# Nesting depth, undelivered events, the batch() undo log and the locks held
+# by the calls in progress. A thread-safe University keeps one per thread.
+class _CallState:
     def __init__(self):
-        self._students = []
-        self._faculty = []
-        self._courses = []
+        self.depth = 0
+        self.pending_events = []
+        self.undo_log = None
+        self.exclusive = 0 # locked() nesting
+        self.pair_locks = 0
+        self.promotions = {} # Courses to promote once the pair locks are released
+        self.defer_promotions = False # Replaying a call whose promotion ran later
+        self.postponed = {} # ... and the courses it left to promote, see replay()
+        self.journaling = False # Inside a call that is being journaled
+        self.journal_lines = None # Journal records of the batch() in progress
+        self.journal_ticket = 0 # Last journal record of this thread
+
+class _ThreadCallState(_CallState, threading.local):
+    pass
+
+def _mutation(method, pair_locked=False):
+    # Collects every event raised by one public call, cascades included, and
+    # hands them to subscribers as one list once the outermost call returns.
+    # In thread-safe mode the call holds the University's locks, but events
+    # are only delivered after they are released.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        state = self._state
+        state.depth += 1
+        try:
+            if self._stripes is None:
+                return _journaled(self, method, args, kwargs)
+            if not pair_locked:
+                with self.locked():
+                    return _journaled(self, method, args, kwargs)
+            state.pair_locks += 1
+            try:
+                with self._lock_pair(args[0], args[1]):
+                    return _journaled(self, method, args, kwargs)
+            finally:
+                state.pair_locks -= 1
+                if not state.pair_locks and state.promotions and not state.defer_promotions:
+                    self._run_promotions()
+        finally:
+            state.depth -= 1
+            if state.depth == 0:
+                if state.pending_events:
+                    self._publish()
+                if state.journal_ticket:
+                    self._settle_journal()
+    return wrapper
+
+# Runs a mutation and, if it is the outermost one on a journaled University,
+# logs it while its locks are still held, so the journal has conflicting calls
+# in the order they really ran (see university_wal.py)
+def _journaled(university, method, args, kwargs):
+    journal = university._journal
+    state = university._state
+    if journal is None or state.journaling:
+        return method(university, *args, **kwargs)
+    # Copies the arguments before the call changes the entities passed in (a
+    # generator argument is replaced by a list, the journal needs its values)
+    args, captured = journal.capture(args)
+    state.journaling = True
+    try:
+        result = method(university, *args, **kwargs)
+    finally:
+        state.journaling = False
+    record = [method.__name__, captured, kwargs]
+    if state.promotions:
+        record.append(1) # Promotions postponed past the pair locks are journaled when they run
+    if state.journal_lines is not None:
+        state.journal_lines.append(record)
+    else:
+        state.journal_ticket = journal.append(record)
+    return result
+
+# For mutations of one (student_id, course_code) link: in thread-safe mode they
+# only lock those two stripes, so unrelated enrollments run in parallel
+def _link_mutation(method):
+    return _mutation(method, pair_locked=True)
+
+class University:
+    def __init__(self, storage=None, thread_safe=False, lock_stripes=64):
+        # Registries keyed by id/code. Dicts keep insertion order, so the
+        # get_all_* methods still list entities in the order they were added.
+        self._students = {}
+        self._faculty = {}
+        self._courses = {}
+        # Optional persistent backend (see university_store.py). With a storage
+        # the registries act as a cache: single entities are fetched on first
+        # lookup and everything is only loaded when a full listing is needed.
+        self._storage = storage
+        self._fully_loaded = storage is None
+        # Built from the whole catalog on first use, then kept up to date
+        self._prerequisite_graph = None
+        self._indexes = None # kind -> {attribute: index}, built by the first query()
+        self._search_indexes = None # kind -> SearchIndex, built by the first search()
+        self._name_indexes = None # kind -> FuzzyNameIndex, built by the first find_by_name()
+        # Max enrolled credits per major, None for any other major, see set_credit_limit()
+        self._credit_limits = dict(storage.fetch_credit_limits()) if storage else {}
+        # Change notification, see subscribe()
+        self._subscribers = []
+        # Thread-safe mode: enrollment links lock the stripes of their student
+        # and course, everything else (adding/removing entities, assignments,
+        # prerequisites, batch()) takes all stripes, see locked()
+        if thread_safe:
+            self._stripes = [threading.RLock() for _ in range(lock_stripes)]
+            self._state = _ThreadCallState()
+        else:
+            self._stripes = None
+            self._state = _CallState()
+        self._load_lock = threading.Lock() # Serializes cache fills from storage
+        self._journal = None # See attach_journal()
+
+    # callback(events) is called with the list of ChangeEvents produced by each
+    # logical operation (or by a whole changes() block)
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    # Groups several calls into a single notification
+    @contextmanager
+    def changes(self):
+        state = self._state
+        state.depth += 1
+        try:
+            yield self
+        finally:
+            state.depth -= 1
+            if state.depth == 0 and state.pending_events:
+                self._publish()
 
+    @property
+    def thread_safe(self):
+        return self._stripes is not None
+
+    # Holds every lock stripe: waits for in-flight mutations and blocks new
+    # ones. In thread-safe mode, hold it while walking iter_*() or several
+    # entities that must be seen in a consistent state. A no-op otherwise.
+    @contextmanager
+    def locked(self):
+        if self._stripes is None:
+            yield self
+            return
+        for lock in self._stripes: # Always in index order, so no deadlocks
+            lock.acquire()
+        self._state.exclusive += 1
+        try:
+            yield self
+        finally:
+            self._state.exclusive -= 1
+            for lock in reversed(self._stripes):
+                lock.release()
+
+    @contextmanager
+    def _lock_pair(self, student_id, course_code):
+        count = len(self._stripes)
+        first, second = sorted((hash(student_id) % count, hash(course_code) % count))
+        with self._stripes[first], self._stripes[second]: # Same order as locked()
+            yield
+
+    # Applies many mutations as one unit: subscribers get a single event list
+    # and storage a single transaction at commit. If the block raises, every
+    # change made inside it is undone (re-added entities go to the end of the
+    # listings) and the exception propagates.
+    @contextmanager
+    def batch(self):
+        state = self._state
+        if state.undo_log is not None: # Nested batches join the outer one
+            yield self
+            return
+        state.undo_log = []
+        state.depth += 1
+        event_mark = len(state.pending_events)
+        if self._journal is not None:
+            state.journal_lines = []
+        try:
+            with self.locked(): # Other threads never see a half-applied batch
+                if self._storage:
+                    self._storage.begin()
+                try:
+                    yield self
+                except BaseException:
+                    state.journal_lines = None
+                    undo_log, state.undo_log = state.undo_log, None
+                    end = len(undo_log)
+                    while end:
+                        start = end - 1 - undo_log[end - 1]
+                        getattr(self, undo_log[start - 1])(*undo_log[start:end - 1])
+                        end = start - 1
+                    del state.pending_events[event_mark:]
+                    self._indexes = None # Rebuilt by the next query()
+                    self._search_indexes = None
+                    self._name_indexes = None
+                    if self._storage:
+                        self._storage.rollback()
+                    raise
+                if state.journal_lines: # The whole batch is one journal record
+                    state.journal_ticket = self._journal.append_batch(state.journal_lines)
+                if self._storage:
+                    self._storage.commit()
+        finally:
+            state.undo_log = None
+            state.journal_lines = None
+            state.depth -= 1
+            if state.depth == 0:
+                if state.pending_events:
+                    self._publish()
+                if state.journal_ticket:
+                    self._settle_journal()
+
+    # Entries are stored flat as name, *args, len(args) rather than as tuples:
+    # 100k+ long-lived tuples make the cyclic GC rescan the growing log and
+    # slowed large batches down by half.
+    def _record_undo(self, method_name, *args):
+        undo_log = self._state.undo_log
+        if undo_log is not None:
+            undo_log += (method_name, *args, len(args))
+
+    # In-memory inverses used by batch() rollback. Storage is rolled back as a
+    # whole, so these never write to it.
+    def _restore_attribute(self, entity, name, value):
+        setattr(entity, name, value)
+
+    def _unregister_student(self, student_id):
+        del self._students[student_id]
+
+    def _unregister_faculty(self, faculty_id):
+        del self._faculty[faculty_id]
+
+    def _uncomplete_course(self, student, course_code):
+        del student._completed_course_codes[course_code]
+
+    def _restore_student(self, student, course_codes):
+        self._students[student.id] = student
+        for course_code in course_codes:
+            student.enroll_course(course_code)
+            course = self._courses.get(course_code) # May not be cached yet
+            if course:
+                course.add_student_id(student.id)
+        student._credit_load = None # Summed again when next needed
+        student._schedule = None
+
+    def _restore_faculty(self, faculty, course_codes):
+        self._faculty[faculty.id] = faculty
+        for course_code in course_codes:
+            faculty.assign_course(course_code)
+            course = self._courses.get(course_code)
+            if course and course.assigned_faculty_id is None:
+                course.assigned_faculty_id = faculty.id
+        faculty._teaching_load = None
+        faculty._schedule = None
+
+    def _discard_course(self, course_code):
+        del self._courses[course_code]
+        self._prerequisite_graph = None # Rebuilt on next use
+
+    def _restore_prerequisites(self, course, prerequisite_codes):
+        course._prerequisite_codes = prerequisite_codes
+        self._prerequisite_graph = None
+
+    def _restore_credit_limit(self, major, limit):
+        if limit is None:
+            self._credit_limits.pop(major, None)
+        else:
+            self._credit_limits[major] = limit
+
+    def _link_enrollment(self, student, course):
+        student.enroll_course(course.course_code)
+        course.add_student_id(student.id)
+        if student._credit_load is not None:
+            student._credit_load += course._credits
+        self._add_to_schedule(student, course)
+
+    def _unlink_enrollment(self, student, course):
+        student.drop_course(course.course_code)
+        course.remove_student_id(student.id)
+        if student._credit_load is not None:
+            student._credit_load -= course._credits
+        self._drop_from_schedule(student, course)
+
+    def _waitlist_link(self, student, course, priority, seq):
+        course.add_to_waitlist(student.id, priority, seq)
+        student.join_waitlist(course.course_code)
+
+    def _waitlist_unlink(self, student, course):
+        course.remove_from_waitlist(student.id)
+        student.leave_waitlist(course.course_code)
+
+    def _set_assignment(self, course, faculty_id):
+        current = self._faculty.get(course.assigned_faculty_id)
+        if current:
+            current.unassign_course(course.course_code)
+            self._add_teaching(current, -course.credits)
+            self._drop_from_schedule(current, course)
+        course.assigned_faculty_id = faculty_id
+        if faculty_id is not None:
+            self._faculty[faculty_id].assign_course(course.course_code)
+            self._add_teaching(self._faculty[faculty_id], course.credits)
+            self._add_to_schedule(self._faculty[faculty_id], course)
+
+    @staticmethod
+    def _add_teaching(faculty, credits):
+        if faculty._teaching_load is not None:
+            faculty._teaching_load += credits
+
+    # Keep a student's or faculty member's schedule, once built, in step with
+    # their courses
+    @staticmethod
+    def _add_to_schedule(person, course):
+        if person._schedule is not None and course._meetings:
+            person._schedule.add(course.meeting_intervals())
+
+    @staticmethod
+    def _drop_from_schedule(person, course):
+        if person._schedule is not None and course._meetings:
+            person._schedule.remove(course.course_code)
+
+    def _emit(self, kind, entity_type, key, related=None, entity=None):
+        if self._subscribers:
+            self._state.pending_events.append(ChangeEvent(kind, entity_type, key, related, entity))
+
+    def _publish(self):
+        state = self._state
+        events, state.pending_events = state.pending_events, []
+        for callback in list(self._subscribers):
+            callback(events)
+
+    def load_all(self):
+        if self._fully_loaded:
+            return
+        with self.locked(), self._load_lock:
+            if not self._fully_loaded: # Another thread may have loaded meanwhile
+                self._load_all()
+
+    def _load_all(self):
+        # Rebuild the registries in storage order, keeping already cached objects
+        students, faculty, courses = {}, {}, {}
+        for data in self._storage.iter_students():
+            students[data["id"]] = self._students.get(data["id"]) or Student.from_dict(data)
+        for data in self._storage.iter_faculty():
+            faculty[data["id"]] = self._faculty.get(data["id"]) or Faculty.from_dict(data)
+        for data in self._storage.iter_courses():
+            courses[data["course_code"]] = self._courses.get(data["course_code"]) or Course.from_dict(data)
+        self._students, self._faculty, self._courses = students, faculty, courses
+        self._fully_loaded = True
+
+    def _load_entity(self, registry, key, fetch, entity_class):
+        with self._load_lock:
+            entity = registry.get(key) # Another thread may have loaded it meanwhile
+            if entity is None:
+                data = fetch(key)
+                if data:
+                    entity = registry[key] = entity_class.from_dict(data)
+            return entity
+
+    def _prerequisites(self):
+        if self._prerequisite_graph is None:
+            self._prerequisite_graph = PrerequisiteGraph(self.iter_courses())
+        return self._prerequisite_graph
+
+    # Replaces the in-memory state with already linked entities (e.g. from a
+    # snapshot) without the per-call checks of add_*/enroll_*/assign_*.
+    def restore(self, students, faculty, courses, credit_limits=()):
+        if self._storage:
+            raise ValueError("restore() is only supported on an in-memory University")
+        self._students = {student.id: student for student in students}
+        self._faculty = {member.id: member for member in faculty}
+        self._courses = {course.course_code: course for course in courses}
+        self._credit_limits = dict(credit_limits)
+        self._prerequisite_graph = None
+        self._indexes = None
+        self._search_indexes = None
+        self._name_indexes = None
+
+    def flush(self):
+        if self._storage:
+            self._storage.flush()
+        if self._journal is not None:
+            self._journal.sync()
+
+    def close(self):
+        if self._storage:
+            self._storage.close()
+        if self._journal is not None:
+            self._journal.close()
+
+    # New: Logs every mutation from now on to a write-ahead journal, see
+    # university_wal.py. Only for an in-memory University.
+    def attach_journal(self, journal):
+        if self._storage:
+            raise ValueError("a journal is only supported on an in-memory University")
+        self._journal = journal
+
+    # Once the outermost call is over: waits for the fsync if the journal is
+    # synchronous, and compacts it when it is due
+    def _settle_journal(self):
+        state = self._state
+        ticket, state.journal_ticket = state.journal_ticket, 0
+        self._journal.settle(ticket)
+
+    # Re-applies one decoded journal record on recovery: a call, a batch of
+    # calls or promotions that ran after their call released its pair locks
+    def replay(self, record):
+        name, args, kwargs = record[:3]
+        state = self._state
+        if name == "batch":
+            with self.batch():
+                for call in args:
+                    self.replay(call)
+        elif name == "promote":
+            with self.locked():
+                for course_code in args:
+                    course = state.postponed.pop(course_code, None) or self._courses.get(course_code)
+                    if course:
+                        self._promote_waitlist(course)
+        else:
+            state.defer_promotions = len(record) > 3 # Promoted by a later "promote" record
+            try:
+                getattr(self, name)(*args, **kwargs)
+            finally:
+                state.defer_promotions = False
+            # Kept apart so that the next call does not run them early
+            state.postponed.update(state.promotions)
+            state.promotions.clear()
+
+    @_mutation
     def add_student(self, student):
-        if not any(s.id == student.id for s in self._students):
-            self._students.append(student)
+        if self.get_student(student.id) is None:
+            self._students[student.id] = student
+            self._index("students", student)
+            self._record_undo("_unregister_student", student.id)
+            if self._storage:
+                self._storage.save_student(student.to_dict())
+            self._emit(ADDED, "student", student.id, entity=student)
+            return True
+        return False
+
+    @_mutation
+    def update_student(self, student_id, major):
+        student = self.get_student(student_id)
+        if student:
+            self._record_undo("_restore_attribute", student, "major", student.major)
+            self._unindex("students", student, search=False)
+            student.major = major
+            self._index("students", student, search=False)
+            if self._storage:
+                self._storage.save_student(student.to_dict())
+            self._emit(UPDATED, "student", student_id, entity=student)
             return True
         return False
 
     def get_student(self, student_id):
-        for student in self._students:
-            if student.id == student_id:
-                return student
-        return None
+        student = self._students.get(student_id)
+        if student is None and not self._fully_loaded:
+            student = self._load_entity(self._students, student_id, self._storage.fetch_student, Student)
+        return student
+
+    # Resolves many ids at once, in the given order, skipping unknown ids. Ids
+    # not cached yet are fetched from storage in one bulk query.
+    def get_students(self, student_ids):
+        if not self._fully_loaded:
+            missing = [student_id for student_id in student_ids if student_id not in self._students]
+            if missing:
+                self._load_students(missing)
+        students = self._students
+        return [student for student in map(students.get, student_ids) if student is not None]
+
+    def _load_students(self, student_ids):
+        with self._load_lock:
+            registry = self._students
+            missing = [student_id for student_id in student_ids if student_id not in registry]
+            for data in self._storage.fetch_students(missing):
+                if data["id"] not in registry: # Loaded by another thread meanwhile
+                    registry[data["id"]] = Student.from_dict(data)
 
     def get_all_students(self):
-        return self._students.copy()
+        self.load_all()
+        return list(self._students.values())
+
+    # Iterates without copying the registry, for streaming exports
+    def iter_students(self):
+        self.load_all()
+        return iter(self._students.values())
+
+    def student_count(self):
+        self.load_all()
+        return len(self._students)
     
     # New: Remove student and their enrollments
+    @_mutation
     def remove_student(self, student_id):
         student_to_remove = self.get_student(student_id)
         if student_to_remove:
-            # Remove student from all courses they are enrolled in
-            for course in self._courses:
-                if student_id in course.enrolled_student_ids:
+            self._record_undo("_restore_student", student_to_remove,
+                              student_to_remove.enrolled_course_codes)
+            for course_code in student_to_remove.waitlisted_course_codes:
+                self._leave_waitlist(student_to_remove, course_code)
+            # Only visit the courses the student is actually enrolled in
+            freed = []
+            for course_code in student_to_remove.enrolled_course_codes:
+                course = self._courses.get(course_code)
+                if course:
                     course.remove_student_id(student_id)
-                    student_to_remove.drop_course(course.course_code) # Also update student's own list
-            self._students.remove(student_to_remove)
+                    freed.append(course)
+                student_to_remove.drop_course(course_code) # Also update student's own list
+                self._emit(DROPPED, "enrollment", student_id, course_code)
+            student_to_remove._credit_load = 0
+            student_to_remove._schedule = None
+            del self._students[student_id]
+            self._unindex("students", student_to_remove)
+            if self._storage:
+                self._storage.delete_student(student_id)
+            self._emit(REMOVED, "student", student_id, entity=student_to_remove)
+            for course in freed:
+                self._promote_waitlist(course)
             return True
         return False
 
+    # New: Remove a batch of students in one pass, returns how many were removed
+    @_mutation
+    def remove_students(self, student_ids):
+        removed = 0
+        for student_id in student_ids:
+            if self.remove_student(student_id):
+                removed += 1
+        return removed
+
+    @_mutation
     def add_faculty(self, faculty):
-        if not any(f.id == faculty.id for f in self._faculty):
-            self._faculty.append(faculty)
+        if self.get_faculty(faculty.id) is None:
+            self._faculty[faculty.id] = faculty
+            self._index("faculty", faculty)
+            self._record_undo("_unregister_faculty", faculty.id)
+            if self._storage:
+                self._storage.save_faculty(faculty.to_dict())
+            self._emit(ADDED, "faculty", faculty.id, entity=faculty)
+            return True
+        return False
+
+    @_mutation
+    def update_faculty(self, faculty_id, department):
+        faculty = self.get_faculty(faculty_id)
+        if faculty:
+            self._record_undo("_restore_attribute", faculty, "department", faculty.department)
+            self._unindex("faculty", faculty, search=False)
+            faculty.department = department
+            self._index("faculty", faculty, search=False)
+            if self._storage:
+                self._storage.save_faculty(faculty.to_dict())
+            self._emit(UPDATED, "faculty", faculty_id, entity=faculty)
             return True
         return False
     
     def get_faculty(self, faculty_id):
-        for faculty in self._faculty:
-            if faculty.id == faculty_id:
-                return faculty
-        return None
+        faculty = self._faculty.get(faculty_id)
+        if faculty is None and not self._fully_loaded:
+            faculty = self._load_entity(self._faculty, faculty_id, self._storage.fetch_faculty, Faculty)
+        return faculty
     
     def get_all_faculty(self):
-        return self._faculty.copy()
+        self.load_all()
+        return list(self._faculty.values())
+
+    def iter_faculty(self):
+        self.load_all()
+        return iter(self._faculty.values())
+
+    def faculty_count(self):
+        self.load_all()
+        return len(self._faculty)
 
     # New: Remove faculty and their course assignments
+    @_mutation
     def remove_faculty(self, faculty_id):
         faculty_to_remove = self.get_faculty(faculty_id)
         if faculty_to_remove:
-            # Unassign faculty from all courses they are assigned to
-            for course in self._courses:
-                if course.assigned_faculty_id == faculty_id:
+            self._record_undo("_restore_faculty", faculty_to_remove,
+                              faculty_to_remove.assigned_course_codes)
+            # Only visit the courses this faculty member is assigned to
+            for course_code in faculty_to_remove.assigned_course_codes:
+                course = self._courses.get(course_code)
+                if course and course.assigned_faculty_id == faculty_id:
                     course.assigned_faculty_id = None
-                    faculty_to_remove.unassign_course(course.course_code) # Also update faculty's own list
-            self._faculty.remove(faculty_to_remove)
+                faculty_to_remove.unassign_course(course_code) # Also update faculty's own list
+                self._emit(UNASSIGNED, "assignment", faculty_id, course_code)
+            faculty_to_remove._teaching_load = 0
+            faculty_to_remove._schedule = None
+            del self._faculty[faculty_id]
+            self._unindex("faculty", faculty_to_remove)
+            if self._storage:
+                self._storage.delete_faculty(faculty_id)
+            self._emit(REMOVED, "faculty", faculty_id, entity=faculty_to_remove)
             return True
         return False
 
+    @_mutation
     def add_course(self, course):
-        if not any(c.course_code == course.course_code for c in self._courses):
-            self._courses.append(course)
+        if self.get_course(course.course_code) is None:
+            if course.prerequisite_codes or self._prerequisite_graph:
+                graph = self._prerequisites()
+                if graph.would_create_cycle(course.course_code, course.prerequisite_codes):
+                    return False # Would make the prerequisite graph cyclic
+                graph.set_course(course.course_code, course.prerequisite_codes)
+            self._courses[course.course_code] = course
+            self._index("courses", course)
+            self._record_undo("_discard_course", course.course_code)
+            if self._storage:
+                self._storage.save_course(course.to_dict())
+            self._emit(ADDED, "course", course.course_code, entity=course)
             return True
         return False
 
     def get_course(self, course_code):
-        for course in self._courses:
-            if course.course_code == course_code:
-                return course
-        return None
+        course = self._courses.get(course_code)
+        if course is None and not self._fully_loaded:
+            course = self._load_entity(self._courses, course_code, self._storage.fetch_course, Course)
+        return course
 
     def get_all_courses(self):
-        return self._courses.copy()
+        self.load_all()
+        return list(self._courses.values())
+
+    def iter_courses(self):
+        self.load_all()
+        return iter(self._courses.values())
+
+    def course_count(self):
+        self.load_all()
+        return len(self._courses)
+
+    # New: Replace a course's prerequisites, rejecting changes that add a cycle
+    @_mutation
+    def set_course_prerequisites(self, course_code, prerequisite_codes):
+        course = self.get_course(course_code)
+        if course is None:
+            return False
+        graph = self._prerequisites()
+        if graph.would_create_cycle(course_code, prerequisite_codes):
+            return False
+        self._record_undo("_restore_prerequisites", course, course._prerequisite_codes)
+        course._prerequisite_codes = [_intern(code) for code in prerequisite_codes]
+        graph.set_course(course_code, course.prerequisite_codes)
+        if self._storage:
+            self._storage.save_course(course.to_dict())
+        self._emit(UPDATED, "course", course_code, entity=course)
+        return True
+
+    # The graph caches closures on read, so reads also take the locks
+    def get_all_prerequisites(self, course_code):
+        with self.locked():
+            return self._prerequisites().all_prerequisites(course_code)
+
+    # Lists of courses that require each other; empty for a valid catalog
+    def find_prerequisite_cycles(self):
+        with self.locked():
+            return self._prerequisites().find_cycles()
+
+    # Direct prerequisites the student has not completed. Completing a course
+    # implies its own prerequisites were met, so this is O(prerequisite count).
+    def missing_prerequisites(self, student_id, course_code):
+        student = self.get_student(student_id)
+        course = self.get_course(course_code)
+        if not student or not course:
+            return None
+        return [code for code in course.prerequisite_codes if not student.has_completed(code)]
+
+    # Eligibility of a whole cohort for one course: {student_id: missing prerequisites}
+    def check_eligibility(self, student_ids, course_code):
+        course = self.get_course(course_code)
+        if course is None:
+            return {}
+        prerequisite_codes = course.prerequisite_codes
+        result = {}
+        for student_id in student_ids:
+            student = self.get_student(student_id)
+            if student:
+                result[student_id] = [code for code in prerequisite_codes if not student.has_completed(code)]
+        return result
+
+    # New: Record that a student passed a course (ends the enrollment if any)
+    @_link_mutation
+    def record_completion(self, student_id, course_code):
+        student = self.get_student(student_id)
+        course = self.get_course(course_code)
+        if student and course and not student.has_completed(course_code):
+            self.drop_student_from_course(student_id, course_code)
+            student.complete_course(course_code)
+            self._record_undo("_uncomplete_course", student, course_code)
+            if self._storage:
+                self._storage.add_completion(student_id, course_code)
+            self._emit(COMPLETED, "completion", student_id, course_code)
+            return True
+        return False
 
+    @_link_mutation
     def enroll_student_in_course(self, student_id, course_code):
         student = self.get_student(student_id)
         course = self.get_course(course_code)
         if student and course:
-            if course_code not in student.enrolled_course_codes: # Prevent duplicate enrollment
-                student.enroll_course(course_code)
-                course.add_student_id(student_id)
+            if any(not student.has_completed(code) for code in course.prerequisite_codes):
+                return False # Prerequisites not met, see missing_prerequisites()
+            if course._meetings and self._clashes(student, student._enrolled_course_codes, course):
+                return False # Double-booked, see schedule_conflicts()
+            if self._credit_limits and self._over_credit_limit(student, course):
+                return False # Too many credits, see credit_load() and set_credit_limit()
+            if not course.has_free_seat() or course.waitlist_count():
+                return False # Full (or waitlisted students go first), see waitlist_student()
+            if not student.is_enrolled(course_code): # Prevent duplicate enrollment
+                self._link_enrollment(student, course)
+                self._record_undo("_unlink_enrollment", student, course)
+                if self._storage:
+                    self._storage.add_enrollment(student_id, course_code)
+                self._emit(ENROLLED, "enrollment", student_id, course_code)
                 return True # Successfully enrolled
             else:
                 return False # Student is already enrolled in this course
         return False # Student or course not found
     
     # New: Drop student from a specific course
+    @_link_mutation
     def drop_student_from_course(self, student_id, course_code):
         student = self.get_student(student_id)
         course = self.get_course(course_code)
         if student and course:
-            if student_id in course.enrolled_student_ids: # Check if actually enrolled
-                student.drop_course(course_code)
-                course.remove_student_id(student_id)
+            if course.has_student(student_id): # Check if actually enrolled
+                self._unlink_enrollment(student, course)
+                self._record_undo("_link_enrollment", student, course)
+                if self._storage:
+                    self._storage.remove_enrollment(student_id, course_code)
+                self._emit(DROPPED, "enrollment", student_id, course_code)
+                self._promote_waitlist(course) # The freed seat goes to the next in line
                 return True # Successfully dropped
             else:
                 return False # Student not enrolled in this course
         return False # Student or course not found
 
+    # New: Queue a student for a full course. Lower priority values are
+    # promoted first, equal priorities in the order students joined.
+    @_link_mutation
+    def waitlist_student(self, student_id, course_code, priority=0):
+        student = self.get_student(student_id)
+        course = self.get_course(course_code)
+        if not student or not course or (course.has_free_seat() and not course.waitlist_count()):
+            return False # Nothing to wait for, enroll directly
+        if student.is_enrolled(course_code) or course.is_waitlisted(student_id):
+            return False
+        if any(not student.has_completed(code) for code in course.prerequisite_codes):
+            return False
+        if course._meetings and self._clashes(student, student._enrolled_course_codes, course):
+            return False
+        if self._credit_limits and self._over_credit_limit(student, course):
+            return False
+        priority, seq, _ = course.add_to_waitlist(student_id, priority)
+        student.join_waitlist(course_code)
+        self._record_undo("_waitlist_unlink", student, course)
+        if self._storage:
+            self._storage.add_waitlist(course_code, student_id, priority, seq)
+        self._emit(WAITLISTED, "waitlist", student_id, course_code)
+        self._promote_waitlist(course) # In case a seat is free while the queue drains
+        return True
+
+    # New: Take a student off a course's waitlist
+    @_link_mutation
+    def leave_waitlist(self, student_id, course_code):
+        student = self.get_student(student_id)
+        course = self.get_course(course_code)
+        if student and course and course.is_waitlisted(student_id):
+            self._leave_waitlist(student, course_code)
+            return True
+        return False
+
+    # The student's side goes even if the course is gone
+    def _leave_waitlist(self, student, course_code):
+        student.leave_waitlist(course_code)
+        course = self.get_course(course_code)
+        if course is None:
+            return
+        priority, seq, _ = course.remove_from_waitlist(student.id)
+        self._record_undo("_waitlist_link", student, course, priority, seq)
+        if self._storage:
+            self._storage.remove_waitlist(course.course_code, student.id)
+        self._emit(UNWAITLISTED, "waitlist", student.id, course.course_code)
+
+    # New: Change a course's seat limit; raising it promotes waitlisted students
+    @_mutation
+    def set_course_capacity(self, course_code, capacity):
+        course = self.get_course(course_code)
+        if course is None:
+            return False
+        self._record_undo("_restore_attribute", course, "capacity", course.capacity)
+        course.capacity = capacity
+        if self._storage:
+            self._storage.save_course(course.to_dict())
+        self._emit(UPDATED, "course", course_code, entity=course)
+        self._promote_waitlist(course)
+        return True
+
+    # Fills free seats from the head of the waitlist, O(log n) per student
+    def _promote_waitlist(self, course):
+        if not course.waitlist_count():
+            return
+        state = self._state
+        if (self._stripes is not None and not state.exclusive) or state.defer_promotions:
+            # Promotion changes other students, whose stripes this thread does
+            # not hold, so it runs under locked() once the pair locks are released
+            state.promotions[course.course_code] = course
+            return
+        while course.has_free_seat():
+            entry = course.pop_waitlist()
+            if entry is None:
+                break
+            priority, seq, student_id = entry
+            student = self.get_student(student_id)
+            if student is None:
+                continue
+            student.leave_waitlist(course.course_code)
+            self._record_undo("_waitlist_link", student, course, priority, seq)
+            if self._storage:
+                self._storage.remove_waitlist(course.course_code, student_id)
+            self._emit(UNWAITLISTED, "waitlist", student_id, course.course_code)
+            if student.is_enrolled(course.course_code):
+                continue
+            if course._meetings and self._clashes(student, student._enrolled_course_codes, course):
+                continue # Enrolled in a clashing course since joining: loses the place
+            if self._credit_limits and self._over_credit_limit(student, course):
+                continue # Likewise for a full credit load
+            self._link_enrollment(student, course)
+            self._record_undo("_unlink_enrollment", student, course)
+            if self._storage:
+                self._storage.add_enrollment(student_id, course.course_code)
+            self._emit(ENROLLED, "enrollment", student_id, course.course_code)
+
+    def _run_promotions(self):
+        state = self._state
+        with self.locked():
+            if self._journal is not None: # In the order popitem() runs them
+                state.journal_ticket = self._journal.append(["promote", list(reversed(state.promotions)), {}])
+            while state.promotions:
+                _, course = state.promotions.popitem()
+                self._promote_waitlist(course)
+
+    @_mutation
     def assign_faculty_to_course(self, faculty_id, course_code):
         faculty = self.get_faculty(faculty_id)
         course = self.get_course(course_code)
@@ -261,45 +1930,778 @@ class University:
             # Check if course is already assigned to this faculty
             if course.assigned_faculty_id == faculty_id:
                 return False # Faculty already assigned to this course, no new action needed
+            if course._meetings and self._clashes(faculty, faculty._assigned_course_codes, course):
+                return False # Teaching something else at that time, see teaching_conflicts()
             
+            self._record_undo("_set_assignment", course, course.assigned_faculty_id)
             # If assigned to a different faculty, unassign them first
             if course.assigned_faculty_id is not None and course.assigned_faculty_id != faculty_id:
                 old_faculty = self.get_faculty(course.assigned_faculty_id)
                 if old_faculty:
                     old_faculty.unassign_course(course_code) # Update old faculty's list
+                    self._add_teaching(old_faculty, -course.credits)
+                    self._drop_from_schedule(old_faculty, course)
+                    self._emit(UNASSIGNED, "assignment", old_faculty.id, course_code)
             
             # Now assign the new faculty
             course.assigned_faculty_id = faculty_id
             faculty.assign_course(course_code)
+            self._add_teaching(faculty, course.credits)
+            self._add_to_schedule(faculty, course)
+            if self._storage:
+                self._storage.set_course_faculty(course_code, faculty_id)
+            self._emit(ASSIGNED, "assignment", faculty_id, course_code)
             return True # Successfully assigned/reassigned
         return False # Faculty or course not found
     
     # New: Unassign faculty from a specific course
+    @_mutation
     def unassign_faculty_from_course(self, faculty_id, course_code):
         faculty = self.get_faculty(faculty_id)
         course = self.get_course(course_code)
         if faculty and course:
             if course.assigned_faculty_id == faculty_id: # Check if this faculty is assigned to this course
+                self._record_undo("_set_assignment", course, faculty_id)
                 faculty.unassign_course(course_code)
+                self._add_teaching(faculty, -course.credits)
+                self._drop_from_schedule(faculty, course)
                 course.assigned_faculty_id = None
+                if self._storage:
+                    self._storage.set_course_faculty(course_code, None)
+                self._emit(UNASSIGNED, "assignment", faculty_id, course_code)
                 return True
             else:
                 return False # This faculty is not assigned to this course
         return False
 
-    def get_course_roster(self, course_code):
+    # ------------------------------------------------------------------ credit loads
+
+    # Credits of the given courses, resolved one by one: only used the first
+    # time a loaded entity's load is needed, from then on it is kept current
+    def _sum_credits(self, course_codes):
+        total = 0
+        for code in course_codes:
+            course = self.get_course(code)
+            if course:
+                total += course.credits
+        return total
+
+    # The caller holds the student's stripe (or locked()), so the enrollments
+    # cannot change while they are summed
+    def _student_credits(self, student):
+        if student._credit_load is None:
+            student._credit_load = self._sum_credits(student._enrolled_course_codes)
+        return student._credit_load
+
+    def _over_credit_limit(self, student, course):
+        limit = self._credit_limits.get(student._major, self._credit_limits.get(None))
+        return limit is not None and self._student_credits(student) + course.credits > limit
+
+    # New: Credits the student is enrolled in, O(1); None if there is no such student
+    def credit_load(self, student_id):
+        student = self.get_student(student_id)
+        if student is None:
+            return None
+        if student._credit_load is None:
+            with self.locked():
+                self._student_credits(student)
+        return student._credit_load
+
+    # New: Credits of the courses the faculty member teaches, O(1)
+    def teaching_load(self, faculty_id):
+        faculty = self.get_faculty(faculty_id)
+        if faculty is None:
+            return None
+        if faculty._teaching_load is None:
+            with self.locked():
+                if faculty._teaching_load is None:
+                    faculty._teaching_load = self._sum_credits(faculty._assigned_course_codes)
+        return faculty._teaching_load
+
+    # New: Max credits a student of this major may enroll in, None for no limit
+    def credit_limit(self, major=None):
+        return self._credit_limits.get(major, self._credit_limits.get(None))
+
+    @property
+    def credit_limits(self):
+        return dict(self._credit_limits)
+
+    # New: Caps enrolled credits for one major, or for every major without its
+    # own limit when major is None. None removes the limit. Students already
+    # above a lowered limit keep their courses, see degree_audit().
+    @_mutation
+    def set_credit_limit(self, limit, major=None):
+        self._record_undo("_restore_credit_limit", major, self._credit_limits.get(major))
+        self._restore_credit_limit(major, limit)
+        if self._storage:
+            self._storage.set_credit_limit(major, limit)
+        self._emit(UPDATED, "credit_limit", major, entity=limit)
+        return True
+
+    # New: One pass over every student, per major: {major: {"students",
+    # "enrolled_credits", "average_load", "max_load", "over_limit",
+    # "completed_credits", "average_completed", "graduating"}}, graduating
+    # being the students whose completed credits reach required_credits.
+    # Loads come from the running aggregates; completed credits are looked
+    # up in a code -> credits table built once for the pass.
+    def degree_audit(self, required_credits=120):
+        report = {}
+        with self.locked():
+            credits = {course.course_code: course.credits for course in self.iter_courses()}
+            limits = self._credit_limits
+            default_limit = limits.get(None)
+            for student in self.iter_students():
+                load = student._credit_load
+                if load is None:
+                    load = student._credit_load = sum(credits.get(code, 0) for code in student._enrolled_course_codes)
+                completed = 0
+                for code in student._completed_course_codes:
+                    completed += credits.get(code, 0)
+                major = student._major
+                audit = report.get(major)
+                if audit is None:
+                    audit = report[major] = {"students": 0, "enrolled_credits": 0, "max_load": 0, "over_limit": 0,
+                                             "completed_credits": 0, "graduating": 0}
+                audit["students"] += 1
+                audit["enrolled_credits"] += load
+                if load > audit["max_load"]:
+                    audit["max_load"] = load
+                limit = limits.get(major, default_limit)
+                if limit is not None and load > limit:
+                    audit["over_limit"] += 1
+                audit["completed_credits"] += completed
+                if completed >= required_credits:
+                    audit["graduating"] += 1
+        for audit in report.values():
+            audit["average_load"] = audit["enrolled_credits"] / audit["students"]
+            audit["average_completed"] = audit["completed_credits"] / audit["students"]
+        return report
+
+    # ------------------------------------------------------------------ timetable
+
+    # New: Replace a course's weekly meetings (Meeting or [day, start, end, room]
+    # items). Existing enrollments are not re-checked, see validate_term().
+    @_mutation
+    def set_course_meetings(self, course_code, meetings):
+        course = self.get_course(course_code)
+        if course is None:
+            return False
+        meetings = tuple(map(make_meeting, meetings)) # Raises ValueError before anything changes
+        self._record_undo("_set_meetings", course, course._meetings)
+        self._set_meetings(course, meetings)
+        if self._storage:
+            self._storage.save_course(course.to_dict())
+        self._emit(UPDATED, "course", course_code, entity=course)
+        return True
+
+    # Also the undo of set_course_meetings(): the new times go into the
+    # schedules of the people taking and teaching the course
+    def _set_meetings(self, course, meetings):
+        people = [self._students.get(student_id) for student_id in course._enrolled_student_ids]
+        people.append(self._faculty.get(course.assigned_faculty_id))
+        people = [person for person in people if person is not None and person._schedule is not None]
+        for person in people:
+            self._drop_from_schedule(person, course)
+        course._meetings = meetings
+        for person in people:
+            self._add_to_schedule(person, course)
+
+    # An interval tree over the meetings of these courses
+    def _schedule(self, course_codes):
+        intervals = []
+        for code in course_codes:
+            course = self.get_course(code)
+            if course and course._meetings:
+                intervals += course.meeting_intervals()
+        return IntervalTree(intervals)
+
+    # Codes of the courses in course_codes, the courses person takes or
+    # teaches, that meet at the same time as course. Their schedule is built
+    # on first use, then _link_enrollment(), _set_assignment() and friends
+    # keep it current, so a check is one O(log n) query. The caller holds the
+    # person's stripe (or locked()).
+    def _clashes(self, person, course_codes, course):
+        if not course_codes:
+            return []
+        schedule = person._schedule
+        if schedule is None:
+            schedule = person._schedule = self._schedule(course_codes)
+        found = {}
+        for start, end, _ in course.meeting_intervals():
+            for interval in schedule.overlapping(start, end):
+                if interval[2] != course.course_code:
+                    found[interval[2]] = None
+        return list(found)
+
+    # New: Enrolled courses that clash with course_code, None if either is unknown
+    def schedule_conflicts(self, student_id, course_code):
+        student = self.get_student(student_id)
+        course = self.get_course(course_code)
+        if not student or not course:
+            return None
+        if self._stripes is None:
+            return self._clashes(student, student._enrolled_course_codes, course)
+        with self._lock_pair(student_id, course_code): # Like enroll_student_in_course()
+            return self._clashes(student, student._enrolled_course_codes, course)
+
+    # New: Courses the faculty member teaches at the same time as course_code
+    def teaching_conflicts(self, faculty_id, course_code):
+        faculty = self.get_faculty(faculty_id)
         course = self.get_course(course_code)
-        if course:
-            return [self.get_student(student_id) for student_id in course.enrolled_student_ids]
-        return []
+        if not faculty or not course:
+            return None
+        if self._stripes is None:
+            return self._clashes(faculty, faculty._assigned_course_codes, course)
+        with self._lock_pair(faculty_id, course_code): # Assignments hold every stripe
+            return self._clashes(faculty, faculty._assigned_course_codes, course)
+
+    # New: Courses booked into the same room at the same time, as
+    # {room: [(course_code, course_code), ...]}. Meetings without a room are skipped.
+    def room_conflicts(self):
+        with self.locked():
+            rooms = {}
+            for course in self.iter_courses():
+                for meeting, interval in zip(course._meetings, course.meeting_intervals()):
+                    if meeting.room:
+                        rooms.setdefault(meeting.room, []).append(interval)
+        conflicts = {}
+        for room, intervals in rooms.items():
+            pairs = IntervalTree(intervals).clashes()
+            if pairs:
+                conflicts[room] = pairs
+        return conflicts
+
+    # New: Checks a whole term in one pass: every student's enrollments plus
+    # the proposed (student_id, course_code) registrations, every teaching
+    # load and every room. Returns {"students": {id: [(code, code), ...]},
+    # "faculty": {...}, "rooms": {...}, "unknown": [registrations naming
+    # nobody or no course]}; all empty when the term fits together.
+    def validate_term(self, registrations=()):
+        proposed = {}
+        unknown = []
+        with self.locked():
+            for student_id, course_code in registrations:
+                if self.get_student(student_id) is None or self.get_course(course_code) is None:
+                    unknown.append((student_id, course_code))
+                else:
+                    proposed.setdefault(student_id, []).append(course_code)
+            timetabled = {course.course_code for course in self.iter_courses() if course._meetings}
+            students = {}
+            for student in self.iter_students():
+                codes = [code for code in _unique((student._enrolled_course_codes, proposed.get(student.id, ())))
+                         if code in timetabled]
+                if len(codes) > 1: # One course cannot clash with itself
+                    pairs = self._schedule(codes).clashes()
+                    if pairs:
+                        students[student.id] = pairs
+            faculty = {}
+            for member in self.iter_faculty():
+                codes = [code for code in member._assigned_course_codes if code in timetabled]
+                if len(codes) > 1:
+                    pairs = self._schedule(codes).clashes()
+                    if pairs:
+                        faculty[member.id] = pairs
+            rooms = self.room_conflicts()
+        return {"students": students, "faculty": faculty, "rooms": rooms, "unknown": unknown}
+
+    def _build_indexes(self):
+        if self._indexes is None:
+            self.load_all()
+            registries = {"students": self._students, "faculty": self._faculty, "courses": self._courses}
+            indexes = {}
+            for kind, specs in INDEXES.items():
+                indexes[kind] = {attribute: index_class(attribute) for attribute, index_class in specs}
+                for key, entity in registries[kind].items():
+                    for index in indexes[kind].values():
+                        index.add(key, entity)
+            self._indexes = indexes
+        return self._indexes
+
+    # search=False for updates that can't change the searchable name or key
+    def _index(self, kind, entity, search=True):
+        if self._indexes is not None:
+            for index in self._indexes[kind].values():
+                index.add(_entity_key(entity), entity)
+        if search and self._search_indexes is not None:
+            self._search_indexes[kind].add(_entity_key(entity), entity)
+        if search and self._name_indexes is not None and kind in self._name_indexes:
+            self._name_indexes[kind].add(entity.id, entity)
+
+    def _unindex(self, kind, entity, search=True):
+        if self._indexes is not None:
+            for index in self._indexes[kind].values():
+                index.remove(_entity_key(entity), entity)
+        if search and self._search_indexes is not None:
+            self._search_indexes[kind].remove(_entity_key(entity), entity)
+        if search and self._name_indexes is not None and kind in self._name_indexes:
+            self._name_indexes[kind].remove(entity.id, entity)
+
+    # New: Typeahead lookup of students, faculty or courses whose id/code, name
+    # or title (or a word of it) starts with prefix, case-insensitive
+    def search(self, kind, prefix, limit=10):
+        with self.locked():
+            self._registry(kind) # Validates kind
+            if self._search_indexes is None:
+                self.load_all()
+                self._search_indexes = {name: SearchIndex(self._registry(name)) for name in INDEXES}
+            if not prefix.strip():
+                return []
+            return self._search_indexes[kind].search(prefix.strip(), limit)
+
+    # New: Students and/or faculty (kind None for both) whose name matches text
+    # allowing for typos ("jonson" finds "Johnson") or only its beginning
+    # ("john", "ann le"): [(person, typos)], best first. Every query word must
+    # be close to a word of the name, or start one.
+    def find_by_name(self, text, kind=None, limit=10):
+        kinds = PEOPLE if kind is None else (kind,)
+        for name in kinds:
+            if name not in PEOPLE:
+                raise ValueError(f"unknown kind '{name}', expected one of {', '.join(PEOPLE)}")
+        with self.locked():
+            if self._name_indexes is None:
+                self.load_all()
+                self._name_indexes = {name: FuzzyNameIndex(self._registry(name)) for name in PEOPLE}
+            found = []
+            for name in kinds:
+                found += self._name_indexes[name].ranked(text, limit)
+        if len(kinds) > 1:
+            found.sort(key=lambda match: (match[1], match[0].id))
+        return [(person, score // _TYPO) for person, score in found[:limit]]
+
+    def _registry(self, kind):
+        if kind not in INDEXES:
+            raise ValueError(f"unknown kind '{kind}', expected one of {', '.join(INDEXES)}")
+        return {"students": self._students, "faculty": self._faculty, "courses": self._courses}[kind]
+
+    # Estimated candidates for a filter using only the indexes, None if some
+    # part of it needs a full scan
+    def _estimate(self, kind, condition):
+        if condition.op == "and":
+            estimates = [e for e in (self._estimate(kind, part) for part in condition.parts) if e is not None]
+            return min(estimates) if estimates else None
+        if condition.op == "or":
+            estimates = [self._estimate(kind, part) for part in condition.parts]
+            return None if None in estimates else sum(estimates)
+        index = self._index_for(kind, condition.field)
+        return index.estimate(condition.op, condition.value) if index else None
+
+    # Candidate keys for a filter (a superset of the matches), None for a scan.
+    # An "and" uses its most selective indexed part; the rest is checked later.
+    def _candidates(self, kind, condition):
+        if condition.op == "and":
+            best = min((part for part in condition.parts if self._estimate(kind, part) is not None),
+                       key=lambda part: self._estimate(kind, part), default=None)
+            return None if best is None else self._candidates(kind, best)
+        if condition.op == "or":
+            parts = [self._candidates(kind, part) for part in condition.parts]
+            return None if None in parts else _unique(parts)
+        index = self._index_for(kind, condition.field)
+        if index is None or index.estimate(condition.op, condition.value) is None:
+            return None
+        return index.lookup(condition.op, condition.value)
+
+    # True when the index candidates are exactly the matches, so query() can
+    # skip checking the filter on each of them
+    def _exact(self, kind, condition):
+        if condition.op == "or":
+            return all(self._exact(kind, part) for part in condition.parts)
+        return condition.op not in ("and", "not") and self._index_for(kind, condition.field) is not None
+
+    def _index_for(self, kind, field):
+        if field == ("course_code" if kind == "courses" else "id"):
+            return KeyIndex(self._registry(kind))
+        return self._indexes[kind].get(field)
+
+    # New: Entities of one kind ("students", "faculty" or "courses") matching a
+    # Filter. Without order_by, results follow index order (insertion order
+    # within one indexed value) or registry order for a full scan.
+    def query(self, kind, where=None, order_by=None, descending=False, limit=None):
+        with self.locked():
+            self._build_indexes()
+            registry = self._registry(kind)
+            keys = None if where is None else self._candidates(kind, where)
+            entities = registry.values() if keys is None else map(registry.__getitem__, keys)
+            if where is not None and not (keys is not None and self._exact(kind, where)):
+                entities = filter(where.predicate(), entities)
+            if order_by is None:
+                return list(entities if limit is None else islice(entities, limit))
+            sort_key = operator.attrgetter(order_by)
+            if limit is not None:
+                pick = heapq.nlargest if descending else heapq.nsmallest
+                return pick(limit, entities, key=sort_key)
+            return sorted(entities, key=sort_key, reverse=descending)
+
+    def count(self, kind, where=None):
+        with self.locked():
+            self._build_indexes()
+            if where is None:
+                return len(self._registry(kind))
+            if where.op not in ("and", "or", "not"): # A single indexed filter is exact
+                estimate = self._estimate(kind, where)
+                if estimate is not None:
+                    return estimate
+            return len(self.query(kind, where))
+
+    # How query() would run a filter, e.g. "index major (1200 candidates)"
+    def explain(self, kind, where):
+        with self.locked():
+            self._build_indexes()
+            self._registry(kind)
+            if self._candidates(kind, where) is None:
+                return f"full scan of {len(self._registry(kind))} {kind}"
+            fields = sorted(self._indexed_fields(kind, where))
+            return f"index {', '.join(fields)} ({self._estimate(kind, where)} candidates)"
+
+    def _indexed_fields(self, kind, condition):
+        if condition.op == "and":
+            best = min((part for part in condition.parts if self._estimate(kind, part) is not None),
+                       key=lambda part: self._estimate(kind, part))
+            return self._indexed_fields(kind, best)
+        if condition.op == "or":
+            return {field for part in condition.parts for field in self._indexed_fields(kind, part)}
+        return {condition.field}
+
+    # {value: count} straight from an index, e.g. students per major
+    def group_counts(self, kind, attribute):
+        with self.locked():
+            return self._build_indexes()[kind][attribute].counts()
+
+    # New: Courses whose assigned faculty member is in a department
+    def courses_in_department(self, department):
+        with self.locked():
+            self._build_indexes()
+            codes = [code for faculty in self.query("faculty", Field("department") == department)
+                     for code in faculty.assigned_course_codes]
+            return [course for course in map(self._courses.get, codes) if course is not None]
+
+    # New: Paged, optionally sorted access to a course's roster, see RosterCursor.
+    # None if the course does not exist.
+    def roster(self, course_code, sort_by=None, descending=False):
+        course = self.get_course(course_code)
+        if course is None:
+            return None
+        return RosterCursor(self, course.enrolled_student_ids, sort_by, descending)
+
+    def get_course_roster(self, course_code, offset=0, limit=None, sort_by=None, descending=False):
+        cursor = self.roster(course_code, sort_by, descending)
+        if cursor is None:
+            return []
+        return cursor.page(offset, cursor.total if limit is None else limit)
+
+class RosterCursor:
+    # Pages through a roster without resolving every student up front. The
+    # ids are captured when the cursor is created, and students are resolved
+    # one page at a time with University.get_students(). Sorting by "id" (or
+    # the default enrollment order) only orders the ids; "name" and "major"
+    # resolve the whole roster once, on the first page requested.
+    SORT_KEYS = ("enrolled", "id", "name", "major")
+
+    def __init__(self, university, student_ids, sort_by=None, descending=False):
+        if sort_by is not None and sort_by not in self.SORT_KEYS:
+            raise ValueError(f"unknown sort key '{sort_by}', expected one of {', '.join(self.SORT_KEYS)}")
+        self._university = university
+        self._ids = list(student_ids)
+        self._sort_by = sort_by or "enrolled"
+        self._descending = descending
+        self._ordered = self._sort_by == "enrolled" and not descending
+
+    @property
+    def total(self):
+        return len(self._ids)
+
+    def _ordered_ids(self):
+        if not self._ordered:
+            if self._sort_by == "enrolled":
+                self._ids.reverse()
+            elif self._sort_by == "id":
+                self._ids.sort(reverse=self._descending)
+            else:
+                attribute = self._sort_by
+                students = self._university.get_students(self._ids)
+                students.sort(key=lambda student: (getattr(student, attribute), student.id), reverse=self._descending)
+                self._ids = [student.id for student in students]
+            self._ordered = True
+        return self._ids
+
+    def page(self, offset=0, limit=100):
+        return self._university.get_students(self._ordered_ids()[offset:offset + limit])
+
+    # Streams the whole roster, page_size students at a time
+    def iter_pages(self, page_size=500):
+        for offset in range(0, self.total, page_size):
+            yield self.page(offset, page_size)
+
+    def __iter__(self):
+        for page in self.iter_pages():
+            yield from page
 
 # ############################################################################
 #
 # VIEW & CONTROLLER
 #
-# The class below defines the user interface of the application.
+# The classes below define the user interface of the application.
 # ############################################################################
 
+class TaskCancelled(Exception):
+    pass
+
+class BackgroundTask:
+    # Handle shared by a worker thread and the Tk thread. The worker calls
+    # report() as it goes; that is also where a cancel request stops it.
+    def __init__(self, name, on_done, on_error, on_progress):
+        self.name = name
+        self.progress = (0, None) # (done, total or None)
+        self._cancel_event = threading.Event()
+        self._on_done = on_done
+        self._on_error = on_error
+        self._on_progress = on_progress
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def report(self, done, total=None):
+        self.progress = (done, total)
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+class BackgroundRunner:
+    # Runs long University operations on a thread pool so the Tk event loop
+    # keeps running. Workers never touch widgets: results and posted callbacks
+    # go through a queue that the Tk thread drains with after()-based polling.
+    POLL_MS = 50
+
+    def __init__(self, widget, max_workers=2):
+        self._widget = widget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="university-worker")
+        self._queue = queue.Queue()
+        self._tasks = set()
+        self._polling = False
+
+    @property
+    def busy(self):
+        return bool(self._tasks)
+
+    # work(task) runs on a worker thread; the callbacks run on the Tk thread
+    def submit(self, name, work, on_done=None, on_error=None, on_progress=None):
+        task = BackgroundTask(name, on_done, on_error, on_progress)
+        self._tasks.add(task)
+
+        def run():
+            try:
+                result = work(task)
+            except BaseException as e:
+                self._queue.put((self._finish, (task, False, e)))
+            else:
+                self._queue.put((self._finish, (task, True, result)))
+
+        self._executor.submit(run)
+        self._schedule()
+        return task
+
+    # Thread-safe: runs callback(*args) on the Tk thread
+    def post(self, callback, *args):
+        self._queue.put((callback, args))
+
+    def cancel_all(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=True)
+
+    def _schedule(self):
+        if not self._polling:
+            self._polling = True
+            self._widget.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        for task in list(self._tasks):
+            if task._on_progress:
+                task._on_progress(task, *task.progress)
+        self._polling = False
+        if self._tasks:
+            self._schedule()
+
+    def _finish(self, task, ok, value):
+        self._tasks.discard(task)
+        callback = task._on_done if ok else task._on_error
+        if callback:
+            callback(value)
+
+class PagedTreeview:
+    # Shows one page of a (possibly huge) list in an existing Treeview, so only
+    # the visible rows are ever materialized as Tk items. Items use the entity
+    # key as their iid and refresh() diffs the page against what is on screen:
+    # only rows that were added, removed, changed or moved touch the widget.
+    PAGE_SIZE = 100
+
+    def __init__(self, master, tree, source, count, row, page_size=PAGE_SIZE, page_source=None):
+        self.tree = tree
+        self._source = source # callable returning an iterator over all entities
+        self._page_source = page_source # or callable(offset, limit) returning one page
+        self._count = count # callable returning the number of entities
+        self._row = row # entity -> (key, values)
+        self._page_size = page_size
+        self._offset = 0
+        self._values = {} # key -> values currently shown
+
+        nav_frame = ttk.Frame(master)
+        nav_frame.pack(fill="x", pady=(10, 0))
+        self._prev_button = ttk.Button(nav_frame, text="< Prev", command=self.prev_page)
+        self._prev_button.pack(side="left")
+        self._next_button = ttk.Button(nav_frame, text="Next >", command=self.next_page)
+        self._next_button.pack(side="right")
+        self._page_label = ttk.Label(nav_frame, text="")
+        self._page_label.pack(side="left", expand=True)
+
+    def prev_page(self):
+        if self._offset > 0:
+            self._offset = max(0, self._offset - self._page_size)
+            self.refresh()
+
+    def next_page(self):
+        if self._offset + self._page_size < self._count():
+            self._offset += self._page_size
+            self.refresh()
+
+    def refresh(self):
+        total = self._count()
+        if self._offset >= total:
+            # The last page emptied out, step back to the new last page
+            self._offset = max(0, (total - 1) // self._page_size * self._page_size)
+        if self._page_source is not None:
+            page = self._page_source(self._offset, self._page_size)
+        else:
+            page = islice(self._source(), self._offset, self._offset + self._page_size)
+        rows = [self._row(entity) for entity in page]
+
+        wanted = {key for key, _ in rows}
+        stale = [key for key in self._values if key not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for key in stale:
+                del self._values[key]
+
+        children = self.tree.get_children()
+        for index, (key, values) in enumerate(rows):
+            shown = self._values.get(key)
+            if shown is None:
+                self.tree.insert("", index, iid=key, values=values)
+            else:
+                if shown != values:
+                    self.tree.item(key, values=values)
+                if index >= len(children) or children[index] != key:
+                    self.tree.move(key, "", index)
+            self._values[key] = values
+        self._update_nav(total)
+
+    def update_nav(self):
+        self._update_nav(self._count())
+
+    # Re-renders a single row in place if it is on the current page
+    def refresh_row(self, entity):
+        key, values = self._row(entity)
+        if key in self._values and self._values[key] != values:
+            self.tree.item(key, values=values)
+            self._values[key] = values
+
+    def _update_nav(self, total):
+        first = self._offset + 1 if total else 0
+        last = min(self._offset + self._page_size, total)
+        self._page_label.config(text=f"Rows {first}-{last} of {total}")
+        self._prev_button.state(["!disabled"] if self._offset > 0 else ["disabled"])
+        self._next_button.state(["!disabled"] if last < total else ["disabled"])
+
+class Typeahead:
+    # Suggestions under an existing Entry. Typing is debounced, the search runs
+    # through search_runner (off the Tk thread when the model is thread-safe)
+    # and answers for text that has changed since are thrown away. Picking a
+    # suggestion puts its key into the entry.
+    DEBOUNCE_MS = 150
+    ROWS = 8
+
+    def __init__(self, entry, search, search_runner=None):
+        self.entry = entry
+        self._search = search # text -> [(key, label)]
+        self._runner = search_runner # None to search on the Tk thread
+        self._pending = None # after() id of the debounced search
+        self._keys = []
+        self._listbox = tk.Listbox(entry.winfo_toplevel(), height=self.ROWS, activestyle="dotbox")
+        self._listbox.bind("<ButtonRelease-1>", lambda event: self.pick())
+        self._listbox.bind("<Return>", lambda event: self.pick())
+        self._listbox.bind("<Escape>", lambda event: self.hide())
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+        entry.bind("<Down>", self._focus_list, add="+")
+        entry.bind("<Escape>", lambda event: self.hide(), add="+")
+        entry.bind("<FocusOut>", lambda event: entry.after(200, self._hide_unless_focused), add="+")
+
+    def _on_key(self, event):
+        if event.keysym in ("Down", "Up", "Escape", "Return", "Tab"):
+            return
+        if self._pending is not None:
+            self.entry.after_cancel(self._pending)
+        self._pending = self.entry.after(self.DEBOUNCE_MS, self._start_search)
+
+    def _start_search(self):
+        self._pending = None
+        text = self.entry.get().strip()
+        if not text:
+            self.hide()
+        elif self._runner is None:
+            self._show(text, self._search(text))
+        else:
+            self._runner.submit("Search", lambda task: self._search(text),
+                                on_done=lambda results: self._show(text, results))
+
+    def _show(self, text, results):
+        if text != self.entry.get().strip():
+            return # Typed on in the meantime, a newer search is on its way
+        if not results:
+            self.hide()
+            return
+        self._keys = [key for key, _ in results]
+        self._listbox.delete(0, "end")
+        for _, label in results:
+            self._listbox.insert("end", label)
+        self._listbox.config(height=min(len(results), self.ROWS))
+        self._listbox.place(in_=self.entry, x=0, rely=1, relwidth=1)
+        self._listbox.lift()
+
+    def _focus_list(self, event):
+        if self._keys and self._listbox.winfo_ismapped():
+            self._listbox.focus_set()
+            self._listbox.selection_clear(0, "end")
+            self._listbox.selection_set(0)
+            self._listbox.activate(0)
+
+    def pick(self):
+        selection = self._listbox.curselection()
+        if selection:
+            self.entry.delete(0, "end")
+            self.entry.insert(0, self._keys[selection[0]])
+        self.hide()
+        self.entry.focus_set()
+
+    def hide(self):
+        self._listbox.place_forget()
+        self._keys = []
+
+    def _hide_unless_focused(self):
+        pointed = self._listbox.winfo_containing(*self._listbox.winfo_pointerxy())
+        if self._listbox.focus_get() is not self._listbox and pointed is not self._listbox:
+            self.hide()
+
 class UniversityApp(tk.Tk):
     def __init__(self, university):
         super().__init__()
@@ -339,6 +2741,16 @@ class UniversityApp(tk.Tk):
                       background=[('selected', '#4CAF50'), ('active', '#45a049')],
                       foreground=[('selected', 'white'), ('active', 'white')])
 
+        # Long operations run on worker threads, see run_in_background()
+        self.runner = BackgroundRunner(self)
+        # Typeahead searches get their own worker so they never wait behind,
+        # or count as, a long operation. Only used with a thread-safe model.
+        self.search_runner = BackgroundRunner(self, max_workers=1) if university.thread_safe else None
+        self.metrics = None # Made by the diagnostics panel, see show_diagnostics()
+        self.diagnostics = None
+        self.create_menu()
+        self.create_status_bar()
+
         # Create a notebook for tabs
         self.notebook = ttk.Notebook(self)
         # Increased padding around the notebook
@@ -350,19 +2762,403 @@ class UniversityApp(tk.Tk):
         self.courses_tab = ttk.Frame(self.notebook)
         self.enrollment_tab = ttk.Frame(self.notebook)
         self.roster_tab = ttk.Frame(self.notebook)
+        self.people_tab = ttk.Frame(self.notebook)
 
         self.notebook.add(self.students_tab, text="Students")
         self.notebook.add(self.faculty_tab, text="Faculty")
         self.notebook.add(self.courses_tab, text="Courses")
         self.notebook.add(self.enrollment_tab, text="Enrollment")
         self.notebook.add(self.roster_tab, text="Roster")
+        self.notebook.add(self.people_tab, text="Find People")
+
+        # Flush pending storage writes before the window goes away
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Views follow the model through its change events instead of every
+        # handler refreshing them by hand. A view is added when its tab is built.
+        self._views = {}
+        self._roster_course_code = None
+        self._roster_cursor = None
+        self._roster_sort = (None, False) # (sort key, descending), set by the roster headings
+        self._changes_lock = threading.Lock()
+        self._changes_scheduled = False
+        self._dirty_views = set()
+        self._updated_rows = {}
+        self.typeaheads = []
+        self.university.subscribe(self.on_university_changed)
+
+        # New: Tabs are built the first time they are selected, and the views
+        # stay empty until the data has been loaded in the background after
+        # the window is first drawn, see load_data()
+        self.loaded = False
+        self._tab_builders = {str(self.students_tab): self.create_students_tab,
+                              str(self.faculty_tab): self.create_faculty_tab,
+                              str(self.courses_tab): self.create_courses_tab,
+                              str(self.enrollment_tab): self.create_enrollment_tab,
+                              str(self.roster_tab): self.create_roster_tab,
+                              str(self.people_tab): self.create_people_tab}
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.build_selected_tab())
+        self.build_selected_tab()
+        self.after_idle(self.load_data)
+
+    def build_selected_tab(self):
+        builder = self._tab_builders.pop(self.notebook.select(), None)
+        if builder:
+            builder()
+            if self.runner.busy: # Its buttons wait for the job like all the others
+                self._set_busy(True)
+
+    # Runs once the first window contents have been drawn: loads everything
+    # from storage on a worker, then fills the views built so far
+    def load_data(self):
+        self.update_idletasks()
+
+        def done(result):
+            self.loaded = True
+            for view in self._views.values():
+                view.refresh()
+            if self.search_runner:
+                # Builds the search index now rather than on the first keystroke
+                self.search_runner.submit("Search index", lambda task: self.university.search("students", ""))
+
+        self.run_in_background("Loading", lambda task: self.university.load_all(), done)
+
+    # A view of a tab built before the data is loaded stays empty until then
+    def show_view(self, entity_type, view):
+        self._views[entity_type] = view
+        if self.loaded:
+            view.refresh()
+
+    # Events may arrive from worker threads. They are folded into a small
+    # summary (views to re-page, rows to re-render) and applied once on the Tk
+    # thread when it is idle, so a burst of operations refreshes each view once.
+    def on_university_changed(self, events):
+        with self._changes_lock:
+            for event in events:
+                if event.kind in (ADDED, REMOVED):
+                    self._dirty_views.add(event.entity_type)
+                elif event.entity_type == "credit_limit":
+                    self._dirty_views.add("student") # Limits are shown next to every load
+                elif event.kind == UPDATED:
+                    self._updated_rows[event.entity_type, event.key] = event.entity
+                elif event.entity_type in ("enrollment", "waitlist"):
+                    # Seat and waitlist counts shown in the course row
+                    course = self.university.get_course(event.related)
+                    if course:
+                        self._updated_rows["course", event.related] = course
+                    if event.entity_type == "enrollment":
+                        student = self.university.get_student(event.key) # Credit load
+                        if student:
+                            self._updated_rows["student", event.key] = student
+                        if event.related == self._roster_course_code:
+                            self._dirty_views.add("roster")
+                elif event.entity_type == "assignment":
+                    faculty = self.university.get_faculty(event.key) # Teaching load
+                    if faculty:
+                        self._updated_rows["faculty", event.key] = faculty
+            if self._changes_scheduled:
+                return
+            self._changes_scheduled = True
+        if threading.current_thread() is threading.main_thread():
+            self.after_idle(self.apply_changes)
+        else:
+            self.runner.post(self.apply_changes)
+
+    def apply_changes(self):
+        if self.runner.busy:
+            return # Applied when the background job finishes
+        with self._changes_lock:
+            dirty, updated = self._dirty_views, self._updated_rows
+            self._dirty_views, self._updated_rows = set(), {}
+            self._changes_scheduled = False
+        if not self.loaded:
+            return # Every view is refreshed once the data is in
+        for (entity_type, _), entity in updated.items():
+            if entity_type not in dirty and entity_type in self._views:
+                self._views[entity_type].refresh_row(entity)
+        for entity_type in dirty:
+            if entity_type == "roster":
+                self.show_roster(self._roster_course_code)
+            elif entity_type in self._views: # Not built yet, filled when it is
+                self._views[entity_type].refresh()
+
+    # New: Suggestions for the id and course code fields of a tab
+    def create_typeaheads(self, entries):
+        self.typeaheads += [Typeahead(entry, lambda text, kind=kind: self.suggest(kind, text), self.search_runner)
+                            for kind, kind_entries in entries.items() for entry in kind_entries]
+
+    def suggest(self, kind, text):
+        if not self.loaded or (self.search_runner is None and self.runner.busy):
+            return [] # The model is not thread-safe and a job is using it
+        if kind == "courses":
+            return [(course.course_code, f"{course.course_code} - {course.title}")
+                    for course in self.university.search(kind, text)]
+        return [(person.id, f"{person.id} - {person.name}") for person in self.university.search(kind, text)]
+
+    def on_close(self):
+        if self.search_runner:
+            self.search_runner.shutdown()
+        self.runner.shutdown()
+        if self.metrics:
+            self.metrics.close()
+        self.university.close()
+        self.destroy()
+
+    def create_menu(self):
+        menubar = tk.Menu(self)
+        self.file_menu = tk.Menu(menubar, tearoff=0)
+        for kind in ("students", "faculty", "courses", "completions", "enrollments", "assignments"):
+            self.file_menu.add_command(label=f"Import {kind.capitalize()}...",
+                                       command=lambda kind=kind: self.import_file_ui(kind))
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Export JSONL...", command=self.export_jsonl_ui)
+        self.file_menu.add_command(label="Save Snapshot...", command=self.save_snapshot_ui)
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Exit", command=self.on_close)
+        menubar.add_cascade(label="File", menu=self.file_menu)
+        self.reports_menu = tk.Menu(menubar, tearoff=0) # New
+        self.reports_menu.add_command(label="Degree Audit...", command=self.degree_audit_ui)
+        self.reports_menu.add_command(label="Set Credit Limit...", command=self.set_credit_limit_ui)
+        menubar.add_cascade(label="Reports", menu=self.reports_menu)
+        self.view_menu = tk.Menu(menubar, tearoff=0) # New
+        self.view_menu.add_command(label="Diagnostics...", command=self.show_diagnostics)
+        menubar.add_cascade(label="View", menu=self.view_menu)
+        self.config(menu=menubar)
+        # Their commands wait for jobs, see _set_busy()
+        self.menus = [self.file_menu, self.reports_menu, self.view_menu]
+
+    def create_status_bar(self):
+        status_frame = ttk.Frame(self)
+        status_frame.pack(side="bottom", fill="x", padx=20, pady=(0, 10))
+        self.status_label = ttk.Label(status_frame, text="Ready")
+        self.status_label.pack(side="left")
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.runner.cancel_all)
+        self.cancel_button.pack(side="right")
+        self.cancel_button.state(["disabled"])
+        self.progress_bar = ttk.Progressbar(status_frame, length=300)
+        self.progress_bar.pack(side="right", padx=10)
+
+    # Runs work(task) on the worker pool. on_done(result) runs on the Tk thread.
+    # One job at a time: the first one to finish would otherwise re-enable the
+    # UI while the other still runs. Returns None when another job is running.
+    def run_in_background(self, name, work, on_done):
+        if self.runner.busy:
+            self.status_label.config(text=f"{name}: wait for the running job to finish")
+            return None
+
+        def done(result):
+            self._set_busy(False)
+            self.status_label.config(text=f"{name}: done")
+            on_done(result)
+
+        def failed(error):
+            self._set_busy(False)
+            if isinstance(error, TaskCancelled):
+                self.status_label.config(text=f"{name}: cancelled")
+            else:
+                self.status_label.config(text=f"{name}: failed")
+                messagebox.showerror("Error", f"{name} failed: {error}")
+
+        self._set_busy(True)
+        self.status_label.config(text=f"{name}...")
+        return self.runner.submit(name, work, done, failed, self.show_progress)
+
+    def show_progress(self, task, done, total):
+        if total:
+            self.progress_bar.config(mode="determinate", maximum=total, value=done)
+            self.status_label.config(text=f"{task.name}: {done:,} of {total:,}")
+        else:
+            self.progress_bar.config(mode="indeterminate")
+            self.progress_bar.step(5)
+            if done:
+                self.status_label.config(text=f"{task.name}: {done:,} rows")
+
+    # While a job runs the Tk thread leaves the model alone: every button and
+    # menu entry except Cancel is disabled and view refreshes wait until the
+    # job is over. Jobs such as imports and bulk removals hold the model's
+    # locks for long stretches, so a handler on the Tk thread would freeze the
+    # window until they finish (and with a model that is not thread-safe it
+    # would race them). The window itself stays responsive.
+    def _set_busy(self, busy):
+        state = ["disabled"] if busy else ["!disabled"]
+        stack = [self]
+        while stack:
+            widget = stack.pop()
+            stack.extend(widget.winfo_children())
+            if isinstance(widget, (ttk.Button, ttk.Checkbutton)) and widget is not self.cancel_button:
+                widget.state(state)
+        for menu in self.menus:
+            for index in range(menu.index("end") + 1):
+                if menu.type(index) == "command":
+                    menu.entryconfig(index, state="disabled" if busy else "normal")
+        self.cancel_button.state(["!disabled"] if busy else ["disabled"])
+        self.progress_bar.config(mode="determinate", value=0)
+        if not busy:
+            if self.metrics is not None and self.diagnostics is None:
+                self.metrics.disable() # Diagnostics closed during the job
+            self.apply_changes()
+            for view in self._views.values():
+                view.update_nav() # Restore the Prev/Next states
+
+    def import_file_ui(self, kind):
+        path = filedialog.askopenfilename(title=f"Import {kind}",
+                                          filetypes=[("CSV or JSON Lines", "*.csv *.jsonl *.ndjson *.gz"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        import university_io
+
+        def work(task):
+            return university_io.import_file(self.university, kind, path,
+                                             progress=lambda report: task.report(report.rows))
+
+        def done(report):
+            details = "\n".join(f"line {line_no}: {message}" for line_no, message in report.errors[:10])
+            messagebox.showinfo("Import finished", report.summary() + ("\n\n" + details if details else ""))
+
+        self.run_in_background(f"Import {kind}", work, done)
+
+    def export_jsonl_ui(self):
+        path = filedialog.asksaveasfilename(title="Export JSONL", defaultextension=".jsonl",
+                                            filetypes=[("JSON Lines", "*.jsonl"), ("Gzip JSON Lines", "*.jsonl.gz")])
+        if not path:
+            return
+        import university_io
+        self.run_in_background("Export", lambda task: university_io.export_jsonl(self.university, path),
+                               lambda count: messagebox.showinfo("Export finished", f"Exported {count:,} records."))
+
+    def check_timetable_ui(self):
+        def done(report):
+            lines = [f"{student_id}: {', '.join(f'{a}/{b}' for a, b in pairs)}"
+                     for student_id, pairs in report["students"].items()]
+            lines += [f"{faculty_id} teaches {', '.join(f'{a}/{b}' for a, b in pairs)}"
+                      for faculty_id, pairs in report["faculty"].items()]
+            lines += [f"room {room}: {', '.join(f'{a}/{b}' for a, b in pairs)}"
+                      for room, pairs in report["rooms"].items()]
+            if not lines:
+                messagebox.showinfo("Timetable", "No clashes: every student, faculty member and room is free.")
+                return
+            more = f"\n... and {len(lines) - 20:,} more" if len(lines) > 20 else ""
+            messagebox.showwarning("Timetable", f"{len(lines):,} clashes:\n\n" + "\n".join(lines[:20]) + more)
+
+        self.run_in_background("Timetable check", lambda task: self.university.validate_term(), done)
+
+    def degree_audit_ui(self):
+        required = simpledialog.askinteger("Degree Audit", "Credits required to graduate:", initialvalue=120,
+                                           minvalue=0, parent=self)
+        if required is None:
+            return
+
+        def done(report):
+            if not report:
+                messagebox.showinfo("Degree Audit", "There are no students.")
+                return
+            lines = [f"{major}: {audit['students']:,} students, {audit['average_load']:.1f} credits on average "
+                     f"(max {audit['max_load']}, {audit['over_limit']:,} over the limit), "
+                     f"{audit['graduating']:,} with {required}+ completed"
+                     for major, audit in sorted(report.items())]
+            messagebox.showinfo("Degree Audit", "\n".join(lines))
+
+        self.run_in_background("Degree audit", lambda task: self.university.degree_audit(required), done)
+
+    def set_credit_limit_ui(self):
+        major = simpledialog.askstring("Set Credit Limit", "Major (blank for every major without its own limit):",
+                                       parent=self)
+        if major is None:
+            return
+        major = major.strip() or None
+        current = self.university.credit_limits.get(major)
+        text = simpledialog.askstring("Set Credit Limit", "Max enrolled credits (blank for no limit):",
+                                      initialvalue="" if current is None else str(current), parent=self)
+        if text is None:
+            return
+        text = text.strip()
+        try:
+            limit = float(text) if text else None
+        except ValueError:
+            messagebox.showerror("Error", "The limit must be a number.")
+            return
+        if limit is not None and limit.is_integer():
+            limit = int(limit)
+        self.university.set_credit_limit(limit, major)
+
+    # New: Live per-operation numbers of the University API. Collecting only
+    # happens while the window is open and Collect is checked.
+    def show_diagnostics(self):
+        if self.diagnostics:
+            self.diagnostics.lift()
+            return
+        import university_metrics
+        if self.metrics is None:
+            self.metrics = university_metrics.Metrics(self.university)
+        self.metrics.enable()
+        sink = self.metrics.sinks[0]
+
+        window = self.diagnostics = tk.Toplevel(self)
+        window.title("Diagnostics")
+        window.geometry("900x500")
+        columns = ("Operation", "Calls", "Errors", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Avg Items")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=200 if column == "Operation" else 90, anchor="w" if column == "Operation" else "e")
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        controls = ttk.Frame(window)
+        controls.pack(fill="x", padx=10, pady=(0, 10))
+        collect = tk.BooleanVar(value=True)
+
+        def toggle():
+            if collect.get():
+                self.metrics.enable()
+            else:
+                self.metrics.disable()
 
-        # Populate each tab
-        self.create_students_tab()
-        self.create_faculty_tab()
-        self.create_courses_tab()
-        self.create_enrollment_tab()
-        self.create_roster_tab()
+        ttk.Checkbutton(controls, text="Collect", variable=collect, command=toggle).pack(side="left")
+        summary = ttk.Label(controls, text="")
+        summary.pack(side="left", padx=20)
+
+        def refresh():
+            if self.diagnostics is not window:
+                return
+            snapshot = sink.snapshot()
+            tree.delete(*tree.get_children())
+            for operation, stats in snapshot.items():
+                items = stats["mean_items"]
+                tree.insert("", "end", values=(operation, f"{stats['calls']:,}", f"{stats['errors']:,}",
+                                               f"{stats['p50_ms']:.3f}", f"{stats['p95_ms']:.3f}",
+                                               f"{stats['p99_ms']:.3f}", f"{stats['max_ms']:.3f}",
+                                               "" if items is None else f"{items:,.1f}"))
+            calls = sum(stats["calls"] for stats in snapshot.values())
+            summary.config(text=f"{calls:,} calls in {time.time() - sink.started:,.0f}s")
+            window.after(1000, refresh)
+
+        def reset():
+            sink.reset()
+            tree.delete(*tree.get_children()) # Refilled by the next refresh()
+
+        ttk.Button(controls, text="Reset", command=reset).pack(side="right")
+
+        # Enabling or disabling swaps the University's methods, which a job's
+        # worker thread may be calling: Collect waits for jobs like the
+        # buttons, and closing during one leaves that to _set_busy()
+        def close():
+            if not self.runner.busy:
+                self.metrics.disable()
+            self.diagnostics = None
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+
+    def save_snapshot_ui(self):
+        path = filedialog.asksaveasfilename(title="Save Snapshot", defaultextension=".snapshot.gz",
+                                            filetypes=[("Snapshot", "*.gz")])
+        if not path:
+            return
+        import university_io
+        self.run_in_background("Snapshot", lambda task: university_io.save_snapshot(self.university, path),
+                               lambda result: messagebox.showinfo("Snapshot saved", f"Snapshot written to {path}."))
 
     def create_students_tab(self):
         # Frame for adding a new student
@@ -392,7 +3188,7 @@ class UniversityApp(tk.Tk):
 
         remove_student_frame.columnconfigure(1, weight=1)
 
-        ttk.Label(remove_student_frame, text="Student ID:").grid(row=0, column=0, padx=10, pady=10, sticky="w")
+        ttk.Label(remove_student_frame, text="Student ID(s):").grid(row=0, column=0, padx=10, pady=10, sticky="w")
         self.remove_student_id_entry = ttk.Entry(remove_student_frame, width=30)
         self.remove_student_id_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
 
@@ -403,18 +3199,24 @@ class UniversityApp(tk.Tk):
         display_students_frame = ttk.LabelFrame(self.students_tab, text="All Students", padding=(20, 20))
         display_students_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-        self.students_tree = ttk.Treeview(display_students_frame, columns=("ID", "Name", "Major"), show="headings")
+        self.students_tree = ttk.Treeview(display_students_frame, columns=("ID", "Name", "Major", "Credits"),
+                                          show="headings")
         self.students_tree.heading("ID", text="ID")
         self.students_tree.heading("Name", text="Name")
         self.students_tree.heading("Major", text="Major")
+        self.students_tree.heading("Credits", text="Credits")
         
         self.students_tree.column("ID", width=100, anchor="center")
         self.students_tree.column("Name", width=250, anchor="w")
         self.students_tree.column("Major", width=200, anchor="w")
+        self.students_tree.column("Credits", width=80, anchor="center")
 
         self.students_tree.pack(fill="both", expand=True)
-        
-        self.update_students_list()
+        self.students_view = PagedTreeview(display_students_frame, self.students_tree,
+                                           self.university.iter_students, self.university.student_count,
+                                           self.student_row)
+        self.show_view("student", self.students_view)
+        self.create_typeaheads({"students": (self.remove_student_id_entry,)})
 
     def create_faculty_tab(self):
         # Frame for adding a new faculty member
@@ -455,18 +3257,25 @@ class UniversityApp(tk.Tk):
         display_faculty_frame = ttk.LabelFrame(self.faculty_tab, text="All Faculty", padding=(20, 20))
         display_faculty_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-        self.faculty_tree = ttk.Treeview(display_faculty_frame, columns=("ID", "Name", "Department"), show="headings")
+        self.faculty_tree = ttk.Treeview(display_faculty_frame, columns=("ID", "Name", "Department", "Load"),
+                                         show="headings")
         self.faculty_tree.heading("ID", text="ID")
         self.faculty_tree.heading("Name", text="Name")
         self.faculty_tree.heading("Department", text="Department")
+        self.faculty_tree.heading("Load", text="Credits Taught")
 
         self.faculty_tree.column("ID", width=100, anchor="center")
         self.faculty_tree.column("Name", width=250, anchor="w")
         self.faculty_tree.column("Department", width=200, anchor="w")
+        self.faculty_tree.column("Load", width=100, anchor="center")
 
         self.faculty_tree.pack(fill="both", expand=True)
-
-        self.update_faculty_list()
+        self.faculty_view = PagedTreeview(display_faculty_frame, self.faculty_tree,
+                                          self.university.iter_faculty, self.university.faculty_count,
+                                          lambda faculty: (faculty.id, (faculty.id, faculty.name, faculty.department,
+                                                                        self.university.teaching_load(faculty.id))))
+        self.show_view("faculty", self.faculty_view)
+        self.create_typeaheads({"faculty": (self.remove_faculty_id_entry,)})
 
     def create_courses_tab(self):
         # Frame for adding a new course
@@ -487,25 +3296,64 @@ class UniversityApp(tk.Tk):
         self.course_credits_entry = ttk.Entry(add_course_frame, width=30)
         self.course_credits_entry.grid(row=2, column=1, padx=10, pady=10, sticky="ew")
 
-        add_course_button = ttk.Button(add_course_frame, text="Add Course", command=self.add_course)
-        add_course_button.grid(row=3, column=0, columnspan=2, pady=20)
+        ttk.Label(add_course_frame, text="Prerequisites:").grid(row=3, column=0, padx=10, pady=10, sticky="w")
+        self.course_prerequisites_entry = ttk.Entry(add_course_frame, width=30) # Optional, comma separated codes
+        self.course_prerequisites_entry.grid(row=3, column=1, padx=10, pady=10, sticky="ew")
+
+        ttk.Label(add_course_frame, text="Capacity:").grid(row=4, column=0, padx=10, pady=10, sticky="w")
+        self.course_capacity_entry = ttk.Entry(add_course_frame, width=30) # Optional, blank for unlimited
+        self.course_capacity_entry.grid(row=4, column=1, padx=10, pady=10, sticky="ew")
+
+        ttk.Label(add_course_frame, text="Meetings:").grid(row=5, column=0, padx=10, pady=10, sticky="w")
+        self.course_meetings_entry = ttk.Entry(add_course_frame, width=30) # Optional, "Mon 09:00-10:30 B12; ..."
+        self.course_meetings_entry.grid(row=5, column=1, padx=10, pady=10, sticky="ew")
+
+        course_buttons = ttk.Frame(add_course_frame)
+        course_buttons.grid(row=6, column=0, columnspan=2, pady=20)
+        ttk.Button(course_buttons, text="Add Course", command=self.add_course).pack(side="left", padx=5)
+        # New: Student, teaching and room clashes across the whole catalog
+        ttk.Button(course_buttons, text="Check Timetable", command=self.check_timetable_ui).pack(side="left", padx=5)
 
         # Frame for displaying all courses
         display_courses_frame = ttk.LabelFrame(self.courses_tab, text="All Courses", padding=(20, 20))
         display_courses_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-        self.courses_tree = ttk.Treeview(display_courses_frame, columns=("Code", "Title", "Credits"), show="headings")
+        self.courses_tree = ttk.Treeview(display_courses_frame,
+                                         columns=("Code", "Title", "Credits", "Seats", "Waitlist", "Meetings"),
+                                         show="headings")
         self.courses_tree.heading("Code", text="Code")
         self.courses_tree.heading("Title", text="Title")
         self.courses_tree.heading("Credits", text="Credits")
+        self.courses_tree.heading("Seats", text="Seats")
+        self.courses_tree.heading("Waitlist", text="Waitlist")
+        self.courses_tree.heading("Meetings", text="Meetings")
 
         self.courses_tree.column("Code", width=120, anchor="center")
         self.courses_tree.column("Title", width=300, anchor="w")
         self.courses_tree.column("Credits", width=80, anchor="center")
+        self.courses_tree.column("Seats", width=80, anchor="center")
+        self.courses_tree.column("Waitlist", width=80, anchor="center")
+        self.courses_tree.column("Meetings", width=260, anchor="w")
 
         self.courses_tree.pack(fill="both", expand=True)
-
-        self.update_courses_list()
+        self.courses_view = PagedTreeview(display_courses_frame, self.courses_tree,
+                                          self.university.iter_courses, self.university.course_count,
+                                          self.course_row)
+        self.show_view("course", self.courses_view)
+
+    # New: "9/18" when the student's major has a credit limit
+    def student_row(self, student):
+        load = self.university.credit_load(student.id)
+        limit = self.university.credit_limit(student.major)
+        credits = load if limit is None else f"{load}/{limit}"
+        return student.id, (student.id, student.name, student.major, credits)
+
+    @staticmethod
+    def course_row(course):
+        enrolled = len(course.enrolled_student_ids)
+        seats = enrolled if course.capacity is None else f"{enrolled}/{course.capacity}"
+        return course.course_code, (course.course_code, course.title, course.credits, seats, course.waitlist_count(),
+                                    "; ".join(map(format_meeting, course.meetings)))
 
     def create_enrollment_tab(self):
         enrollment_frame = ttk.LabelFrame(self.enrollment_tab, text="Enroll Student in Course", padding=(20, 20))
@@ -555,7 +3403,11 @@ class UniversityApp(tk.Tk):
         self.drop_enroll_course_code_entry.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
 
         drop_enroll_button = ttk.Button(drop_enrollment_frame, text="Drop Enrollment", command=self.drop_enrollment_ui)
-        drop_enroll_button.grid(row=2, column=0, columnspan=2, pady=20)
+        drop_enroll_button.grid(row=2, column=0, pady=20)
+
+        # New: Passing a course counts towards the prerequisites of later ones
+        complete_button = ttk.Button(drop_enrollment_frame, text="Mark Completed", command=self.record_completion_ui)
+        complete_button.grid(row=2, column=1, pady=20)
 
         # New: Frame for unassigning faculty from course
         unassign_faculty_frame = ttk.LabelFrame(self.enrollment_tab, text="Unassign Faculty from Course", padding=(20, 20))
@@ -573,7 +3425,12 @@ class UniversityApp(tk.Tk):
 
         unassign_button = ttk.Button(unassign_faculty_frame, text="Unassign Faculty", command=self.unassign_faculty_ui)
         unassign_button.grid(row=2, column=0, columnspan=2, pady=20)
-
+        self.create_typeaheads({
+            "students": (self.enroll_student_id_entry, self.drop_enroll_student_id_entry),
+            "faculty": (self.assign_faculty_id_entry, self.unassign_faculty_id_entry),
+            "courses": (self.enroll_course_code_entry, self.assign_course_code_entry,
+                        self.drop_enroll_course_code_entry, self.unassign_course_code_entry),
+        })
 
     def create_roster_tab(self):
         roster_frame = ttk.LabelFrame(self.roster_tab, text="View Course Roster", padding=(20, 20))
@@ -589,15 +3446,77 @@ class UniversityApp(tk.Tk):
         view_roster_button.grid(row=1, column=0, columnspan=2, pady=20)
         
         self.roster_tree = ttk.Treeview(self.roster_tab, columns=("ID", "Name", "Major"), show="headings")
-        self.roster_tree.heading("ID", text="ID")
-        self.roster_tree.heading("Name", text="Name")
-        self.roster_tree.heading("Major", text="Major")
+        # New: Click a heading to sort the roster by it, again to reverse
+        self.roster_tree.heading("ID", text="ID", command=lambda: self.sort_roster("id"))
+        self.roster_tree.heading("Name", text="Name", command=lambda: self.sort_roster("name"))
+        self.roster_tree.heading("Major", text="Major", command=lambda: self.sort_roster("major"))
 
         self.roster_tree.column("ID", width=100, anchor="center")
         self.roster_tree.column("Name", width=250, anchor="w")
         self.roster_tree.column("Major", width=200, anchor="w")
         
         self.roster_tree.pack(fill="both", expand=True, padx=20, pady=20)
+        # Only the visible page of students is resolved, see RosterCursor
+        self.roster_view = PagedTreeview(self.roster_tab, self.roster_tree, None, self.roster_count,
+                                         lambda student: (student.id, (student.id, student.name, student.major)),
+                                         page_source=self.roster_page)
+        self.create_typeaheads({"courses": (self.roster_course_code_entry,)})
+
+    # New: Students and faculty by name, typos allowed, as you type
+    def create_people_tab(self):
+        search_frame = ttk.LabelFrame(self.people_tab, text="Find by Name", padding=(20, 20))
+        search_frame.pack(fill="x", padx=20, pady=20)
+
+        search_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(search_frame, text="Name:").grid(row=0, column=0, padx=10, pady=10, sticky="w")
+        self.people_name_entry = ttk.Entry(search_frame, width=30)
+        self.people_name_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+        self.people_kind_combobox = ttk.Combobox(search_frame, values=("Everyone", "Students", "Faculty"),
+                                                 state="readonly", width=12)
+        self.people_kind_combobox.current(0)
+        self.people_kind_combobox.grid(row=0, column=2, padx=10, pady=10)
+        self.people_kind_combobox.bind("<<ComboboxSelected>>", lambda event: self.find_people())
+        self._people_pending = None
+        self.people_name_entry.bind("<KeyRelease>", self._on_people_key)
+        self.people_name_entry.bind("<Return>", lambda event: self.find_people())
+
+        self.people_tree = ttk.Treeview(self.people_tab, columns=("Type", "ID", "Name", "Major/Department", "Typos"),
+                                        show="headings")
+        for column, width in (("Type", 100), ("ID", 100), ("Name", 250), ("Major/Department", 200), ("Typos", 80)):
+            self.people_tree.heading(column, text=column)
+            self.people_tree.column(column, width=width, anchor="center" if width < 200 else "w")
+        self.people_tree.pack(fill="both", expand=True, padx=20, pady=20)
+
+    def _on_people_key(self, event):
+        if event.keysym == "Return":
+            return
+        if self._people_pending is not None:
+            self.after_cancel(self._people_pending)
+        self._people_pending = self.after(Typeahead.DEBOUNCE_MS, self.find_people)
+
+    def find_people(self):
+        self._people_pending = None
+        text = self.people_name_entry.get().strip()
+        kind = {"Students": "students", "Faculty": "faculty"}.get(self.people_kind_combobox.get())
+        if not text:
+            self.show_people(text, [])
+        elif self.search_runner:
+            self.search_runner.submit("Find people", lambda task: self.university.find_by_name(text, kind, 50),
+                                      on_done=lambda matches: self.show_people(text, matches))
+        elif self.loaded and not self.runner.busy: # Not while a job uses a model that is not thread-safe
+            self.show_people(text, self.university.find_by_name(text, kind, 50))
+
+    def show_people(self, text, matches):
+        if text != self.people_name_entry.get().strip():
+            return # Typed on in the meantime, a newer search is on its way
+        self.people_tree.delete(*self.people_tree.get_children())
+        for person, distance in matches:
+            if isinstance(person, Student):
+                values = ("Student", person.id, person.name, person.major, distance)
+            else:
+                values = ("Faculty", person.id, person.name, person.department, distance)
+            self.people_tree.insert("", "end", values=values)
 
     def add_student(self):
         id = self.student_id_entry.get().strip()
@@ -606,7 +3525,6 @@ class UniversityApp(tk.Tk):
         if id and name and major:
             student = Student(id, name, major)
             if self.university.add_student(student):
-                self.update_students_list()
                 self.student_id_entry.delete(0, tk.END)
                 self.student_name_entry.delete(0, tk.END)
                 self.student_major_entry.delete(0, tk.END)
@@ -619,13 +3537,26 @@ class UniversityApp(tk.Tk):
     # New: UI method to remove a student
     def remove_student_ui(self):
         student_id = self.remove_student_id_entry.get().strip()
-        if student_id:
+        student_ids = [s.strip() for s in student_id.split(",") if s.strip()]
+        if len(student_ids) > 1:
+            # Several comma separated IDs: cascade the removals in the background
+            def work(task):
+                removed = 0
+                for start in range(0, len(student_ids), 500):
+                    removed += self.university.remove_students(student_ids[start:start + 500])
+                    task.report(min(start + 500, len(student_ids)), len(student_ids))
+                return removed
+
+            def done(removed):
+                self.remove_student_id_entry.delete(0, tk.END)
+                messagebox.showinfo("Success", f"Removed {removed} of {len(student_ids)} students.")
+
+            self.run_in_background("Remove students", work, done)
+        elif student_ids:
+            student_id = student_ids[0]
             if self.university.remove_student(student_id):
                 messagebox.showinfo("Success", f"Student {student_id} removed successfully!")
-                self.update_students_list()
                 self.remove_student_id_entry.delete(0, tk.END)
-                # Refresh courses list as student enrollments are removed
-                self.update_courses_list() # Not strictly necessary for how courses are displayed, but good for consistency
             else:
                 messagebox.showerror("Error", f"Student with ID '{student_id}' not found.")
         else:
@@ -638,7 +3569,6 @@ class UniversityApp(tk.Tk):
         if id and name and department:
             faculty = Faculty(id, name, department)
             if self.university.add_faculty(faculty):
-                self.update_faculty_list()
                 self.faculty_id_entry.delete(0, tk.END)
                 self.faculty_name_entry.delete(0, tk.END)
                 self.faculty_department_entry.delete(0, tk.END)
@@ -654,10 +3584,7 @@ class UniversityApp(tk.Tk):
         if faculty_id:
             if self.university.remove_faculty(faculty_id):
                 messagebox.showinfo("Success", f"Faculty {faculty_id} removed successfully!")
-                self.update_faculty_list()
                 self.remove_faculty_id_entry.delete(0, tk.END)
-                # Refresh courses list as faculty assignments are removed
-                self.update_courses_list() # Not strictly necessary for how courses are displayed, but good for consistency
             else:
                 messagebox.showerror("Error", f"Faculty with ID '{faculty_id}' not found.")
         else:
@@ -668,20 +3595,37 @@ class UniversityApp(tk.Tk):
         code = self.course_code_entry.get().strip()
         title = self.course_title_entry.get().strip()
         credits_str = self.course_credits_entry.get().strip()
+        prerequisites = [c.strip() for c in self.course_prerequisites_entry.get().split(",") if c.strip()]
+        capacity_str = self.course_capacity_entry.get().strip()
+        meetings_str = self.course_meetings_entry.get().strip()
         if code and title and credits_str:
             try:
                 credits = float(credits_str) # Ensure credits is a number
-                course = Course(code, title, credits)
-                if self.university.add_course(course):
-                    self.update_courses_list()
-                    self.course_code_entry.delete(0, tk.END)
-                    self.course_title_entry.delete(0, tk.END)
-                    self.course_credits_entry.delete(0, tk.END)
-                    messagebox.showinfo("Success", "Course added successfully!")
-                else:
-                    messagebox.showerror("Error", "Course with this code already exists.")
             except ValueError:
                 messagebox.showerror("Error", "Credits must be a number.")
+                return
+            if capacity_str and not capacity_str.isdigit():
+                messagebox.showerror("Error", "Capacity must be a whole number.")
+                return
+            capacity = int(capacity_str) if capacity_str else None
+            try:
+                meetings = parse_meetings(meetings_str)
+            except ValueError as error:
+                messagebox.showerror("Error", str(error))
+                return
+            course = Course(code, title, credits, prerequisites, capacity, meetings)
+            if self.university.add_course(course):
+                self.course_code_entry.delete(0, tk.END)
+                self.course_title_entry.delete(0, tk.END)
+                self.course_credits_entry.delete(0, tk.END)
+                self.course_prerequisites_entry.delete(0, tk.END)
+                self.course_capacity_entry.delete(0, tk.END)
+                self.course_meetings_entry.delete(0, tk.END)
+                messagebox.showinfo("Success", "Course added successfully!")
+            elif self.university.get_course(code) is None:
+                messagebox.showerror("Error", "These prerequisites would create a cycle.")
+            else:
+                messagebox.showerror("Error", "Course with this code already exists.")
         else:
             messagebox.showerror("Error", "Please fill in all fields.")
 
@@ -698,13 +3642,43 @@ class UniversityApp(tk.Tk):
             if not course_exists:
                 messagebox.showerror("Error", f"Course with code '{course_code}' does not exist.")
                 return
+
+            missing = self.university.missing_prerequisites(student_id, course_code)
+            if missing:
+                messagebox.showerror("Error", f"Student {student_id} has not completed: {', '.join(missing)}.")
+                return
+
+            clashes = self.university.schedule_conflicts(student_id, course_code)
+            if clashes:
+                messagebox.showerror("Error", f"{course_code} clashes with {', '.join(clashes)} "
+                                              f"in the timetable of student {student_id}.")
+                return
+
+            limit = self.university.credit_limit(student_exists.major)
+            load = self.university.credit_load(student_id)
+            if (limit is not None and not student_exists.is_enrolled(course_code)
+                    and load + course_exists.credits > limit):
+                messagebox.showerror("Error", f"Student {student_id} is enrolled in {load} credits; "
+                                              f"{course_code} would go over the limit of {limit}.")
+                return
             
-            if self.university.enroll_student_in_course(student_id, course_code):
+            if student_exists.is_enrolled(course_code):
+                messagebox.showinfo("Info", "Student is already enrolled in this course.")
+            elif self.university.enroll_student_in_course(student_id, course_code):
                 messagebox.showinfo("Success", f"Student {student_id} enrolled in {course_code} successfully!")
                 self.enroll_student_id_entry.delete(0, tk.END)
                 self.enroll_course_code_entry.delete(0, tk.END)
-            else: # This branch is hit if the student is already enrolled
-                messagebox.showinfo("Info", "Student is already enrolled in this course.")
+            elif course_exists.is_waitlisted(student_id):
+                position = course_exists.waitlist_position(student_id)
+                messagebox.showinfo("Info", f"Student is already waitlisted for {course_code} (position {position}).")
+            elif messagebox.askyesno("Course Full", f"{course_code} is full. Add {student_id} to the waitlist?"):
+                # New: The student is enrolled automatically when a seat frees up
+                if self.university.waitlist_student(student_id, course_code):
+                    position = course_exists.waitlist_position(student_id)
+                    if position is None: # A seat freed up in the meantime
+                        messagebox.showinfo("Success", f"Student {student_id} enrolled in {course_code} successfully!")
+                    else:
+                        messagebox.showinfo("Success", f"Student {student_id} is number {position} on the waitlist.")
         else:
             messagebox.showerror("Error", "Please provide both student ID and course code.")
             
@@ -727,11 +3701,35 @@ class UniversityApp(tk.Tk):
                 messagebox.showinfo("Success", f"Student {student_id} dropped from {course_code} successfully!")
                 self.drop_enroll_student_id_entry.delete(0, tk.END)
                 self.drop_enroll_course_code_entry.delete(0, tk.END)
+            elif self.university.leave_waitlist(student_id, course_code): # New: also leaves waitlists
+                messagebox.showinfo("Success", f"Student {student_id} removed from the {course_code} waitlist.")
+                self.drop_enroll_student_id_entry.delete(0, tk.END)
+                self.drop_enroll_course_code_entry.delete(0, tk.END)
             else:
                 messagebox.showerror("Error", f"Student {student_id} is not enrolled in {course_code}.")
         else:
             messagebox.showerror("Error", "Please provide both student ID and course code.")
 
+    # New: UI method to record a passed course (shares the drop form's fields)
+    def record_completion_ui(self):
+        student_id = self.drop_enroll_student_id_entry.get().strip()
+        course_code = self.drop_enroll_course_code_entry.get().strip()
+        if student_id and course_code:
+            if not self.university.get_student(student_id):
+                messagebox.showerror("Error", f"Student with ID '{student_id}' does not exist.")
+                return
+            if not self.university.get_course(course_code):
+                messagebox.showerror("Error", f"Course with code '{course_code}' does not exist.")
+                return
+
+            if self.university.record_completion(student_id, course_code):
+                messagebox.showinfo("Success", f"Student {student_id} completed {course_code}.")
+                self.drop_enroll_student_id_entry.delete(0, tk.END)
+                self.drop_enroll_course_code_entry.delete(0, tk.END)
+            else:
+                messagebox.showinfo("Info", f"Student {student_id} has already completed {course_code}.")
+        else:
+            messagebox.showerror("Error", "Please provide both student ID and course code.")
 
     def assign_faculty(self):
         faculty_id = self.assign_faculty_id_entry.get().strip()
@@ -762,12 +3760,10 @@ class UniversityApp(tk.Tk):
                 messagebox.showinfo("Success", f"Faculty {faculty_id} assigned to {course_code} successfully!")
                 self.assign_faculty_id_entry.delete(0, tk.END)
                 self.assign_course_code_entry.delete(0, tk.END)
-                self.update_courses_list() # Courses list is updated to reflect faculty assignment if displayed
-            # No `else` needed here because if assign_faculty_to_course returns False,
-            # it means the faculty or course didn't exist (handled above) or the faculty
-            # was already assigned (handled by the prior `if current_course.assigned_faculty_id == faculty_id` check).
-            # If the model had a reason to return False for a valid faculty/course and it wasn't a duplicate assignment,
-            # we would add an error message here.
+            else: # New: the only other reason is a timetable clash
+                clashes = self.university.teaching_conflicts(faculty_id, course_code) or []
+                messagebox.showerror("Error", f"Faculty {faculty_id} teaches {', '.join(clashes)} "
+                                              f"at the same time as {course_code}.")
         else:
             messagebox.showerror("Error", "Please provide both faculty ID and course code.")
     
@@ -790,33 +3786,24 @@ class UniversityApp(tk.Tk):
                 messagebox.showinfo("Success", f"Faculty {faculty_id} unassigned from {course_code} successfully!")
                 self.unassign_faculty_id_entry.delete(0, tk.END)
                 self.unassign_course_code_entry.delete(0, tk.END)
-                self.update_courses_list() # Update courses list to reflect faculty assignment change
             else:
                 messagebox.showerror("Error", f"Faculty {faculty_id} is not assigned to {course_code}, or course {course_code} has no faculty assigned.")
         else:
             messagebox.showerror("Error", "Please provide both faculty ID and course code.")
 
 
+    # The list views only re-render the rows of their current page that changed
     def update_students_list(self):
-        for i in self.students_tree.get_children():
-            self.students_tree.delete(i)
-        for student in self.university.get_all_students():
-            self.students_tree.insert("", "end", values=(student.id, student.name, student.major))
+        self.students_view.refresh()
 
     def update_faculty_list(self):
-        for i in self.faculty_tree.get_children():
-            self.faculty_tree.delete(i)
-        for faculty in self.university.get_all_faculty():
-            self.faculty_tree.insert("", "end", values=(faculty.id, faculty.name, faculty.department))
+        self.faculty_view.refresh()
 
     def update_courses_list(self):
-        for i in self.courses_tree.get_children():
-            self.courses_tree.delete(i)
-        for course in self.university.get_all_courses():
-            # The original treeview only shows Code, Title, Credits.
-            # If we wanted to show assigned faculty, a column would need to be added.
-            # The internal model is correctly updated even if not visibly reflected here.
-            self.courses_tree.insert("", "end", values=(course.course_code, course.title, course.credits))
+        # The treeview shows Code, Title, Credits, Seats, Waitlist and Meetings.
+        # If we wanted to show assigned faculty, a column would need to be added.
+        # The internal model is correctly updated even if not visibly reflected here.
+        self.courses_view.refresh()
 
 
     def view_roster(self):
@@ -825,37 +3812,62 @@ class UniversityApp(tk.Tk):
             course = self.university.get_course(course_code)
             if not course:
                 messagebox.showerror("Error", f"Course with code '{course_code}' does not exist.")
-                for i in self.roster_tree.get_children(): # Clear previous roster
-                    self.roster_tree.delete(i)
+                self._roster_course_code = None # Clear previous roster
+                self._roster_cursor = None
+                self.roster_view.refresh()
                 return
 
-            roster = self.university.get_course_roster(course_code)
-            for i in self.roster_tree.get_children():
-                self.roster_tree.delete(i)
-            if roster:
-                for student in roster:
-                    self.roster_tree.insert("", "end", values=(student.id, student.name, student.major))
-            else:
+            if not self.show_roster(course_code):
                 messagebox.showinfo("Info", f"No students enrolled in course '{course_code}'.")
         else:
             messagebox.showerror("Error", "Please provide a course code.")
 
+    # Shows the roster's current page; it is refreshed again when that course's enrollments change
+    def show_roster(self, course_code):
+        self._roster_course_code = course_code
+        sort_by, descending = self._roster_sort
+        self._roster_cursor = self.university.roster(course_code, sort_by, descending)
+        self.roster_view.refresh()
+        return self.roster_count()
+
+    def sort_roster(self, sort_by):
+        sort_key, descending = self._roster_sort
+        self._roster_sort = (sort_by, not descending if sort_key == sort_by else False)
+        if self._roster_course_code:
+            self.show_roster(self._roster_course_code)
+
+    def roster_count(self):
+        return self._roster_cursor.total if self._roster_cursor else 0
+
+    def roster_page(self, offset, limit):
+        return self._roster_cursor.page(offset, limit) if self._roster_cursor else []
+
 
 if __name__ == "__main__":
-    university = University()
+    # Let helper modules that import "university" share this module's classes
+    sys.modules.setdefault("university", sys.modules["__main__"])
+    from university_store import SQLiteStorage
+
+    # Data is kept in a local SQLite file (first argument, default university.db)
+    storage = SQLiteStorage(sys.argv[1] if len(sys.argv) > 1 else "university.db")
+    seed = storage.is_empty()
+    # Thread-safe because bulk operations run on the BackgroundRunner's workers
+    university = University(storage, thread_safe=True)
     
-    # Add some initial dummy data for testing the UI
-    university.add_student(Student("S001", "Alice Smith", "Computer Science"))
-    university.add_student(Student("S002", "Bob Johnson", "Mathematics"))
-    university.add_faculty(Faculty("F001", "Dr. Carol White", "Computer Science"))
-    university.add_faculty(Faculty("F002", "Prof. David Green", "Physics"))
-    university.add_course(Course("CS101", "Intro to Programming", 3))
-    university.add_course(Course("MA201", "Calculus I", 4))
-    university.enroll_student_in_course("S001", "CS101")
-    university.enroll_student_in_course("S002", "MA201")
-    university.assign_faculty_to_course("F001", "CS101")
-    university.add_course(Course("PH101", "Intro to Physics", 3)) # Add another course
-    university.assign_faculty_to_course("F002", "PH101") # Assign faculty to it
+    # Add some initial dummy data for testing the UI, only for a fresh database
+    if seed:
+        university.add_student(Student("S001", "Alice Smith", "Computer Science"))
+        university.add_student(Student("S002", "Bob Johnson", "Mathematics"))
+        university.add_faculty(Faculty("F001", "Dr. Carol White", "Computer Science"))
+        university.add_faculty(Faculty("F002", "Prof. David Green", "Physics"))
+        university.add_course(Course("CS101", "Intro to Programming", 3))
+        university.add_course(Course("MA201", "Calculus I", 4))
+        university.enroll_student_in_course("S001", "CS101")
+        university.enroll_student_in_course("S002", "MA201")
+        university.assign_faculty_to_course("F001", "CS101")
+        university.add_course(Course("PH101", "Intro to Physics", 3)) # Add another course
+        university.assign_faculty_to_course("F002", "PH101") # Assign faculty to it
+        university.flush()
 
     app = UniversityApp(university)
     app.mainloop()
@@ -0,0 +1,1204 @@
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from university import (Course, Faculty, Field, Meeting, Student, University, DAYS, ENROLLED, DROPPED,
+                        parse_meetings)
+
+# ############################################################################
+#
+# BENCHMARKS AND STRESS CHECKS
+#
+# Headless scripts that exercise the University model without the Tk UI.
+# Run with --help for the available commands. Each command exits with a
+# non-zero status when a consistency check fails.
+# ############################################################################
+
+
+# Inconsistencies between the two sides of every enrollment and waitlist
+# link, plus courses over capacity, running credit loads that do not match
+# the enrolled courses and students over their credit limit. Empty for a
+# consistent model.
+def check_enrollment_links(university):
+    problems = []
+    courses = {course.course_code: course for course in university.iter_courses()}
+    students = {student.id: student for student in university.iter_students()}
+    for student in students.values():
+        credits = sum(courses[code].credits for code in student.enrolled_course_codes if code in courses)
+        load = university.credit_load(student.id)
+        if load != credits:
+            problems.append(f"{student.id} has a credit load of {load}, their courses add up to {credits}")
+        limit = university.credit_limit(student.major)
+        if limit is not None and load > limit:
+            problems.append(f"{student.id} is enrolled in {load} credits, over the limit of {limit}")
+        for course_code in student.enrolled_course_codes:
+            course = courses.get(course_code)
+            if course is None or not course.has_student(student.id):
+                problems.append(f"{student.id} lists {course_code}, which does not list them")
+        for course_code in student.waitlisted_course_codes:
+            course = courses.get(course_code)
+            if course is None or not course.is_waitlisted(student.id):
+                problems.append(f"{student.id} waits for {course_code}, which does not list them")
+    for course in courses.values():
+        for student_id in course.enrolled_student_ids:
+            student = students.get(student_id)
+            if student is None or not student.is_enrolled(course.course_code):
+                problems.append(f"{course.course_code} lists {student_id}, who does not list it")
+        for student_id in course.waitlisted_student_ids:
+            student = students.get(student_id)
+            if student is None or not student.is_waitlisted(course.course_code):
+                problems.append(f"{course.course_code} waitlists {student_id}, who does not list it")
+        if course.capacity is not None and len(course.enrolled_student_ids) > course.capacity:
+            problems.append(f"{course.course_code} has {len(course.enrolled_student_ids)} students "
+                            f"for {course.capacity} seats")
+        if course.has_free_seat() and course.waitlist_count():
+            problems.append(f"{course.course_code} has a free seat but {course.waitlist_count()} waiting")
+    return problems
+
+
+# Small fixed scenarios for the model's rules, each returning a list of
+# problems like check_enrollment_links(). Run them all with behaviour_checks().
+def _expect(problems, what, actual, expected):
+    if actual != expected:
+        problems.append(f"{what}: got {actual!r}, expected {expected!r}")
+
+
+def _small_university(students=3, courses=3, capacity=None, major="Physics"):
+    university = University()
+    for i in range(courses):
+        university.add_course(Course(f"C{i}", f"Course {i}", 3, capacity=capacity))
+    for i in range(students):
+        university.add_student(Student(f"S{i}", f"Student {i}", major))
+    return university
+
+
+def _links(university):
+    students = {student.id: (student.enrolled_course_codes, student.waitlisted_course_codes,
+                             university.credit_load(student.id)) for student in university.iter_students()}
+    courses = {course.course_code: (sorted(course.enrolled_student_ids), course.waitlist_entries, course.capacity)
+               for course in university.iter_courses()}
+    return students, courses, university.credit_limits
+
+
+# A batch that raises leaves no trace: links, waitlists, loads, limits and
+# entities as before, and no events published
+def _check_batch_rollback():
+    problems = []
+    university = _small_university(capacity=1)
+    university.enroll_student_in_course("S0", "C0")
+    university.waitlist_student("S1", "C0")
+    university.waitlist_student("S2", "C0", priority=1)
+    university.enroll_student_in_course("S1", "C1")
+    before = _links(university)
+    events = []
+    university.subscribe(events.append)
+    try:
+        with university.batch():
+            university.drop_student_from_course("S0", "C0") # Promotes S1
+            university.enroll_student_in_course("S0", "C2")
+            university.set_course_capacity("C1", 5)
+            university.set_credit_limit(3)
+            university.remove_student("S2")
+            university.add_student(Student("S9", "Student 9", "Physics"))
+            raise RuntimeError("rolled back")
+    except RuntimeError:
+        pass
+    else:
+        problems.append("the batch did not re-raise")
+    _expect(problems, "links after rollback", _links(university), before)
+    _expect(problems, "S9 after rollback", university.get_student("S9"), None)
+    _expect(problems, "events from the rolled back batch", events, [])
+    return problems + check_enrollment_links(university)
+
+
+# Freed and added seats go to the waitlist in priority order, equal
+# priorities in the order students joined
+def _check_waitlist_promotion():
+    problems = []
+    university = _small_university(students=5, capacity=1)
+    _expect(problems, "waitlist with a free seat", university.waitlist_student("S1", "C0"), False)
+    university.enroll_student_in_course("S0", "C0")
+    _expect(problems, "enroll in a full course", university.enroll_student_in_course("S1", "C0"), False)
+    for student_id, priority in (("S1", 1), ("S2", 0), ("S3", 1), ("S4", 0)):
+        university.waitlist_student(student_id, "C0", priority)
+    course = university.get_course("C0")
+    _expect(problems, "waitlist order", course.waitlisted_student_ids, ["S2", "S4", "S1", "S3"])
+    university.drop_student_from_course("S0", "C0")
+    _expect(problems, "enrolled after a drop", course.enrolled_student_ids, ["S2"])
+    university.set_course_capacity("C0", 3)
+    _expect(problems, "enrolled after raising capacity", sorted(course.enrolled_student_ids), ["S1", "S2", "S4"])
+    _expect(problems, "still waiting", course.waitlisted_student_ids, ["S3"])
+    _expect(problems, "enroll with the seats taken", university.enroll_student_in_course("S0", "C0"), False)
+    return problems + check_enrollment_links(university)
+
+
+# Neither a new course nor new prerequisites may close a cycle
+def _check_prerequisite_cycles():
+    problems = []
+    university = University()
+    university.add_course(Course("A", "A", 3, prerequisites=["D"])) # D is added last
+    university.add_course(Course("B", "B", 3, prerequisites=["A"]))
+    university.add_course(Course("C", "C", 3, prerequisites=["B"]))
+    _expect(problems, "A requiring C", university.set_course_prerequisites("A", ["C"]), False)
+    _expect(problems, "A requiring itself", university.set_course_prerequisites("A", ["A"]), False)
+    _expect(problems, "A's prerequisites after the rejections", university.get_course("A").prerequisite_codes, ["D"])
+    _expect(problems, "adding D after C", university.add_course(Course("D", "D", 3, prerequisites=["C"])), False)
+    _expect(problems, "D after the rejection", university.get_course("D"), None)
+    _expect(problems, "adding D", university.add_course(Course("D", "D", 3)), True)
+    _expect(problems, "C requiring A and D", university.set_course_prerequisites("C", ["A", "D"]), True)
+    _expect(problems, "cycles", university.find_prerequisite_cycles(), [])
+    return problems
+
+
+# Overlapping meetings refuse the enrollment, back-to-back ones do not, and
+# the clash goes away once the course moves
+def _check_clashes():
+    problems = []
+    university = _small_university(students=1, courses=4)
+    for code, meetings in (("C0", "Mon 09:00-10:30 B12"), ("C1", "Mon 10:00-11:00 B12"),
+                           ("C2", "Mon 10:30-12:00 A1"), ("C3", "Tue 09:00-10:00")):
+        university.set_course_meetings(code, parse_meetings(meetings))
+    university.add_faculty(Faculty("F0", "Faculty 0", "Physics"))
+    _expect(problems, "enroll in C0", university.enroll_student_in_course("S0", "C0"), True)
+    _expect(problems, "enroll in overlapping C1", university.enroll_student_in_course("S0", "C1"), False)
+    _expect(problems, "schedule conflicts of C1", university.schedule_conflicts("S0", "C1"), ["C0"])
+    _expect(problems, "enroll in back-to-back C2", university.enroll_student_in_course("S0", "C2"), True)
+    university.assign_faculty_to_course("F0", "C0")
+    _expect(problems, "teaching conflicts of C1", university.teaching_conflicts("F0", "C1"), ["C0"])
+    university.set_course_meetings("C1", parse_meetings("Wed 10:00-11:00"))
+    _expect(problems, "teaching conflicts of the moved C1", university.teaching_conflicts("F0", "C1"), [])
+    _expect(problems, "enroll in the moved C1", university.enroll_student_in_course("S0", "C1"), True)
+    university.set_course_meetings("C3", parse_meetings("Mon 11:00-12:00"))
+    _expect(problems, "enroll in C3 moved onto C2", university.enroll_student_in_course("S0", "C3"), False)
+    return problems + check_enrollment_links(university)
+
+
+# Per-major limits override the default; neither enrollment nor the
+# waitlist may take a student over their limit
+def _check_credit_limits():
+    problems = []
+    university = _small_university(students=2, courses=6, capacity=1)
+    university.add_student(Student("M0", "Student M0", "Mathematics"))
+    university.set_credit_limit(6)
+    university.set_credit_limit(9, "Mathematics")
+    _expect(problems, "Physics limit", university.credit_limit("Physics"), 6)
+    _expect(problems, "Mathematics limit", university.credit_limit("Mathematics"), 9)
+    for code in ("C0", "C1", "C2", "C3"):
+        university.enroll_student_in_course("M0", code)
+    _expect(problems, "M0's load at the Mathematics limit", university.credit_load("M0"), 9)
+    for code in ("C4", "C5"):
+        university.enroll_student_in_course("S0", code)
+    _expect(problems, "S0's load at the default limit", university.credit_load("S0"), 6)
+    university.set_course_capacity("C3", 2)
+    _expect(problems, "S0 enrolling over the limit", university.enroll_student_in_course("S0", "C3"), False)
+    _expect(problems, "S0 waitlisted over the limit", university.waitlist_student("S0", "C0"), False)
+    _expect(problems, "S1 waitlisted under the limit", university.waitlist_student("S1", "C0"), True)
+    university.set_credit_limit(9, "Physics")
+    _expect(problems, "S0 enrolled under the Physics limit", university.enroll_student_in_course("S0", "C3"), True)
+    _expect(problems, "S0's load", university.credit_load("S0"), 9)
+    return problems + check_enrollment_links(university)
+
+
+BEHAVIOUR_CHECKS = {"batch rollback": _check_batch_rollback, "waitlist promotion": _check_waitlist_promotion,
+                    "prerequisite cycles": _check_prerequisite_cycles, "clashes": _check_clashes,
+                    "credit limits": _check_credit_limits}
+
+
+# {name: problems} for every scenario in BEHAVIOUR_CHECKS
+def behaviour_checks():
+    return {name: check() for name, check in BEHAVIOUR_CHECKS.items()}
+
+
+# Many threads enrolling, dropping, completing and re-creating students on a
+# small catalog so that they keep colliding on the same links
+def stress(threads=8, operations=20000, students=200, courses=20, capacity=None, thread_safe=True, seed=None,
+           max_credits=None):
+    university = University(thread_safe=thread_safe)
+    university.set_credit_limit(max_credits)
+    for i in range(courses):
+        university.add_course(Course(f"C{i}", f"Course {i}", 1 + i % 4, capacity=capacity))
+    for i in range(students):
+        university.add_student(Student(f"S{i}", f"Student {i}", "Undeclared"))
+
+    # Net number of links according to the events, which must match the model
+    net_links = [0]
+    events_lock = threading.Lock()
+    def count_links(events):
+        delta = sum(1 if event.kind == ENROLLED else -1 for event in events
+                    if event.kind in (ENROLLED, DROPPED))
+        with events_lock:
+            net_links[0] += delta
+    university.subscribe(count_links)
+
+    errors = []
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        try:
+            for _ in range(operations):
+                student_id = f"S{rng.randrange(students)}"
+                course_code = f"C{rng.randrange(courses)}"
+                roll = rng.random()
+                if roll < 0.5:
+                    if not university.enroll_student_in_course(student_id, course_code):
+                        university.waitlist_student(student_id, course_code, rng.randrange(3))
+                elif roll < 0.55:
+                    university.leave_waitlist(student_id, course_code)
+                elif roll < 0.9:
+                    university.drop_student_from_course(student_id, course_code)
+                elif roll < 0.97:
+                    university.record_completion(student_id, course_code)
+                else:
+                    university.remove_student(student_id)
+                    university.add_student(Student(student_id, "Readmitted", "Undeclared"))
+        except Exception as error: # Reported below, the check still runs
+            errors.append(repr(error))
+
+    base_seed = random.randrange(1 << 30) if seed is None else seed
+    workers = [threading.Thread(target=worker, args=(base_seed + i,)) for i in range(threads)]
+    # Switch threads far more often than the default 5ms to provoke races
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    start = time.perf_counter()
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    elapsed = time.perf_counter() - start
+
+    problems = errors + check_enrollment_links(university)
+    links = sum(len(course.enrolled_student_ids) for course in university.iter_courses())
+    if links != net_links[0]:
+        problems.append(f"events account for {net_links[0]} links, the model has {links}")
+    return {"seed": base_seed, "operations": threads * operations, "seconds": elapsed,
+            "ops_per_second": threads * operations / elapsed, "links": links, "problems": problems}
+
+
+# Registrar reports through University.query() on a large in-memory catalog,
+# returns [(report, plan, results, milliseconds per run)]
+def query_reports(students=100000, faculty=5000, courses=20000, repeat=100):
+    university = University()
+    majors = ["Computer Science", "Mathematics", "Physics", "Biology", "History"]
+    majors += [f"Major {i}" for i in range(95)]
+    with university.batch():
+        for i in range(students):
+            university.add_student(Student(f"S{i}", f"Student {i}", majors[i % len(majors)]))
+        for i in range(faculty):
+            university.add_faculty(Faculty(f"F{i}", f"Faculty {i}", majors[i % len(majors)]))
+        for i in range(courses):
+            university.add_course(Course(f"C{i}", f"Course {i}", i % 6 + 1))
+            university.assign_faculty_to_course(f"F{i % faculty}", f"C{i}")
+    university.count("students") # Builds the indexes
+
+    reports = [
+        ("Computer Science majors", "students", Field("major") == "Computer Science"),
+        ("science majors", "students", Field("major").is_in(["Physics", "Biology"])),
+        ("courses with credits >= 4", "courses", Field("credits") >= 4),
+        ("3-4 credit courses without faculty", "courses",
+         Field("credits").between(3, 4) & (Field("assigned_faculty_id") == None)),
+    ]
+    results = []
+    for name, kind, where in reports:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = university.query(kind, where)
+        elapsed = (time.perf_counter() - start) / repeat
+        results.append((name, university.explain(kind, where), len(found), elapsed * 1000))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        found = university.courses_in_department("Physics")
+    results.append(("courses taught by Physics", "index department", len(found),
+                    (time.perf_counter() - start) / repeat * 1000))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        found = university.count("courses", Field("credits") >= 4)
+    results.append(("count of courses with credits >= 4", "index credits", found,
+                    (time.perf_counter() - start) / repeat * 1000))
+    return results
+
+
+# Typeahead lookups through University.search(), returns
+# (seconds to build the index, [(kind, prefix, results, milliseconds per run)])
+def search_prefixes(students=100000, faculty=5000, courses=20000, repeat=100, seed=None):
+    rng = random.Random(seed)
+    first_names = ["Alice", "Bob", "Carol", "David", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy"]
+    last_names = ["Smith", "Johnson", "White", "Green", "Brown", "Lee", "Garcia", "Miller", "Davis", "Wilson"]
+    university = University()
+    with university.batch():
+        for i in range(students):
+            university.add_student(Student(f"S{i:06d}", f"{rng.choice(first_names)} {rng.choice(last_names)}",
+                                           "Undeclared"))
+        for i in range(faculty):
+            university.add_faculty(Faculty(f"F{i:05d}", f"Dr. {rng.choice(last_names)}", "Undeclared"))
+        for i in range(courses):
+            university.add_course(Course(f"C{i:05d}", f"Topics in Subject {i}", 3))
+    start = time.perf_counter()
+    university.search("students", "") # Builds the index
+    build = time.perf_counter() - start
+
+    results = []
+    for kind, prefix in [("students", "S0421"), ("students", "smi"), ("students", "alice g"), ("students", "zz"),
+                         ("faculty", "F001"), ("faculty", "dr. w"), ("courses", "C12"), ("courses", "subject 77")]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = university.search(kind, prefix)
+        results.append((kind, prefix, len(found), (time.perf_counter() - start) / repeat * 1000))
+    return build, results
+
+
+# Random names from syllables: a few hundred first names and tens of
+# thousands of surnames, many of them a letter or two apart and some only
+# two or three letters long
+def _random_names(rng, count, first_names=500, last_names=20000):
+    syllables = ["an", "ber", "cal", "dor", "el", "fin", "gar", "hol", "is", "jon", "kel", "lin", "mor", "nel", "os",
+                 "per", "quin", "ros", "son", "tor", "ul", "ver", "wil", "yan", "zel"]
+    firsts = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 2))).capitalize()
+              for _ in range(first_names)]
+    lasts = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))).capitalize()
+             for _ in range(last_names)]
+    return [f"{rng.choice(firsts)} {rng.choice(lasts)}" for _ in range(count)]
+
+
+# One typo in one word of name: a letter changed, dropped, added or swapped
+# with the next one
+def _misspell(rng, name):
+    words = name.lower().split()
+    index = rng.randrange(len(words))
+    letters = list(words[index])
+    position = rng.randrange(len(letters))
+    edit = rng.randrange(4)
+    if edit == 0:
+        letters[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    elif edit == 1 and len(letters) > 1:
+        del letters[position]
+    elif edit == 2 or position == len(letters) - 1:
+        letters.insert(position, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+    else:
+        letters[position], letters[position + 1] = letters[position + 1], letters[position]
+    words[index] = "".join(letters)
+    return " ".join(words)
+
+
+# Typo-tolerant name search over `people` students and faculty (one in
+# twenty): index build, latency of misspelled full names and surnames, and
+# the cost of keeping the index current. On a smaller population, every
+# name word must be found from single typos of it, and the results must
+# match a scan of every name.
+def name_search(people=200000, queries=500, check_people=3000, seed=None):
+    from university import _edit_distance, _name_words, _typo_budget
+
+    rng = random.Random(seed)
+
+    def populate(count):
+        university = University()
+        with university.batch():
+            for i, name in enumerate(_random_names(rng, count)):
+                if i % 20:
+                    university.add_student(Student(f"S{i:06d}", name, "Undeclared"))
+                else:
+                    university.add_faculty(Faculty(f"F{i:06d}", f"Dr. {name}", "Undeclared"))
+        return university
+
+    university = populate(people)
+    start = time.perf_counter()
+    university.find_by_name("x") # Builds the index
+    build = time.perf_counter() - start
+
+    everyone = university.get_all_students() + university.get_all_faculty()
+    latencies = []
+    found = 0
+    for person in rng.sample(everyone, min(queries, len(everyone))):
+        for text in (_misspell(rng, person.name), _misspell(rng, person.name.split()[-1])):
+            start = time.perf_counter()
+            university.find_by_name(text)
+            latencies.append(time.perf_counter() - start)
+        found += any(match is person for match, _ in university.find_by_name(_misspell(rng, person.name), limit=50))
+    latencies.sort()
+
+    start = time.perf_counter()
+    for i in range(1000):
+        university.add_student(Student(f"N{i:04d}", f"Newcomer Quintessa{i}", "Undeclared"))
+    for i in range(1000):
+        university.remove_student(f"N{i:04d}")
+    update_us = (time.perf_counter() - start) / 2000 * 1e6
+
+    problems = []
+    if university.find_by_name("newcomer quintessa1"):
+        problems.append("removed students are still found")
+    small = populate(check_people)
+    people_names = [(person, _name_words(person.name))
+                    for person in small.get_all_students() + small.get_all_faculty()]
+    small.find_by_name("x") # Builds the index
+    index = small._name_indexes["students"]
+    vocabulary = sorted({word for person, words in people_names if isinstance(person, Student) for word in words})
+    missed = []
+    for word in rng.choices(vocabulary, k=3000):
+        typo = _misspell(rng, word)
+        budget = _typo_budget(typo)
+        if _edit_distance(typo, word, budget) <= budget and word not in index.matches(typo, budget):
+            missed.append(f"{typo} -> {word}")
+    if missed:
+        problems.append(f"{len(missed)} name words not found from a single typo: {', '.join(missed[:10])}")
+    for person, _ in rng.sample(people_names, min(200, len(people_names))):
+        text = _misspell(rng, person.name)
+        expected = {}
+        for other, words in people_names:
+            total = 0
+            for query_word in _name_words(text):
+                budget = _typo_budget(query_word)
+                if len(query_word) > 1 and any(word.startswith(query_word) for word in words):
+                    distance = 0 # Typed the beginning of a name word
+                else:
+                    distance = min(_edit_distance(query_word, word, budget) for word in words)
+                if distance > budget:
+                    break
+                total += distance
+            else:
+                expected[other.id] = total
+        got = {match.id: distance for match, distance in small.find_by_name(text, limit=len(people_names))}
+        if got != expected:
+            problems.append(f"'{text}': {len(got)} matches, expected {len(expected)}")
+    return {"people": people, "build_seconds": build, "queries": len(latencies),
+            "p50_ms": _percentile(latencies, 0.50) * 1000, "p95_ms": _percentile(latencies, 0.95) * 1000,
+            "max_ms": latencies[-1] * 1000, "recall": found / min(queries, len(everyone)), "update_us": update_us,
+            "problems": problems}
+
+
+# Bytes held per student, faculty member and course after loading them the
+# way storage and snapshots do (from parsed records, so every string is a
+# fresh object), returns {kind: (entities, bytes per entity)}
+def memory_per_entity(students=100000, faculty=2000, courses=2000, enrollments=4, seed=None):
+    rng = random.Random(seed)
+    majors = ["Computer Science", "Mathematics", "Physics", "Biology", "History", "Economics"]
+    course_codes = [f"C{i:05d}" for i in range(courses)]
+    enrolled = {code: [] for code in course_codes}
+    student_records = []
+    for i in range(students):
+        codes = rng.sample(course_codes, min(enrollments, courses))
+        for code in codes:
+            enrolled[code].append(f"S{i:06d}")
+        student_records.append({"id": f"S{i:06d}", "name": f"Student {i}", "major": rng.choice(majors),
+                                "enrolled_courses": codes, "completed_courses": [], "waitlisted_courses": []})
+    faculty_records = [{"id": f"F{i:05d}", "name": f"Faculty {i}", "department": rng.choice(majors),
+                        "assigned_courses": []} for i in range(faculty)]
+    course_records = [{"course_code": code, "title": f"Course {code}", "credits": 3, "prerequisites": [],
+                       "enrolled_students": enrolled[code], "faculty_id": None, "capacity": None, "waitlist": []}
+                      for code in course_codes]
+    texts = {kind: json.dumps(records) for kind, records in
+             (("students", student_records), ("faculty", faculty_records), ("courses", course_records))}
+    del student_records, faculty_records, course_records, enrolled
+
+    results = {}
+    loaded = {}
+    for kind, entity_class in (("students", Student), ("faculty", Faculty), ("courses", Course)):
+        gc.collect()
+        tracemalloc.start()
+        records = json.loads(texts.pop(kind))
+        entities = [entity_class.from_dict(record) for record in records]
+        del records
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        loaded[kind] = entities
+        results[kind] = (len(entities), used / max(len(entities), 1))
+    return results
+
+
+# Journaled mutations per second (adds, then enroll/drop churn) and the time
+# to recover the same state from the journal directory
+def wal_throughput(students=50000, courses=100, operations=200000, threads=1, synchronous=False,
+                   directory=None, seed=None):
+    import university_wal
+
+    rng = random.Random(seed)
+    cleanup = directory is None
+    directory = directory or tempfile.mkdtemp(prefix="university-wal-")
+    try:
+        university = university_wal.open_university(directory, thread_safe=threads > 1,
+                                                    compact_every=10 * operations, synchronous=synchronous)
+        start = time.perf_counter()
+        for i in range(courses):
+            university.add_course(Course(f"C{i}", f"Course {i}", 3))
+        for i in range(students):
+            university.add_student(Student(f"S{i}", f"Student {i}", "Undeclared"))
+
+        def worker(worker_rng, count):
+            for _ in range(count):
+                student_id = f"S{worker_rng.randrange(students)}"
+                course_code = f"C{worker_rng.randrange(courses)}"
+                if worker_rng.random() < 0.6:
+                    university.enroll_student_in_course(student_id, course_code)
+                else:
+                    university.drop_student_from_course(student_id, course_code)
+
+        workers = [threading.Thread(target=worker, args=(random.Random(rng.random()), operations // threads))
+                   for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        university.flush() # Everything written and fsynced
+        elapsed = time.perf_counter() - start
+        mutations = courses + students + operations // threads * threads
+        links = sum(len(course.enrolled_student_ids) for course in university.iter_courses())
+        university.close()
+
+        start = time.perf_counter()
+        recovered = university_wal.open_university(directory)
+        recovery = time.perf_counter() - start
+        recovered_links = sum(len(course.enrolled_student_ids) for course in recovered.iter_courses())
+        recovered.close()
+        problems = [] if recovered_links == links else [f"recovered {recovered_links} links, expected {links}"]
+        return {"mutations": mutations, "seconds": elapsed, "mutations_per_second": mutations / elapsed,
+                "recovery_seconds": recovery, "problems": problems}
+    finally:
+        if cleanup:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+SUITE_SCALES = (1000, 10000, 100000, 1000000)
+SUITE_OPERATIONS = ("get_student", "get_course_roster", "enroll_student_in_course", "add_student",
+                    "remove_student", "remove_faculty")
+
+
+# A synthetic university with `scale` students, one course per 50 students
+# and one faculty member per 200, every student enrolled in `enrollments`
+# random courses and every course assigned
+def synthetic_university(scale, enrollments=4, seed=0):
+    rng = random.Random(seed)
+    university = University()
+    courses = max(scale // 50, 10)
+    faculty = max(scale // 200, 5)
+    majors = ["Computer Science", "Mathematics", "Physics", "Biology", "History", "Economics"]
+    for i in range(courses):
+        university.add_course(Course(f"C{i}", f"Course {i}", rng.randint(1, 5)))
+    for i in range(faculty):
+        university.add_faculty(Faculty(f"F{i}", f"Faculty {i}", rng.choice(majors)))
+    for i in range(courses):
+        university.assign_faculty_to_course(f"F{i % faculty}", f"C{i}")
+    for i in range(scale):
+        student_id = f"S{i}"
+        university.add_student(Student(student_id, f"Student {i}", rng.choice(majors)))
+        for course_index in rng.sample(range(courses), min(enrollments, courses)):
+            university.enroll_student_in_course(student_id, f"C{course_index}")
+    return university, courses, faculty
+
+
+# Times `samples` calls of each hot-path operation on a synthetic university
+# of each scale. Returns a JSON-ready dict; memory is the traced size of the
+# built university (tracemalloc slows the build, not the timed calls).
+def run_suite(scales=SUITE_SCALES, samples=10000, seed=0, measure_memory=True, progress=None):
+    results = {"python": platform.python_version(), "platform": platform.platform(), "commit": _git_commit(),
+               "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "seed": seed, "samples": samples, "scales": []}
+    for scale in scales:
+        rng = random.Random(seed)
+        gc.collect()
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        university, courses, faculty = synthetic_university(scale, seed=seed)
+        build_seconds = time.perf_counter() - start
+        memory = None
+        if measure_memory:
+            gc.collect()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+        count = min(samples, scale)
+        student_ids = [f"S{rng.randrange(scale)}" for _ in range(count)]
+        course_codes = [f"C{rng.randrange(courses)}" for _ in range(count)]
+        calls = {
+            "get_student": [(university.get_student, (student_id,)) for student_id in student_ids],
+            "get_course_roster": [(university.get_course_roster, (code,)) for code in course_codes[:max(count // 10, 1)]],
+            "enroll_student_in_course": [(university.enroll_student_in_course, pair)
+                                         for pair in zip(student_ids, course_codes)],
+            "add_student": [(university.add_student, (Student(f"N{i}", f"New {i}", "Undeclared"),))
+                            for i in range(count)],
+            "remove_student": [(university.remove_student, (f"S{i}",)) for i in rng.sample(range(scale), count)],
+            "remove_faculty": [(university.remove_faculty, (f"F{i}",))
+                               for i in rng.sample(range(faculty), min(count, faculty))],
+        }
+        operations = {}
+        for name in SUITE_OPERATIONS:
+            timings = []
+            gc.collect()
+            for function, args in calls[name]:
+                call_start = time.perf_counter_ns()
+                function(*args)
+                timings.append(time.perf_counter_ns() - call_start)
+            timings.sort()
+            total = sum(timings)
+            operations[name] = {"calls": len(timings), "seconds": total / 1e9,
+                                "mean_us": total / len(timings) / 1000,
+                                "p50_us": _percentile(timings, 0.50) / 1000,
+                                "p99_us": _percentile(timings, 0.99) / 1000}
+        results["scales"].append({"students": scale, "courses": courses, "faculty": faculty,
+                                  "build_seconds": build_seconds, "memory_bytes": memory,
+                                  "bytes_per_student": memory / scale if memory else None,
+                                  "operations": operations})
+        if progress:
+            progress(results["scales"][-1])
+        del university, calls
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _print_scale(result):
+    memory = (f", {result['memory_bytes'] / 2**20:.1f} MiB ({result['bytes_per_student']:.0f} B/student)"
+              if result["memory_bytes"] else "")
+    print(f"{result['students']} students: built in {result['build_seconds']:.2f}s{memory}")
+    for name, timing in result["operations"].items():
+        print(f"  {name:26} {timing['calls']:6} calls  mean {timing['mean_us']:9.2f}us  "
+              f"p50 {timing['p50_us']:9.2f}us  p99 {timing['p99_us']:9.2f}us")
+
+
+# Mean time per call against an earlier run, as "new/old" ratios
+def compare_suites(old, new):
+    lines = []
+    old_scales = {result["students"]: result for result in old["scales"]}
+    for result in new["scales"]:
+        previous = old_scales.get(result["students"])
+        if previous is None:
+            continue
+        for name, timing in result["operations"].items():
+            before = previous["operations"].get(name)
+            if before and before["mean_us"]:
+                ratio = timing["mean_us"] / before["mean_us"]
+                lines.append(f"{result['students']:>8} {name:26} {before['mean_us']:9.2f}us -> "
+                             f"{timing['mean_us']:9.2f}us  x{ratio:.2f}")
+    return lines
+
+
+# Per-student credit loads the old way (every enrolled course resolved with
+# get_course) against the running aggregates, and the degree audit on
+# freshly loaded students (loads not known yet) and again once they are.
+def degree_audit_timing(students=100000, enrollments=4, completions=10, seed=None):
+    rng = random.Random(seed)
+    university, courses, _ = synthetic_university(students, enrollments, seed or 0)
+    for student in university.iter_students():
+        for course_index in rng.sample(range(courses), min(completions, courses)):
+            university.record_completion(student.id, f"C{course_index}")
+
+    start = time.perf_counter()
+    summed = {student.id: sum(university.get_course(code).credits for code in student.enrolled_course_codes)
+              for student in university.iter_students()}
+    on_demand = time.perf_counter() - start
+    start = time.perf_counter()
+    loads = {student.id: university.credit_load(student.id) for student in university.iter_students()}
+    aggregate = time.perf_counter() - start
+
+    # As loaded from storage or a snapshot
+    fresh = University()
+    fresh.restore([Student.from_dict(student.to_dict()) for student in university.iter_students()],
+                  [Faculty.from_dict(member.to_dict()) for member in university.iter_faculty()],
+                  [Course.from_dict(course.to_dict()) for course in university.iter_courses()])
+    start = time.perf_counter()
+    report = fresh.degree_audit()
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    fresh.degree_audit()
+    warm = time.perf_counter() - start
+
+    problems = [f"{student_id}: credit_load {loads[student_id]}, courses add up to {credits}"
+                for student_id, credits in summed.items() if loads[student_id] != credits]
+    if sum(audit["enrolled_credits"] for audit in report.values()) != sum(summed.values()):
+        problems.append("the degree audit's enrolled credits do not add up to the students' courses")
+    return {"students": students, "on_demand_seconds": on_demand, "aggregate_seconds": aggregate,
+            "audit_cold_seconds": cold, "audit_seconds": warm, "majors": len(report), "problems": problems}
+
+
+# Clash-checked enrollment and whole-term validation on a timetabled
+# catalog: two meetings per course between 8:00 and 18:00. The term check is
+# compared with a pairwise scan of a sample of students.
+def timetable_checks(students=100000, courses=2000, faculty=500, rooms=200, enrollments=5, seed=None):
+    rng = random.Random(seed)
+    university = University()
+    course_codes = [f"C{i:05d}" for i in range(courses)]
+    with university.batch():
+        for code in course_codes:
+            length = rng.choice((60, 90))
+            start = rng.randrange(8 * 60, 18 * 60 - length + 1, 30)
+            room = f"R{rng.randrange(rooms):03d}"
+            university.add_course(Course(code, f"Course {code}", 3, meetings=[
+                Meeting(day, start, start + length, room) for day in rng.sample(DAYS[:5], 2)]))
+        for i in range(students):
+            university.add_student(Student(f"S{i:06d}", f"Student {i}", "Undeclared"))
+        for i in range(faculty):
+            university.add_faculty(Faculty(f"F{i:05d}", f"Faculty {i}", "Undeclared"))
+
+    start = time.perf_counter()
+    attempts = enrolled = 0
+    for i in range(students):
+        for code in rng.sample(course_codes, enrollments):
+            attempts += 1
+            enrolled += university.enroll_student_in_course(f"S{i:06d}", code)
+    enroll_seconds = time.perf_counter() - start
+    for code in course_codes:
+        university.assign_faculty_to_course(f"F{rng.randrange(faculty):05d}", code)
+
+    registrations = [(f"S{i:06d}", rng.choice(course_codes)) for i in range(students)]
+    start = time.perf_counter()
+    report = university.validate_term(registrations)
+    validate_seconds = time.perf_counter() - start
+
+    proposed = {}
+    for student_id, code in registrations:
+        proposed.setdefault(student_id, set()).add(code)
+    problems = []
+    for student_id in rng.sample(sorted(proposed), min(1000, len(proposed))):
+        codes = proposed[student_id].union(university.get_student(student_id).enrolled_course_codes)
+        meetings = [(code, meeting) for code in sorted(codes) for meeting in university.get_course(code).meetings]
+        expected = sorted({(a, b) for a, m in meetings for b, n in meetings
+                           if a < b and m.day == n.day and m.start < n.end and n.start < m.end})
+        if report["students"].get(student_id, []) != expected:
+            problems.append(f"{student_id}: validate_term {report['students'].get(student_id)}, expected {expected}")
+    return {"attempts": attempts, "enrolled": enrolled, "enroll_us": enroll_seconds / attempts * 1e6,
+            "validate_seconds": validate_seconds, "students_with_clashes": len(report["students"]),
+            "faculty_with_clashes": len(report["faculty"]), "rooms_with_clashes": len(report["rooms"]),
+            "problems": problems}
+
+
+# Cost of the university_metrics instrumentation per call: get_student and
+# an enroll/drop pair timed before instrumenting, with a MemorySink attached
+# and again after disable(). The sink must have counted every timed call.
+def metrics_overhead(students=10000, samples=100000, seed=None):
+    import university_metrics
+
+    university, courses, _ = synthetic_university(students, 0, seed or 0)
+    rng = random.Random(seed)
+    student_ids = [f"S{rng.randrange(students)}" for _ in range(samples)]
+    course_codes = [f"C{rng.randrange(courses)}" for _ in range(samples)]
+
+    def timed():
+        get_student = university.get_student
+        start = time.perf_counter()
+        for student_id in student_ids:
+            get_student(student_id)
+        lookup = (time.perf_counter() - start) / samples
+        enroll, drop = university.enroll_student_in_course, university.drop_student_from_course
+        start = time.perf_counter()
+        for student_id, course_code in zip(student_ids, course_codes):
+            enroll(student_id, course_code)
+            drop(student_id, course_code)
+        return lookup * 1e6, (time.perf_counter() - start) / samples * 1e6
+
+    results = {"disabled": timed()}
+    sink = university_metrics.MemorySink()
+    metrics = university_metrics.instrument(university, sink)
+    results["enabled"] = timed()
+    metrics.disable()
+    results["after_disable"] = timed()
+
+    problems = []
+    snapshot = sink.snapshot()
+    for operation in ("get_student", "enroll_student_in_course", "drop_student_from_course"):
+        calls = snapshot.get(operation, {}).get("calls", 0)
+        if calls != samples:
+            problems.append(f"{operation}: {calls} calls recorded, {samples} made")
+    leftover = sorted(set(vars(university)) & set(metrics.operations())) if hasattr(university, "__dict__") else []
+    if leftover:
+        problems.append(f"still wrapped after disable(): {', '.join(leftover)}")
+    return {"samples": samples, "results": results, "snapshot": snapshot, "problems": problems}
+
+
+# Run in a fresh interpreter by startup_timing(): time to import the app,
+# to draw the first window and to have the data loaded into it
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import university
+from university_store import SQLiteStorage
+imported = time.perf_counter()
+result = {"import_seconds": imported - start}
+model = university.University(SQLiteStorage(sys.argv[1]), thread_safe=True)
+try:
+    app = university.UniversityApp(model)
+except Exception as error: # No display
+    result["error"] = str(error)
+else:
+    app.update()
+    result["first_paint_seconds"] = time.perf_counter() - imported
+    while not app.loaded:
+        app.update()
+        time.sleep(0.001)
+    result["loaded_seconds"] = time.perf_counter() - imported
+    app.on_close()
+print(json.dumps(result))
+"""
+
+
+# Builds a SQLite database of `students` students (or uses an existing one)
+# and starts the Tk app on it `repeat` times, each in a new process. Reports
+# the median import, first-paint and data-loaded times. First paint and
+# loading need a display; without one only the import is timed.
+def startup_timing(students=100000, repeat=5, db=None, seed=None):
+    from university_store import SQLiteStorage
+
+    directory = None
+    if db is None:
+        directory = tempfile.mkdtemp(prefix="university-startup-")
+        db = os.path.join(directory, "university.db")
+    try:
+        if not os.path.exists(db):
+            source, _, _ = synthetic_university(students, 4, seed or 0)
+            university = University(SQLiteStorage(db))
+            with university.batch():
+                for course in source.iter_courses():
+                    university.add_course(Course(course.course_code, course.title, course.credits))
+                for student in source.iter_students():
+                    university.add_student(Student(student.id, student.name, student.major))
+                for member in source.iter_faculty():
+                    university.add_faculty(Faculty(member.id, member.name, member.department))
+                for student in source.iter_students():
+                    for course_code in student.enrolled_course_codes:
+                        university.enroll_student_in_course(student.id, course_code)
+            university.close()
+
+        package = os.path.dirname(os.path.abspath(__file__))
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, db], cwd=package, check=True,
+                                    capture_output=True, text=True).stdout
+            run = json.loads(output.splitlines()[-1])
+            run["process_seconds"] = time.perf_counter() - start
+            runs.append(run)
+    finally:
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    result = {"students": students, "runs": repeat, "error": runs[-1].get("error")}
+    for key in ("import_seconds", "first_paint_seconds", "loaded_seconds", "process_seconds"):
+        values = sorted(run[key] for run in runs if key in run)
+        result[key] = values[len(values) // 2] if values else None
+    return result
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+# Minimal keep-alive HTTP/1.1 client for the load test, returns (status, body)
+async def _http_request(reader, writer, method, path, body=None):
+    data = b"" if body is None else json.dumps(body).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+                 f"Content-Type: application/json\r\n\r\n".encode() + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length) if length else b""
+
+
+# Spawns university_server.py on a free port, returns (process, port)
+def _start_server():
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "university_server.py")
+    process = subprocess.Popen([sys.executable, script, "--memory", "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline() # "serving on http://host:port"
+    if not line:
+        process.kill()
+        raise RuntimeError("university_server.py did not start")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+# Concurrent keep-alive clients running a registration-day mix of reads,
+# enrollments and drops against the HTTP API
+def http_load(host=None, port=None, clients=50, requests=200, students=2000, courses=50, seed=None):
+    rng = random.Random(seed)
+    process = None
+    if port is None:
+        process, port = _start_server()
+        host = "127.0.0.1"
+
+    async def seed_data():
+        reader, writer = await asyncio.open_connection(host, port)
+        for i in range(courses):
+            await _http_request(reader, writer, "POST", "/courses",
+                                {"course_code": f"LC{i}", "title": f"Load {i}", "credits": 3, "capacity": 40})
+        for i in range(students):
+            await _http_request(reader, writer, "POST", "/students",
+                                {"id": f"LS{i}", "name": f"Load {i}", "major": "Undeclared"})
+        writer.close()
+
+    latencies = []
+    statuses = {}
+    async def client(client_rng):
+        reader, writer = await asyncio.open_connection(host, port)
+        for _ in range(requests):
+            student_id = f"LS{client_rng.randrange(students)}"
+            course_code = f"LC{client_rng.randrange(courses)}"
+            roll = client_rng.random()
+            if roll < 0.55:
+                call = ("GET", f"/students/{student_id}", None)
+            elif roll < 0.65:
+                call = ("GET", f"/students?offset={client_rng.randrange(students)}&limit=20", None)
+            elif roll < 0.70:
+                call = ("GET", f"/courses/{course_code}/roster?limit=50", None)
+            elif roll < 0.88:
+                call = ("POST", f"/courses/{course_code}/students", {"student_id": student_id})
+            else:
+                call = ("DELETE", f"/courses/{course_code}/students/{student_id}", None)
+            start = time.perf_counter()
+            status, _ = await _http_request(reader, writer, *call)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+        writer.close()
+
+    async def run():
+        await seed_data()
+        start = time.perf_counter()
+        await asyncio.gather(*(client(random.Random(rng.random())) for _ in range(clients)))
+        return time.perf_counter() - start
+
+    try:
+        elapsed = asyncio.run(run())
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+    latencies.sort()
+    total = len(latencies)
+    return {"requests": total, "seconds": elapsed, "requests_per_second": total / elapsed,
+            "p50_ms": _percentile(latencies, 0.50) * 1000, "p99_ms": _percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+            "statuses": dict(sorted(statuses.items()))}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks and stress checks for the University model.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stress_parser = subparsers.add_parser("stress", help="concurrent enroll/drop consistency check")
+    stress_parser.add_argument("--threads", type=int, default=8)
+    stress_parser.add_argument("--operations", type=int, default=20000, help="operations per thread")
+    stress_parser.add_argument("--students", type=int, default=200)
+    stress_parser.add_argument("--courses", type=int, default=20)
+    stress_parser.add_argument("--capacity", type=int, default=10, help="seats per course, 0 for unlimited")
+    stress_parser.add_argument("--max-credits", type=int, help="credit limit for every student")
+    stress_parser.add_argument("--seed", type=int)
+    stress_parser.add_argument("--unsafe", action="store_true",
+                               help="run without thread-safe mode, to see the check fail")
+    http_parser = subparsers.add_parser("http", help="load test the HTTP API (university_server.py)")
+    http_parser.add_argument("--url", help="host:port of a running server, default: start one in memory")
+    http_parser.add_argument("--clients", type=int, default=50, help="concurrent keep-alive connections")
+    http_parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    http_parser.add_argument("--students", type=int, default=2000)
+    http_parser.add_argument("--courses", type=int, default=50)
+    http_parser.add_argument("--seed", type=int)
+    query_parser = subparsers.add_parser("query", help="time registrar reports on the secondary indexes")
+    query_parser.add_argument("--students", type=int, default=100000)
+    query_parser.add_argument("--faculty", type=int, default=5000)
+    query_parser.add_argument("--courses", type=int, default=20000)
+    query_parser.add_argument("--repeat", type=int, default=100)
+    search_parser = subparsers.add_parser("search", help="time typeahead prefix searches")
+    search_parser.add_argument("--students", type=int, default=100000)
+    search_parser.add_argument("--faculty", type=int, default=5000)
+    search_parser.add_argument("--courses", type=int, default=20000)
+    search_parser.add_argument("--repeat", type=int, default=100)
+    search_parser.add_argument("--seed", type=int)
+    names_parser = subparsers.add_parser("names", help="typo-tolerant name search latency and correctness")
+    names_parser.add_argument("--people", type=int, default=200000)
+    names_parser.add_argument("--queries", type=int, default=500, help="people looked up by a misspelled name")
+    names_parser.add_argument("--seed", type=int)
+    memory_parser = subparsers.add_parser("memory", help="bytes per loaded student, faculty member and course")
+    memory_parser.add_argument("--students", type=int, default=100000)
+    memory_parser.add_argument("--faculty", type=int, default=2000)
+    memory_parser.add_argument("--courses", type=int, default=2000)
+    memory_parser.add_argument("--enrollments", type=int, default=4, help="courses per student")
+    memory_parser.add_argument("--seed", type=int)
+    wal_parser = subparsers.add_parser("wal", help="journaled mutation throughput and recovery time")
+    wal_parser.add_argument("--students", type=int, default=50000)
+    wal_parser.add_argument("--courses", type=int, default=100)
+    wal_parser.add_argument("--operations", type=int, default=200000, help="enroll/drop calls after the adds")
+    wal_parser.add_argument("--threads", type=int, default=1)
+    wal_parser.add_argument("--synchronous", action="store_true", help="wait for the fsync of every call")
+    wal_parser.add_argument("--dir", help="journal directory to use (kept), default: a temporary one")
+    wal_parser.add_argument("--seed", type=int)
+    audit_parser = subparsers.add_parser("audit", help="credit-load aggregates and the per-major degree audit")
+    audit_parser.add_argument("--students", type=int, default=100000)
+    audit_parser.add_argument("--enrollments", type=int, default=4, help="courses per student")
+    audit_parser.add_argument("--completions", type=int, default=10, help="completed courses per student")
+    audit_parser.add_argument("--seed", type=int)
+    timetable_parser = subparsers.add_parser("timetable", help="clash-checked enrollment and term validation")
+    timetable_parser.add_argument("--students", type=int, default=100000)
+    timetable_parser.add_argument("--courses", type=int, default=2000)
+    timetable_parser.add_argument("--faculty", type=int, default=500)
+    timetable_parser.add_argument("--rooms", type=int, default=200)
+    timetable_parser.add_argument("--enrollments", type=int, default=5, help="enrollment attempts per student")
+    timetable_parser.add_argument("--seed", type=int)
+    metrics_parser = subparsers.add_parser("metrics", help="per-call cost of university_metrics instrumentation")
+    metrics_parser.add_argument("--students", type=int, default=10000)
+    metrics_parser.add_argument("--samples", type=int, default=100000, help="timed calls per operation")
+    metrics_parser.add_argument("--seed", type=int)
+    startup_parser = subparsers.add_parser("startup", help="import, first-paint and load time of the Tk app")
+    startup_parser.add_argument("--students", type=int, default=100000, help="size of the generated database")
+    startup_parser.add_argument("--repeat", type=int, default=5, help="app starts, the median is reported")
+    startup_parser.add_argument("--db", help="database to start on (created if missing), default: a temporary one")
+    startup_parser.add_argument("--seed", type=int)
+    subparsers.add_parser("checks", help="batch rollback, waitlist, prerequisite, clash and credit limit rules")
+    suite_parser = subparsers.add_parser("suite", help="time the model's hot paths at several scales")
+    suite_parser.add_argument("--scales", default=",".join(map(str, SUITE_SCALES)),
+                              help="comma-separated numbers of students (default: %(default)s)")
+    suite_parser.add_argument("--samples", type=int, default=10000, help="timed calls per operation and scale")
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster builds)")
+    suite_parser.add_argument("--output", help="write the results as JSON to this file")
+    suite_parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    if args.command == "suite":
+        scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+        results = run_suite(scales, args.samples, args.seed, not args.no_memory, progress=_print_scale)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                for line in compare_suites(json.load(f), results):
+                    print(line)
+        return 0
+
+    if args.command == "checks":
+        failed = 0
+        for name, problems in behaviour_checks().items():
+            print(f"{name}: {'FAILED' if problems else 'OK'}")
+            for problem in problems:
+                print(f"  {problem}", file=sys.stderr)
+            failed += bool(problems)
+        return 1 if failed else 0
+
+    if args.command == "startup":
+        result = startup_timing(args.students, args.repeat, args.db, args.seed)
+        print(f"import {result['import_seconds'] * 1000:.0f}ms, "
+              f"process {result['process_seconds'] * 1000:.0f}ms (median of {result['runs']})")
+        if result["first_paint_seconds"] is None:
+            print(f"first paint not measured: {result['error']}", file=sys.stderr)
+            return 0
+        print(f"first paint {result['first_paint_seconds'] * 1000:.0f}ms after import, "
+              f"data loaded at {result['loaded_seconds'] * 1000:.0f}ms")
+        return 0
+
+    if args.command == "metrics":
+        result = metrics_overhead(args.students, args.samples, args.seed)
+        for label, (lookup, enroll_drop) in result["results"].items():
+            print(f"{label}: get_student {lookup:.2f}us, enroll+drop {enroll_drop:.2f}us")
+        for operation, stats in result["snapshot"].items():
+            print(f"  {operation}: {stats['calls']} calls, p50 {stats['p50_ms'] * 1000:.1f}us, "
+                  f"p99 {stats['p99_ms'] * 1000:.1f}us")
+        for problem in result["problems"]:
+            print(f"  {problem}", file=sys.stderr)
+        return 1 if result["problems"] else 0
+
+    if args.command == "audit":
+        result = degree_audit_timing(args.students, args.enrollments, args.completions, args.seed)
+        print(f"credit loads of {result['students']} students: {result['on_demand_seconds'] * 1000:.0f}ms "
+              f"resolving courses, {result['aggregate_seconds'] * 1000:.0f}ms from the aggregates")
+        print(f"degree audit over {result['majors']} majors: {result['audit_cold_seconds']:.2f}s just loaded, "
+              f"{result['audit_seconds']:.2f}s after")
+        for problem in result["problems"][:20]:
+            print(f"  {problem}", file=sys.stderr)
+        return 1 if result["problems"] else 0
+
+    if args.command == "timetable":
+        result = timetable_checks(args.students, args.courses, args.faculty, args.rooms, args.enrollments, args.seed)
+        print(f"{result['enrolled']} of {result['attempts']} enrollments accepted, "
+              f"{result['enroll_us']:.1f}us per clash-checked attempt")
+        print(f"term validated in {result['validate_seconds']:.2f}s: {result['students_with_clashes']} students, "
+              f"{result['faculty_with_clashes']} faculty and {result['rooms_with_clashes']} rooms with clashes")
+        for problem in result["problems"][:20]:
+            print(f"  {problem}", file=sys.stderr)
+        return 1 if result["problems"] else 0
+
+    if args.command == "wal":
+        result = wal_throughput(args.students, args.courses, args.operations, args.threads, args.synchronous,
+                                args.dir, args.seed)
+        print(f"{result['mutations']} mutations in {result['seconds']:.2f}s "
+              f"({result['mutations_per_second']:.0f}/s), recovered in {result['recovery_seconds']:.2f}s")
+        for problem in result["problems"]:
+            print(f"  {problem}", file=sys.stderr)
+        return 1 if result["problems"] else 0
+
+    if args.command == "names":
+        result = name_search(args.people, args.queries, seed=args.seed)
+        print(f"index over {result['people']} people built in {result['build_seconds']:.2f}s, "
+              f"{result['update_us']:.0f}us per add/remove after")
+        print(f"{result['queries']} misspelled names: p50 {result['p50_ms']:.2f}ms, p95 {result['p95_ms']:.2f}ms, "
+              f"max {result['max_ms']:.2f}ms, {result['recall']:.1%} found in the top 50")
+        for problem in result["problems"][:20]:
+            print(f"  {problem}", file=sys.stderr)
+        return 1 if result["problems"] else 0
+
+    if args.command == "memory":
+        results = memory_per_entity(args.students, args.faculty, args.courses, args.enrollments, args.seed)
+        for kind, (count, per_entity) in results.items():
+            print(f"{kind}: {count} loaded, {per_entity:.0f} bytes each, {count * per_entity / 2**20:.1f} MiB")
+        return 0
+
+    if args.command == "search":
+        build, results = search_prefixes(args.students, args.faculty, args.courses, args.repeat, args.seed)
+        print(f"index built in {build:.2f}s")
+        for kind, prefix, found, milliseconds in results:
+            print(f"{kind} '{prefix}': {found} results in {milliseconds:.3f}ms")
+        return 0
+
+    if args.command == "query":
+        for name, plan, found, milliseconds in query_reports(args.students, args.faculty, args.courses,
+                                                             args.repeat):
+            print(f"{name}: {found} results in {milliseconds:.3f}ms ({plan})")
+        return 0
+
+    if args.command == "http":
+        host, port = None, None
+        if args.url:
+            host, _, port = args.url.rpartition(":")
+            host, port = host or "127.0.0.1", int(port)
+        result = http_load(host, port, args.clients, args.requests, args.students, args.courses, args.seed)
+        print(f"{result['requests']} requests in {result['seconds']:.2f}s: "
+              f"{result['requests_per_second']:.0f} req/s, p50 {result['p50_ms']:.2f}ms, "
+              f"p99 {result['p99_ms']:.2f}ms, max {result['max_ms']:.2f}ms")
+        print("statuses: " + ", ".join(f"{status}: {count}" for status, count in result["statuses"].items()))
+        return 1 if any(status >= 500 for status in result["statuses"]) else 0
+
+    result = stress(args.threads, args.operations, args.students, args.courses, args.capacity or None,
+                    thread_safe=not args.unsafe, seed=args.seed, max_credits=args.max_credits)
+    print(f"{result['operations']} operations in {result['seconds']:.2f}s "
+          f"({result['ops_per_second']:.0f}/s), {result['links']} links, seed {result['seed']}")
+    for problem in result["problems"][:20]:
+        print(f"  {problem}", file=sys.stderr)
+    if result["problems"]:
+        print(f"FAILED: {len(result['problems'])} problems", file=sys.stderr)
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
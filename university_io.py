@@ -0,0 +1,502 @@
+import csv
+import gzip
+import json
+import os
+import sys
+from itertools import islice
+
+from university import Course, Faculty, Meeting, Student, University, format_meeting, parse_meetings
+
+# ############################################################################
+#
+# BULK IMPORT / EXPORT
+#
+# Streams registrar exports (CSV with a header row, or JSON Lines) into a
+# University. Rows are read lazily and processed in fixed-size batches, so
+# memory stays constant no matter how large the file is. Bad rows are
+# recorded in an ImportReport and skipped instead of aborting the load.
+#
+# The export side writes one entity at a time in the same formats, and
+# snapshots store the whole model in a compact gzip file that restores
+# without replaying add_*/enroll_* calls.
+# ############################################################################
+
+# Listed in a safe load order: completions before enrollments so
+# prerequisite checks pass
+IMPORT_KINDS = ("students", "faculty", "courses", "completions", "enrollments", "assignments")
+
+
+class ImportReport:
+    def __init__(self, kind, max_errors=1000):
+        self.kind = kind
+        self.rows = 0
+        self.loaded = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = [] # (line number, message), capped at max_errors
+        self._max_errors = max_errors
+
+    def error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < self._max_errors:
+            self.errors.append((line_no, message))
+
+    def summary(self):
+        return (f"{self.kind}: {self.rows} rows, {self.loaded} loaded, "
+                f"{self.duplicates} duplicates, {self.error_count} errors")
+
+
+def _open_text(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _is_jsonl(path):
+    name = str(path)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return name.endswith(".jsonl") or name.endswith(".ndjson")
+
+
+def read_rows(path):
+    # Yields (line number, row dict). Malformed lines yield (line number, None)
+    # so the caller can report them.
+    with _open_text(path) as f:
+        if _is_jsonl(path):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_no, row if isinstance(row, dict) else None
+        else:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            for line_no, values in enumerate(reader, 2):
+                if not values:
+                    continue
+                if len(values) != len(header):
+                    yield line_no, None
+                    continue
+                yield line_no, dict(zip(header, values))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        raise ValueError(f"missing '{field}'")
+    value = str(value).strip()
+    if not value:
+        raise ValueError(f"empty '{field}'")
+    return value
+
+
+def _credits(row):
+    try:
+        credits = float(row.get("credits"))
+    except (TypeError, ValueError):
+        raise ValueError("credits must be a number")
+    return int(credits) if credits.is_integer() else credits
+
+
+def _capacity(row):
+    value = row.get("capacity")
+    if value is None or str(value).strip() == "": # Optional, unlimited seats
+        return None
+    try:
+        capacity = int(str(value).strip())
+    except ValueError:
+        raise ValueError("capacity must be a whole number")
+    if capacity < 0:
+        raise ValueError("capacity must not be negative")
+    return capacity
+
+
+def _meetings(row):
+    value = row.get("meetings") or []
+    if isinstance(value, str): # CSV: "Mon 09:00-10:30 B12; Wed 09:00-10:30 B12"
+        return parse_meetings(value)
+    return value # JSON: [[day, start, end, room], ...], checked by Course
+
+
+def _prerequisites(row):
+    value = row.get("prerequisites") or []
+    if isinstance(value, str): # CSV columns list codes separated by ';'
+        value = value.split(";")
+    return [str(code).strip() for code in value if str(code).strip()]
+
+
+# Each parser turns a raw row into the tuple the loader needs, or raises
+# ValueError with a message for the report.
+def _parse_student(row):
+    return Student(_text(row, "id"), _text(row, "name"), _text(row, "major"))
+
+def _parse_faculty(row):
+    return Faculty(_text(row, "id"), _text(row, "name"), _text(row, "department"))
+
+def _parse_course(row):
+    return Course(_text(row, "course_code"), _text(row, "title"), _credits(row), _prerequisites(row),
+                  _capacity(row), _meetings(row))
+
+def _parse_enrollment(row):
+    return _text(row, "student_id"), _text(row, "course_code")
+
+def _parse_assignment(row):
+    return _text(row, "faculty_id"), _text(row, "course_code")
+
+def _parse_completion(row):
+    return _text(row, "student_id"), _text(row, "course_code")
+
+
+def _key(kind, item):
+    if kind in ("students", "faculty"):
+        return item.id
+    if kind == "courses":
+        return item.course_code
+    return item
+
+
+def _apply(university, kind, item, line_no, report):
+    if kind == "students":
+        ok = university.add_student(item)
+    elif kind == "faculty":
+        ok = university.add_faculty(item)
+    elif kind == "courses":
+        ok = university.add_course(item)
+        if not ok and university.get_course(item.course_code) is None:
+            return report.error(line_no, "prerequisites would form a cycle")
+    else:
+        entity_id, course_code = item
+        course = university.get_course(course_code)
+        if kind in ("enrollments", "completions"):
+            student = university.get_student(entity_id)
+            if student is None:
+                return report.error(line_no, f"unknown student '{entity_id}'")
+            if course is None:
+                return report.error(line_no, f"unknown course '{course_code}'")
+            if kind == "completions":
+                ok = university.record_completion(entity_id, course_code)
+            else:
+                missing = [code for code in course.prerequisite_codes if not student.has_completed(code)]
+                if missing:
+                    return report.error(line_no, f"'{entity_id}' is missing prerequisites {', '.join(missing)}")
+                ok = university.enroll_student_in_course(entity_id, course_code)
+                if not ok and not student.is_enrolled(course_code): # Only a row already loaded is a duplicate
+                    clashes = university.schedule_conflicts(entity_id, course_code)
+                    if clashes:
+                        return report.error(line_no, f"'{entity_id}' has a timetable clash with {', '.join(clashes)}")
+                    limit = university.credit_limit(student.major)
+                    if limit is not None and university.credit_load(entity_id) + course.credits > limit:
+                        return report.error(line_no, f"'{entity_id}' would exceed the credit limit of {limit}")
+                    if not course.has_free_seat() or course.waitlist_count():
+                        return report.error(line_no, f"course '{course_code}' is full")
+                    return report.error(line_no, f"'{entity_id}' could not be enrolled in '{course_code}'")
+        else:
+            if university.get_faculty(entity_id) is None:
+                return report.error(line_no, f"unknown faculty '{entity_id}'")
+            if course is None:
+                return report.error(line_no, f"unknown course '{course_code}'")
+            ok = university.assign_faculty_to_course(entity_id, course_code)
+            if not ok and course.assigned_faculty_id != entity_id:
+                clashes = university.teaching_conflicts(entity_id, course_code)
+                if clashes:
+                    return report.error(line_no, f"'{entity_id}' teaches {', '.join(clashes)} at the same time")
+    if ok:
+        report.loaded += 1
+    else:
+        report.duplicates += 1
+
+
+_PARSERS = {
+    "students": _parse_student,
+    "faculty": _parse_faculty,
+    "courses": _parse_course,
+    "enrollments": _parse_enrollment,
+    "assignments": _parse_assignment,
+    "completions": _parse_completion,
+}
+
+
+# progress(report), if given, is called after every batch. It may raise to
+# stop the import (e.g. when the user cancels); rows already applied stay.
+def import_rows(university, kind, rows, batch_size=1000, max_errors=1000, progress=None):
+    if kind not in _PARSERS:
+        raise ValueError(f"unknown import kind '{kind}', expected one of {', '.join(IMPORT_KINDS)}")
+    parse = _PARSERS[kind]
+    report = ImportReport(kind, max_errors)
+    # With a storage backend, load the registries once so duplicate checks
+    # and lookups stay in memory instead of querying per row
+    university.load_all()
+    for batch in _batches(rows, batch_size):
+        # Validate and de-duplicate the batch before touching the model
+        seen = set()
+        valid = []
+        for line_no, row in batch:
+            report.rows += 1
+            if row is None:
+                report.error(line_no, "malformed row")
+                continue
+            try:
+                item = parse(row)
+            except ValueError as e:
+                report.error(line_no, str(e))
+                continue
+            key = _key(kind, item)
+            if key in seen:
+                report.duplicates += 1
+                continue
+            seen.add(key)
+            valid.append((line_no, item))
+        for line_no, item in valid:
+            _apply(university, kind, item, line_no, report)
+        if progress:
+            progress(report)
+    university.flush()
+    return report
+
+
+def import_file(university, kind, path, batch_size=1000, max_errors=1000, progress=None):
+    return import_rows(university, kind, read_rows(path), batch_size, max_errors, progress)
+
+
+# ----------------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------------
+
+def _open_write(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def iter_records(university):
+    # Every entity as its to_dict(), students first, then faculty, then courses.
+    # With a database they are streamed from it rather than from the model,
+    # which would first load every entity into the registries.
+    storage = university._storage
+    if storage is not None:
+        yield from storage.stream_students()
+        yield from storage.stream_faculty()
+        for record in storage.stream_courses():
+            record["type"] = "course"
+            yield record
+        return
+    for student in university.iter_students():
+        yield student.to_dict()
+    for faculty in university.iter_faculty():
+        yield faculty.to_dict()
+    for course in university.iter_courses():
+        record = course.to_dict()
+        record["type"] = "course"
+        yield record
+
+
+def export_jsonl(university, path):
+    count = 0
+    with _open_write(path) as f:
+        for record in iter_records(university):
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+# CSV rows per kind, in the column layout import_file() reads back
+CSV_COLUMNS = {
+    "students": ("id", "name", "major"),
+    "faculty": ("id", "name", "department"),
+    "courses": ("course_code", "title", "credits", "prerequisites", "capacity", "meetings"),
+    "enrollments": ("student_id", "course_code"),
+    "assignments": ("faculty_id", "course_code"),
+    "completions": ("student_id", "course_code"),
+}
+
+
+def iter_csv_rows(university, kind):
+    if university._storage is not None:
+        yield from _iter_stored_csv_rows(university._storage, kind)
+    elif kind == "students":
+        for student in university.iter_students():
+            yield student.id, student.name, student.major
+    elif kind == "faculty":
+        for faculty in university.iter_faculty():
+            yield faculty.id, faculty.name, faculty.department
+    elif kind == "courses":
+        for course in university.iter_courses():
+            capacity = "" if course.capacity is None else course.capacity
+            yield (course.course_code, course.title, course.credits, ";".join(course.prerequisite_codes), capacity,
+                   "; ".join(map(format_meeting, course.meetings)))
+    elif kind == "enrollments":
+        for student in university.iter_students():
+            for course_code in student.enrolled_course_codes:
+                yield student.id, course_code
+    elif kind == "assignments":
+        for course in university.iter_courses():
+            if course.assigned_faculty_id is not None:
+                yield course.assigned_faculty_id, course.course_code
+    elif kind == "completions":
+        for student in university.iter_students():
+            for course_code in student.completed_course_codes:
+                yield student.id, course_code
+    else:
+        raise ValueError(f"unknown export kind '{kind}', expected one of {', '.join(IMPORT_KINDS)}")
+
+
+# iter_csv_rows() straight from the database, see iter_records()
+def _iter_stored_csv_rows(storage, kind):
+    if kind == "students":
+        for student in storage.stream_students():
+            yield student["id"], student["name"], student["major"]
+    elif kind == "faculty":
+        for faculty in storage.stream_faculty():
+            yield faculty["id"], faculty["name"], faculty["department"]
+    elif kind == "courses":
+        for course in storage.stream_courses():
+            capacity = "" if course["capacity"] is None else course["capacity"]
+            yield (course["course_code"], course["title"], course["credits"], ";".join(course["prerequisites"]),
+                   capacity, "; ".join(format_meeting(Meeting(*meeting)) for meeting in course["meetings"]))
+    elif kind in ("enrollments", "completions"):
+        field = "enrolled_courses" if kind == "enrollments" else "completed_courses"
+        for student in storage.stream_students():
+            for course_code in student[field]:
+                yield student["id"], course_code
+    elif kind == "assignments":
+        for course in storage.stream_courses():
+            if course["faculty_id"] is not None:
+                yield course["faculty_id"], course["course_code"]
+    else:
+        raise ValueError(f"unknown export kind '{kind}', expected one of {', '.join(IMPORT_KINDS)}")
+
+
+def export_csv(university, kind, path):
+    count = 0
+    with _open_write(path) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS[kind])
+        for row in iter_csv_rows(university, kind):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def export_csv_dir(university, directory):
+    # One <kind>.csv per import kind, ready for import_file()
+    os.makedirs(directory, exist_ok=True)
+    return {kind: export_csv(university, kind, os.path.join(directory, f"{kind}.csv"))
+            for kind in IMPORT_KINDS}
+
+
+# ----------------------------------------------------------------------------
+# Snapshots
+#
+# A snapshot is gzip'd JSON Lines: a header object followed by one compact
+# array per entity. Both sides of every link are stored, so restoring is a
+# straight rebuild of the objects with no lookups or duplicate checks.
+# ----------------------------------------------------------------------------
+
+SNAPSHOT_FORMAT = "university-snapshot"
+SNAPSHOT_VERSION = 5 # 5 added credit limits, 4 meetings, 3 capacity and waitlists, 2 completed courses
+
+
+def save_snapshot(university, path):
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+        f.write(json.dumps({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION,
+                            "credit_limits": list(university.credit_limits.items())}) + "\n")
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+        for s in university.iter_students():
+            f.write(dumps(["s", s.id, s.name, s.major, s.enrolled_course_codes, s.completed_course_codes,
+                           s.waitlisted_course_codes]) + "\n")
+        for m in university.iter_faculty():
+            f.write(dumps(["f", m.id, m.name, m.department, m.assigned_course_codes]) + "\n")
+        for c in university.iter_courses():
+            f.write(dumps(["c", c.course_code, c.title, c.credits, c.prerequisite_codes,
+                           c.assigned_faculty_id, c.enrolled_student_ids, c.capacity, c.waitlist_entries,
+                           c.meetings]) + "\n")
+    os.replace(tmp_path, path) # Never leave a half-written snapshot behind
+
+
+def load_snapshot(path, university=None):
+    students, faculty, courses = [], [], []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != SNAPSHOT_FORMAT or header.get("version") not in (1, 2, 3, 4, SNAPSHOT_VERSION):
+            raise ValueError(f"{path} is not a university snapshot")
+        loads = json.loads
+        for line in f:
+            record = loads(line)
+            tag = record[0]
+            if tag == "s":
+                students.append(Student.from_dict(
+                    {"id": record[1], "name": record[2], "major": record[3], "enrolled_courses": record[4],
+                     "completed_courses": record[5] if len(record) > 5 else (),
+                     "waitlisted_courses": record[6] if len(record) > 6 else ()}))
+            elif tag == "f":
+                faculty.append(Faculty.from_dict(
+                    {"id": record[1], "name": record[2], "department": record[3], "assigned_courses": record[4]}))
+            elif tag == "c":
+                courses.append(Course.from_dict(
+                    {"course_code": record[1], "title": record[2], "credits": record[3], "prerequisites": record[4],
+                     "faculty_id": record[5], "enrolled_students": record[6],
+                     "capacity": record[7] if len(record) > 7 else None,
+                     "waitlist": record[8] if len(record) > 8 else (),
+                     "meetings": record[9] if len(record) > 9 else ()}))
+    if university is None:
+        university = University()
+    university.restore(students, faculty, courses, header.get("credit_limits", ()))
+    return university
+
+
+def main(argv=None):
+    import argparse
+    from university_store import SQLiteStorage
+
+    parser = argparse.ArgumentParser(description="Bulk import registrar exports into the university database.")
+    parser.add_argument("--db", default="university.db", help="SQLite database file (default: university.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="import a CSV or JSONL file")
+    import_parser.add_argument("kind", choices=IMPORT_KINDS)
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser = subparsers.add_parser("export", help="export everything as JSONL, or one CSV per kind")
+    export_parser.add_argument("format", choices=("jsonl", "csv"))
+    export_parser.add_argument("path", help="output file for jsonl, output directory for csv")
+    snapshot_parser = subparsers.add_parser("snapshot", help="write a compact gzip snapshot")
+    snapshot_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    university = University(SQLiteStorage(args.db))
+    try:
+        if args.command == "import":
+            report = import_file(university, args.kind, args.path, args.batch_size)
+            print(report.summary())
+            for line_no, message in report.errors:
+                print(f"  line {line_no}: {message}", file=sys.stderr)
+            return 0 if report.error_count == 0 else 1
+        if args.command == "export" and args.format == "jsonl":
+            print(f"exported {export_jsonl(university, args.path)} records to {args.path}")
+        elif args.command == "export":
+            for kind, count in export_csv_dir(university, args.path).items():
+                print(f"exported {count} {kind} rows")
+        else:
+            save_snapshot(university, args.path)
+            print(f"snapshot written to {args.path}")
+        return 0
+    finally:
+        university.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
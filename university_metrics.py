@@ -0,0 +1,306 @@
+import bisect
+import inspect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ############################################################################
+#
+# METRICS
+#
+# Opt-in instrumentation of a University. Metrics(university).enable()
+# replaces every public method on that one instance with a timing wrapper;
+# disable() removes them again, so a University that is not instrumented
+# runs exactly the code it always did. Only the outermost call of each
+# thread is recorded: enroll_student_in_course is timed once, not once more
+# for each get_student it makes.
+#
+# Every call is passed to the sinks as (operation, seconds, items, error),
+# items being the length of a list returned or passed in (the students of
+# get_students(), the matches of query()), or None.
+#
+#   MemorySink        per-operation counts, latency histogram, items
+#   JsonLinesSink     one JSON line per call (or per slow call) in a file
+#   PrometheusSink    a MemorySink served as Prometheus text on a local port
+# ############################################################################
+
+# Histogram bucket upper bounds in seconds: two per octave from 1us to ~50s
+BUCKETS = tuple(1e-6 * 2 ** (index / 2) for index in range(52))
+
+_SIZED = frozenset((list, tuple, set, frozenset, dict))
+_bucket = bisect.bisect_left
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1) # The last one is above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[_bucket(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    # Estimated by interpolating inside the bucket the rank falls in
+    def percentile(self, fraction):
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = BUCKETS[index - 1] if index else 0.0
+                high = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(low + (high - low) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class OperationStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+        self.items = 0 # Sum over the calls that had a size
+        self.sized_calls = 0
+        self.max_items = 0
+
+    def to_dict(self):
+        latency = self.latency
+        calls = self.calls or 1
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": latency.sum / calls * 1000,
+            "p50_ms": latency.percentile(0.50) * 1000,
+            "p95_ms": latency.percentile(0.95) * 1000,
+            "p99_ms": latency.percentile(0.99) * 1000,
+            "max_ms": latency.max * 1000,
+            "total_ms": latency.sum * 1000,
+            "mean_items": self.items / self.sized_calls if self.sized_calls else None,
+            "max_items": self.max_items if self.sized_calls else None,
+        }
+
+
+class MemorySink:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._started = time.time()
+
+    def record(self, operation, seconds, items, error):
+        with self._lock:
+            try:
+                stats = self._operations[operation]
+            except KeyError:
+                stats = self._operations[operation] = OperationStats()
+            stats.calls += 1
+            stats.latency.observe(seconds)
+            if error:
+                stats.errors += 1
+            if items is not None:
+                stats.items += items
+                stats.sized_calls += 1
+                if items > stats.max_items:
+                    stats.max_items = items
+
+    # {operation: OperationStats.to_dict()}, busiest operations first
+    def snapshot(self):
+        with self._lock:
+            stats = sorted(self._operations.items(), key=lambda item: item[1].latency.sum, reverse=True)
+            return {operation: operation_stats.to_dict() for operation, operation_stats in stats}
+
+    @property
+    def started(self):
+        return self._started
+
+    def reset(self):
+        with self._lock:
+            self._operations = {}
+            self._started = time.time()
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    # Appends {"time", "operation", "ms", "items", "error"} per call, or only
+    # for calls of at least min_ms (a slow-call log). Lines are buffered and
+    # written every flush_every calls and on close().
+    def __init__(self, path, min_ms=0.0, flush_every=1000):
+        self._file = open(path, "a", encoding="utf-8")
+        self._min_seconds = min_ms / 1000
+        self._flush_every = flush_every
+        self._lines = []
+        self._lock = threading.Lock()
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def record(self, operation, seconds, items, error):
+        if seconds < self._min_seconds:
+            return
+        line = self._encode({"time": round(time.time(), 6), "operation": operation, "ms": round(seconds * 1000, 4),
+                             "items": items, "error": error})
+        with self._lock:
+            self._lines.append(line)
+            if len(self._lines) >= self._flush_every:
+                self._flush()
+
+    def _flush(self):
+        if self._lines:
+            self._file.write("\n".join(self._lines) + "\n")
+            self._file.flush()
+            self._lines = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._file.close()
+
+
+class PrometheusSink(MemorySink):
+    # Serves the numbers in the Prometheus text format at
+    # http://host:port/metrics from a daemon thread. port=0 picks a free one.
+    def __init__(self, port=9464, host="127.0.0.1", prefix="university"):
+        super().__init__()
+        self._prefix = prefix
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = sink.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # No line on stderr per scrape
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="university-metrics", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def render(self):
+        prefix = self._prefix
+        with self._lock:
+            operations = [(name, stats.calls, stats.errors, stats.items, list(stats.latency.counts),
+                           stats.latency.sum, stats.latency.count) for name, stats in sorted(self._operations.items())]
+        lines = [f"# HELP {prefix}_calls_total Calls of each University operation",
+                 f"# TYPE {prefix}_calls_total counter"]
+        lines += [f'{prefix}_calls_total{{operation="{name}"}} {calls}' for name, calls, *_ in operations]
+        lines += [f"# HELP {prefix}_errors_total Calls that raised",
+                  f"# TYPE {prefix}_errors_total counter"]
+        lines += [f'{prefix}_errors_total{{operation="{name}"}} {errors}' for name, _, errors, *_ in operations]
+        lines += [f"# HELP {prefix}_items_total Items returned or passed in",
+                  f"# TYPE {prefix}_items_total counter"]
+        lines += [f'{prefix}_items_total{{operation="{name}"}} {items}' for name, _, _, items, *_ in operations]
+        lines += [f"# HELP {prefix}_call_seconds Latency of each University operation",
+                  f"# TYPE {prefix}_call_seconds histogram"]
+        for name, _, _, _, counts, total, count in operations:
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'{prefix}_call_seconds_bucket{{operation="{name}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_call_seconds_bucket{{operation="{name}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_call_seconds_sum{{operation="{name}"}} {total:.9f}')
+            lines.append(f'{prefix}_call_seconds_count{{operation="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class Metrics:
+    def __init__(self, university, sinks=None):
+        self._university = university
+        self._sinks = list(sinks) if sinks is not None else [MemorySink()]
+        self._local = threading.local()
+        self._wrapped = []
+
+    @property
+    def enabled(self):
+        return bool(self._wrapped)
+
+    @property
+    def sinks(self):
+        return self._sinks
+
+    # The public methods of the University's class. Context managers (batch(),
+    # changes(), locked()) are left alone: they return before the work is done.
+    def operations(self):
+        names = []
+        for name, attribute in inspect.getmembers(type(self._university)):
+            if name.startswith("_") or not inspect.isfunction(attribute):
+                continue
+            if inspect.isgeneratorfunction(getattr(attribute, "__wrapped__", None)):
+                continue
+            names.append(name)
+        return names
+
+    def enable(self):
+        if self._wrapped:
+            return
+        for name in self.operations():
+            setattr(self._university, name, self._timed(name, getattr(self._university, name)))
+            self._wrapped.append(name)
+
+    def disable(self):
+        for name in self._wrapped:
+            delattr(self._university, name) # The class's method shows through again
+        self._wrapped = []
+
+    def _timed(self, name, method):
+        local = self._local
+        sinks = self._sinks
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            if getattr(local, "active", False): # Made by an instrumented call
+                return method(*args, **kwargs)
+            local.active = True
+            error = True
+            result = None
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                seconds = clock() - start
+                local.active = False
+                items = None
+                if not error:
+                    if type(result) in _SIZED:
+                        items = len(result)
+                    elif args and type(args[0]) in _SIZED:
+                        items = len(args[0])
+                for sink in sinks:
+                    sink.record(name, seconds, items, error)
+
+        timed.__wrapped__ = method
+        return timed
+
+    def close(self):
+        self.disable()
+        for sink in self._sinks:
+            sink.close()
+
+
+# Instruments university right away, e.g. instrument(university, MemorySink(), PrometheusSink(9464))
+def instrument(university, *sinks):
+    metrics = Metrics(university, sinks or None)
+    metrics.enable()
+    return metrics
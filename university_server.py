@@ -0,0 +1,502 @@
+import asyncio
+import json
+import re
+import sys
+from itertools import islice
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from university import Course, Faculty, Student, University, make_meeting, parse_meetings
+
+# ############################################################################
+#
+# HTTP/JSON API
+#
+# A small asyncio HTTP/1.1 server over a University, using only the standard
+# library. Entities are serialized with their to_dict() methods, list
+# endpoints are paginated with ?offset=&limit=, and connections are kept
+# alive between requests (HTTP/1.1 default, or Connection: keep-alive).
+#
+#   GET    /students?offset=0&limit=100     POST   /students
+#   GET    /students/<id>                   DELETE /students/<id>
+#   GET    /faculty, /faculty/<id>          POST   /faculty, DELETE /faculty/<id>
+#   GET    /courses, /courses/<code>        POST   /courses
+#   GET    /courses/<code>/roster?offset=&limit=&sort=name&order=desc
+#   POST   /courses/<code>/students         {"student_id": ...} enrolls
+#   DELETE /courses/<code>/students/<id>    drops
+#   POST   /courses/<code>/waitlist         {"student_id": ..., "priority": 0}
+#   PUT    /courses/<code>/faculty          {"faculty_id": ...} assigns
+#   DELETE /courses/<code>/faculty          unassigns
+#   PUT    /courses/<code>/meetings         {"meetings": [["Mon", "09:00", "10:30", "B12"], ...]}
+#   GET    /timetable/conflicts             student, teaching and room clashes
+#   PUT    /credit-limits                   {"major": ... or null, "max_credits": 18 or null}
+#   GET    /reports/degree-audit?required=120
+#   GET    /people?name=jonson&kind=students&limit=10    typo-tolerant name search
+#
+# Model calls run on the event loop thread: they are in-memory and fast,
+# and storage writes are queued and flushed in batches.
+#
+# --metrics-port and --metrics-log instrument the University with
+# university_metrics: Prometheus text on its own port, or a JSON-lines file.
+# ############################################################################
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _field(body, name):
+    value = body.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise HTTPError(400, f"'{name}' must be a non-empty string")
+    return value.strip()
+
+
+# [[day, start, end, room], ...] or "Mon 09:00-10:30 B12; ..."
+def _meetings(body):
+    value = body.get("meetings") or []
+    try:
+        if isinstance(value, str):
+            return parse_meetings(value)
+        if not isinstance(value, list) or not all(isinstance(meeting, list) for meeting in value):
+            raise ValueError("'meetings' must be a list of [day, start, end, room]")
+        return [make_meeting(meeting) for meeting in value]
+    except ValueError as error:
+        raise HTTPError(400, str(error))
+
+
+def _bounds(query):
+    try:
+        offset = max(int(query.get("offset", 0)), 0)
+        limit = min(max(int(query.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise HTTPError(400, "offset and limit must be integers")
+    return offset, limit
+
+
+def _page_dict(page, offset, limit, total):
+    next_offset = offset + limit if offset + limit < total else None
+    return {"items": [item.to_dict() for item in page], "offset": offset, "limit": limit, "total": total,
+            "next_offset": next_offset}
+
+
+def _page(query, total, items):
+    # items is an iterator over the whole collection
+    offset, limit = _bounds(query)
+    return _page_dict(islice(items, offset, offset + limit), offset, limit, total)
+
+
+class UniversityAPI:
+    def __init__(self, university):
+        self.university = university
+        # (method, compiled path pattern, handler); handlers get the path
+        # groups, the query dict and the decoded JSON body
+        self._routes = []
+        route = self._route
+        route("GET", r"/students", self.list_students)
+        route("POST", r"/students", self.add_student)
+        route("GET", r"/students/([^/]+)", self.get_student)
+        route("DELETE", r"/students/([^/]+)", self.remove_student)
+        route("GET", r"/faculty", self.list_faculty)
+        route("POST", r"/faculty", self.add_faculty)
+        route("GET", r"/faculty/([^/]+)", self.get_faculty)
+        route("DELETE", r"/faculty/([^/]+)", self.remove_faculty)
+        route("GET", r"/courses", self.list_courses)
+        route("POST", r"/courses", self.add_course)
+        route("GET", r"/courses/([^/]+)", self.get_course)
+        route("GET", r"/courses/([^/]+)/roster", self.roster)
+        route("POST", r"/courses/([^/]+)/students", self.enroll)
+        route("DELETE", r"/courses/([^/]+)/students/([^/]+)", self.drop)
+        route("POST", r"/courses/([^/]+)/waitlist", self.waitlist)
+        route("PUT", r"/courses/([^/]+)/faculty", self.assign)
+        route("DELETE", r"/courses/([^/]+)/faculty", self.unassign)
+        route("PUT", r"/courses/([^/]+)/meetings", self.set_meetings)
+        route("GET", r"/timetable/conflicts", self.timetable_conflicts)
+        route("PUT", r"/credit-limits", self.set_credit_limit)
+        route("GET", r"/reports/degree-audit", self.degree_audit)
+        route("GET", r"/people", self.find_people)
+
+    def _route(self, method, pattern, handler):
+        self._routes.append((method, re.compile(pattern + r"/?"), handler))
+
+    # Returns (status, payload); payload None means an empty body
+    def dispatch(self, method, target, body):
+        parts = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        path_matched = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(parts.path)
+            if match:
+                path_matched = True
+                if route_method == method:
+                    return handler(*map(unquote, match.groups()), query=query, body=body)
+        if path_matched:
+            raise HTTPError(405, f"{method} is not supported on {parts.path}")
+        raise HTTPError(404, f"no such resource: {parts.path}")
+
+    def _found(self, entity, kind, key):
+        if entity is None:
+            raise HTTPError(404, f"{kind} '{key}' not found")
+        return 200, entity.to_dict()
+
+    # ------------------------------------------------------------- students
+
+    def list_students(self, query, body):
+        return 200, _page(query, self.university.student_count(), self.university.iter_students())
+
+    def add_student(self, query, body):
+        student = Student(_field(body, "id"), _field(body, "name"), _field(body, "major"))
+        if not self.university.add_student(student):
+            raise HTTPError(409, f"student '{student.id}' already exists")
+        return 201, student.to_dict()
+
+    def get_student(self, student_id, query, body):
+        status, payload = self._found(self.university.get_student(student_id), "student", student_id)
+        payload["credit_load"] = self.university.credit_load(student_id)
+        return status, payload
+
+    def remove_student(self, student_id, query, body):
+        if not self.university.remove_student(student_id):
+            raise HTTPError(404, f"student '{student_id}' not found")
+        return 204, None
+
+    # -------------------------------------------------------------- faculty
+
+    def list_faculty(self, query, body):
+        return 200, _page(query, self.university.faculty_count(), self.university.iter_faculty())
+
+    def add_faculty(self, query, body):
+        faculty = Faculty(_field(body, "id"), _field(body, "name"), _field(body, "department"))
+        if not self.university.add_faculty(faculty):
+            raise HTTPError(409, f"faculty '{faculty.id}' already exists")
+        return 201, faculty.to_dict()
+
+    def get_faculty(self, faculty_id, query, body):
+        status, payload = self._found(self.university.get_faculty(faculty_id), "faculty", faculty_id)
+        payload["teaching_load"] = self.university.teaching_load(faculty_id)
+        return status, payload
+
+    def remove_faculty(self, faculty_id, query, body):
+        if not self.university.remove_faculty(faculty_id):
+            raise HTTPError(404, f"faculty '{faculty_id}' not found")
+        return 204, None
+
+    # -------------------------------------------------------------- courses
+
+    def list_courses(self, query, body):
+        return 200, _page(query, self.university.course_count(), self.university.iter_courses())
+
+    def add_course(self, query, body):
+        credits = body.get("credits")
+        capacity = body.get("capacity")
+        prerequisites = body.get("prerequisites") or []
+        if isinstance(credits, bool) or not isinstance(credits, (int, float)):
+            raise HTTPError(400, "'credits' must be a number")
+        if capacity is not None and (isinstance(capacity, bool) or not isinstance(capacity, int) or capacity < 0):
+            raise HTTPError(400, "'capacity' must be a non-negative integer")
+        if not isinstance(prerequisites, list) or not all(isinstance(code, str) for code in prerequisites):
+            raise HTTPError(400, "'prerequisites' must be a list of course codes")
+        course = Course(_field(body, "course_code"), _field(body, "title"), credits, prerequisites, capacity,
+                        _meetings(body))
+        if not self.university.add_course(course):
+            if self.university.get_course(course.course_code) is None:
+                raise HTTPError(409, "these prerequisites would create a cycle")
+            raise HTTPError(409, f"course '{course.course_code}' already exists")
+        return 201, course.to_dict()
+
+    def get_course(self, course_code, query, body):
+        return self._found(self.university.get_course(course_code), "course", course_code)
+
+    def _course(self, course_code):
+        course = self.university.get_course(course_code)
+        if course is None:
+            raise HTTPError(404, f"course '{course_code}' not found")
+        return course
+
+    def roster(self, course_code, query, body):
+        self._course(course_code)
+        try:
+            cursor = self.university.roster(course_code, query.get("sort"), query.get("order") == "desc")
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+        offset, limit = _bounds(query)
+        return 200, _page_dict(cursor.page(offset, limit), offset, limit, cursor.total)
+
+    def enroll(self, course_code, query, body):
+        student_id = _field(body, "student_id")
+        course = self._course(course_code)
+        student = self.university.get_student(student_id)
+        if student is None:
+            raise HTTPError(404, f"student '{student_id}' not found")
+        if self.university.enroll_student_in_course(student_id, course_code):
+            return 201, {"student_id": student_id, "course_code": course_code}
+        # Work out why, for a useful 409
+        if student.is_enrolled(course_code):
+            raise HTTPError(409, "student is already enrolled")
+        missing = self.university.missing_prerequisites(student_id, course_code)
+        if missing:
+            raise HTTPError(409, f"missing prerequisites: {', '.join(missing)}")
+        clashes = self.university.schedule_conflicts(student_id, course_code)
+        if clashes:
+            raise HTTPError(409, f"timetable clash with {', '.join(clashes)}")
+        limit = self.university.credit_limit(student.major)
+        if limit is not None and self.university.credit_load(student_id) + course.credits > limit:
+            raise HTTPError(409, f"over the credit limit of {limit}")
+        if not course.has_free_seat() or course.waitlist_count():
+            raise HTTPError(409, "course is full, POST to its waitlist instead")
+        raise HTTPError(409, "enrollment rejected")
+
+    def drop(self, course_code, student_id, query, body):
+        self._course(course_code)
+        if not self.university.drop_student_from_course(student_id, course_code):
+            raise HTTPError(404, f"student '{student_id}' is not enrolled in {course_code}")
+        return 204, None
+
+    def waitlist(self, course_code, query, body):
+        student_id = _field(body, "student_id")
+        priority = body.get("priority", 0)
+        if isinstance(priority, bool) or not isinstance(priority, int):
+            raise HTTPError(400, "'priority' must be an integer")
+        course = self._course(course_code)
+        if not self.university.waitlist_student(student_id, course_code, priority):
+            raise HTTPError(409, "student cannot be waitlisted for this course")
+        return 201, {"student_id": student_id, "course_code": course_code,
+                     "position": course.waitlist_position(student_id)}
+
+    def assign(self, course_code, query, body):
+        faculty_id = _field(body, "faculty_id")
+        self._course(course_code)
+        if self.university.get_faculty(faculty_id) is None:
+            raise HTTPError(404, f"faculty '{faculty_id}' not found")
+        if not self.university.assign_faculty_to_course(faculty_id, course_code):
+            clashes = self.university.teaching_conflicts(faculty_id, course_code)
+            if clashes:
+                raise HTTPError(409, f"faculty '{faculty_id}' teaches {', '.join(clashes)} at the same time")
+            raise HTTPError(409, f"faculty '{faculty_id}' is already assigned to {course_code}")
+        return 200, {"faculty_id": faculty_id, "course_code": course_code}
+
+    def unassign(self, course_code, query, body):
+        course = self._course(course_code)
+        if course.assigned_faculty_id is None:
+            raise HTTPError(404, f"{course_code} has no assigned faculty")
+        self.university.unassign_faculty_from_course(course.assigned_faculty_id, course_code)
+        return 204, None
+
+    def set_meetings(self, course_code, query, body):
+        course = self._course(course_code)
+        self.university.set_course_meetings(course_code, _meetings(body))
+        return 200, course.to_dict()
+
+    def timetable_conflicts(self, query, body):
+        return 200, self.university.validate_term()
+
+    def set_credit_limit(self, query, body):
+        major = body.get("major")
+        limit = body.get("max_credits")
+        if major is not None and not isinstance(major, str):
+            raise HTTPError(400, "'major' must be a string or null")
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit < 0):
+            raise HTTPError(400, "'max_credits' must be a non-negative number or null")
+        self.university.set_credit_limit(limit, major)
+        return 200, {"major": major, "max_credits": limit}
+
+    def degree_audit(self, query, body):
+        try:
+            required = float(query.get("required", 120))
+        except ValueError:
+            raise HTTPError(400, "'required' must be a number")
+        return 200, self.university.degree_audit(required)
+
+    # Students and faculty by name, closest first, each with its "distance"
+    def find_people(self, query, body):
+        name = query.get("name", "").strip()
+        if not name:
+            raise HTTPError(400, "'name' is required")
+        try:
+            limit = min(max(int(query.get("limit", 10)), 1), MAX_LIMIT)
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        try:
+            matches = self.university.find_by_name(name, query.get("kind"), limit)
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+        return 200, {"results": [dict(person.to_dict(), distance=distance) for person, distance in matches]}
+
+
+class UniversityServer:
+    def __init__(self, university, host="127.0.0.1", port=8080, idle_timeout=15.0, flush_interval=1.0):
+        self.api = UniversityAPI(university)
+        self.university = university
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout # Seconds a kept-alive connection may sit idle
+        self.flush_interval = flush_interval
+        self._server = None
+        self._flusher = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # The real port when 0 was asked for
+        self._flusher = asyncio.ensure_future(self._flush_periodically())
+        return self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        self._flusher.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self.university.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.university.flush()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None: # Clean close between requests
+                    break
+                if isinstance(request, HTTPError):
+                    self._write_response(writer, request.status, {"error": request.message}, False)
+                    await writer.drain()
+                    break
+                method, target, body, keep_alive = request
+                try:
+                    status, payload = self.api.dispatch(method, target, body)
+                except HTTPError as error:
+                    status, payload = error.status, {"error": error.message}
+                except Exception as error: # Keep serving other requests
+                    status, payload = 500, {"error": repr(error)}
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # (method, target, body, keep_alive), an HTTPError for a bad request, or
+    # None at end of stream
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            return HTTPError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                return HTTPError(400, "too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return HTTPError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            return HTTPError(413, "request body too large")
+        body = {}
+        if length:
+            raw = await reader.readexactly(length)
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                return HTTPError(400, "body is not valid JSON")
+            if not isinstance(body, dict):
+                return HTTPError(400, "body must be a JSON object")
+        return method.upper(), target, body, keep_alive
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        body = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode()
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                f"Content-Length: {len(body)}",
+                "Connection: keep-alive" if keep_alive else "Connection: close"]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+
+def main(argv=None):
+    import argparse
+    from university_store import SQLiteStorage
+
+    parser = argparse.ArgumentParser(description="Serve the university model as an HTTP/JSON API.")
+    parser.add_argument("--db", default="university.db", help="SQLite database file (default: university.db)")
+    parser.add_argument("--memory", action="store_true", help="serve an empty in-memory model instead")
+    parser.add_argument("--journal", metavar="DIR",
+                        help="serve an in-memory model kept durable by a write-ahead log in DIR")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve per-operation metrics in the Prometheus text format on PORT")
+    parser.add_argument("--metrics-log", metavar="FILE", help="append one JSON line per University call to FILE")
+    args = parser.parse_args(argv)
+
+    if args.journal:
+        import university_wal
+        university = university_wal.open_university(args.journal)
+    elif args.memory:
+        university = University()
+    else:
+        university = University(SQLiteStorage(args.db))
+    metrics = None
+    if args.metrics_port is not None or args.metrics_log:
+        import university_metrics
+        sinks = []
+        if args.metrics_port is not None:
+            sinks.append(university_metrics.PrometheusSink(args.metrics_port, args.host))
+            print(f"metrics on http://{args.host}:{sinks[-1].port}/metrics", flush=True)
+        if args.metrics_log:
+            sinks.append(university_metrics.JsonLinesSink(args.metrics_log))
+        metrics = university_metrics.instrument(university, *sinks)
+    server = UniversityServer(university, args.host, args.port)
+
+    async def run():
+        port = await server.start()
+        print(f"serving on http://{args.host}:{port}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if metrics:
+            metrics.close()
+        university.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
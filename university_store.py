@@ -0,0 +1,353 @@
+import json
+import sqlite3
+import threading
+
+# ############################################################################
+#
+# STORAGE
+#
+# SQLite backend for the University model. Entities are exchanged as plain
+# dicts in the same shape as the model's to_dict()/from_dict() methods, so
+# this module does not depend on the model classes.
+# Writes are queued and applied in batched transactions; reads flush the
+# queue first so they always see the latest state.
+# ############################################################################
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    major TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS faculty (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    department TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS courses (
+    course_code TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    credits NUMERIC NOT NULL,
+    prerequisites TEXT NOT NULL DEFAULT '[]',
+    faculty_id TEXT,
+    capacity INTEGER,
+    meetings TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS courses_faculty_idx ON courses (faculty_id);
+CREATE TABLE IF NOT EXISTS enrollments (
+    student_id TEXT NOT NULL,
+    course_code TEXT NOT NULL,
+    PRIMARY KEY (student_id, course_code)
+);
+CREATE INDEX IF NOT EXISTS enrollments_course_idx ON enrollments (course_code, student_id);
+CREATE TABLE IF NOT EXISTS completions (
+    student_id TEXT NOT NULL,
+    course_code TEXT NOT NULL,
+    PRIMARY KEY (student_id, course_code)
+);
+CREATE TABLE IF NOT EXISTS waitlist (
+    course_code TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (course_code, student_id)
+);
+CREATE INDEX IF NOT EXISTS waitlist_student_idx ON waitlist (student_id);
+CREATE TABLE IF NOT EXISTS credit_limits (
+    major TEXT PRIMARY KEY, -- '' for the default limit
+    max_credits NUMERIC NOT NULL
+);
+"""
+
+
+class SQLiteStorage:
+    IN_CHUNK = 500 # Ids per "IN (...)" query, below SQLite's parameter limit
+
+    def __init__(self, path, batch_size=500):
+        self._path = path
+        self._batch_size = batch_size
+        self._pending = []
+        self._in_batch = False
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    # Columns added after the first release, for databases created before them
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(courses)")}
+        if "capacity" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE courses ADD COLUMN capacity INTEGER")
+        if "meetings" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE courses ADD COLUMN meetings TEXT NOT NULL DEFAULT '[]'")
+
+    @property
+    def path(self):
+        return self._path
+
+    # ------------------------------------------------------------------ writes
+
+    def _queue(self, sql, params):
+        with self._lock:
+            self._pending.append((sql, params))
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            if self._in_batch:
+                # Runs inside the transaction opened by begin(), so reads see
+                # the writes but nothing is committed before commit()
+                for sql, params in pending:
+                    self._conn.execute(sql, params)
+                return
+            with self._conn: # One transaction per batch
+                for sql, params in pending:
+                    self._conn.execute(sql, params)
+
+    # Keeps every write from now on in one transaction (University.batch())
+    def begin(self):
+        with self._lock:
+            self.flush()
+            self._in_batch = True
+
+    def commit(self):
+        with self._lock:
+            self.flush()
+            self._in_batch = False
+            self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._pending = []
+            self._in_batch = False
+            self._conn.rollback()
+
+    def save_student(self, data):
+        # Upsert rather than REPLACE so an updated row keeps its rowid (and order)
+        self._queue("INSERT INTO students (id, name, major) VALUES (?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET name = excluded.name, major = excluded.major",
+                    (data["id"], data["name"], data["major"]))
+
+    def delete_student(self, student_id):
+        self._queue("DELETE FROM enrollments WHERE student_id = ?", (student_id,))
+        self._queue("DELETE FROM completions WHERE student_id = ?", (student_id,))
+        self._queue("DELETE FROM waitlist WHERE student_id = ?", (student_id,))
+        self._queue("DELETE FROM students WHERE id = ?", (student_id,))
+
+    def save_faculty(self, data):
+        self._queue("INSERT INTO faculty (id, name, department) VALUES (?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET name = excluded.name, department = excluded.department",
+                    (data["id"], data["name"], data["department"]))
+
+    def delete_faculty(self, faculty_id):
+        self._queue("UPDATE courses SET faculty_id = NULL WHERE faculty_id = ?", (faculty_id,))
+        self._queue("DELETE FROM faculty WHERE id = ?", (faculty_id,))
+
+    def save_course(self, data):
+        self._queue("INSERT INTO courses (course_code, title, credits, prerequisites, faculty_id, capacity, meetings) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (course_code) DO UPDATE SET title = excluded.title, "
+                    "credits = excluded.credits, prerequisites = excluded.prerequisites, "
+                    "faculty_id = excluded.faculty_id, capacity = excluded.capacity, meetings = excluded.meetings",
+                    (data["course_code"], data["title"], data["credits"],
+                     json.dumps(list(data.get("prerequisites") or [])), data.get("faculty_id"),
+                     data.get("capacity"), json.dumps(list(data.get("meetings") or []))))
+
+    def set_course_faculty(self, course_code, faculty_id):
+        self._queue("UPDATE courses SET faculty_id = ? WHERE course_code = ?", (faculty_id, course_code))
+
+    def add_enrollment(self, student_id, course_code):
+        self._queue("INSERT OR IGNORE INTO enrollments (student_id, course_code) VALUES (?, ?)",
+                    (student_id, course_code))
+
+    def remove_enrollment(self, student_id, course_code):
+        self._queue("DELETE FROM enrollments WHERE student_id = ? AND course_code = ?",
+                    (student_id, course_code))
+
+    def add_completion(self, student_id, course_code):
+        self._queue("INSERT OR IGNORE INTO completions (student_id, course_code) VALUES (?, ?)",
+                    (student_id, course_code))
+
+    def set_credit_limit(self, major, limit):
+        if limit is None:
+            self._queue("DELETE FROM credit_limits WHERE major = ?", (major or "",))
+        else:
+            self._queue("INSERT OR REPLACE INTO credit_limits (major, max_credits) VALUES (?, ?)", (major or "", limit))
+
+    def add_waitlist(self, course_code, student_id, priority, seq):
+        self._queue("INSERT OR REPLACE INTO waitlist (course_code, student_id, priority, seq) VALUES (?, ?, ?, ?)",
+                    (course_code, student_id, priority, seq))
+
+    def remove_waitlist(self, course_code, student_id):
+        self._queue("DELETE FROM waitlist WHERE course_code = ? AND student_id = ?", (course_code, student_id))
+
+    # ------------------------------------------------------------------- reads
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            self.flush()
+            return self._conn.execute(sql, params).fetchall()
+
+    def is_empty(self):
+        return not any(self._query(f"SELECT 1 FROM {table} LIMIT 1")
+                       for table in ("students", "faculty", "courses"))
+
+    def fetch_student(self, student_id):
+        rows = self._query("SELECT id, name, major FROM students WHERE id = ?", (student_id,))
+        if not rows:
+            return None
+        courses = self._query("SELECT course_code FROM enrollments WHERE student_id = ? ORDER BY rowid",
+                              (student_id,))
+        completed = self._query("SELECT course_code FROM completions WHERE student_id = ? ORDER BY rowid",
+                                (student_id,))
+        waitlisted = self._query("SELECT course_code FROM waitlist WHERE student_id = ? ORDER BY rowid",
+                                 (student_id,))
+        return self._student_dict(rows[0], [code for (code,) in courses], [code for (code,) in completed],
+                                  [code for (code,) in waitlisted])
+
+    # Bulk fetch_student for roster pages: a few IN queries per chunk of ids
+    # instead of three queries per student. Unknown ids are left out.
+    def fetch_students(self, student_ids):
+        result = []
+        for start in range(0, len(student_ids), self.IN_CHUNK):
+            chunk = list(student_ids[start:start + self.IN_CHUNK])
+            marks = ",".join("?" * len(chunk))
+            enrollments = self._group(f"SELECT student_id, course_code FROM enrollments "
+                                      f"WHERE student_id IN ({marks}) ORDER BY rowid", chunk)
+            completions = self._group(f"SELECT student_id, course_code FROM completions "
+                                      f"WHERE student_id IN ({marks}) ORDER BY rowid", chunk)
+            waitlists = self._group(f"SELECT student_id, course_code FROM waitlist "
+                                    f"WHERE student_id IN ({marks}) ORDER BY rowid", chunk)
+            for row in self._query(f"SELECT id, name, major FROM students WHERE id IN ({marks})", chunk):
+                result.append(self._student_dict(row, enrollments.get(row[0], []), completions.get(row[0], []),
+                                                 waitlists.get(row[0], [])))
+        return result
+
+    def fetch_faculty(self, faculty_id):
+        rows = self._query("SELECT id, name, department FROM faculty WHERE id = ?", (faculty_id,))
+        if not rows:
+            return None
+        courses = self._query("SELECT course_code FROM courses WHERE faculty_id = ? ORDER BY rowid",
+                              (faculty_id,))
+        return self._faculty_dict(rows[0], [code for (code,) in courses])
+
+    def fetch_course(self, course_code):
+        rows = self._query("SELECT course_code, title, credits, prerequisites, faculty_id, capacity, meetings "
+                           "FROM courses WHERE course_code = ?", (course_code,))
+        if not rows:
+            return None
+        students = self._query("SELECT student_id FROM enrollments WHERE course_code = ? ORDER BY rowid",
+                               (course_code,))
+        waitlist = self._query("SELECT student_id, priority, seq FROM waitlist WHERE course_code = ? "
+                               "ORDER BY priority, seq", (course_code,))
+        return self._course_dict(rows[0], [student_id for (student_id,) in students],
+                                 [list(entry) for entry in waitlist])
+
+    # [(major, max credits)], major None for the default limit
+    def fetch_credit_limits(self):
+        return [(major or None, limit) for major, limit in self._query("SELECT major, max_credits FROM credit_limits")]
+
+    # Full scans used when the whole model is needed. Enrollments are grouped
+    # with a single scan instead of one query per entity.
+    def iter_students(self):
+        enrollments = self._group("SELECT student_id, course_code FROM enrollments ORDER BY rowid")
+        completions = self._group("SELECT student_id, course_code FROM completions ORDER BY rowid")
+        waitlists = self._group("SELECT student_id, course_code FROM waitlist ORDER BY rowid")
+        for row in self._query("SELECT id, name, major FROM students ORDER BY rowid"):
+            yield self._student_dict(row, enrollments.get(row[0], []), completions.get(row[0], []),
+                                     waitlists.get(row[0], []))
+
+    def iter_faculty(self):
+        assignments = self._group("SELECT faculty_id, course_code FROM courses "
+                                  "WHERE faculty_id IS NOT NULL ORDER BY rowid")
+        for row in self._query("SELECT id, name, department FROM faculty ORDER BY rowid"):
+            yield self._faculty_dict(row, assignments.get(row[0], []))
+
+    def iter_courses(self):
+        enrollments = self._group("SELECT course_code, student_id FROM enrollments ORDER BY rowid")
+        waitlists = {}
+        for course_code, student_id, priority, seq in self._query(
+                "SELECT course_code, student_id, priority, seq FROM waitlist ORDER BY priority, seq"):
+            waitlists.setdefault(course_code, []).append([student_id, priority, seq])
+        for row in self._query("SELECT course_code, title, credits, prerequisites, faculty_id, capacity, meetings "
+                               "FROM courses ORDER BY rowid"):
+            yield self._course_dict(row, enrollments.get(row[0], []), waitlists.get(row[0], []))
+
+    # Full scans for exports, in the same dicts and order as iter_*(). Each row
+    # brings its own links as JSON arrays built by SQLite from the link
+    # indexes, and rows are fetched a chunk at a time from one cursor, so
+    # memory stays the same however large the tables are.
+    def stream_students(self):
+        for row in self._stream(
+                "SELECT id, name, major, "
+                "(SELECT json_group_array(course_code) FROM (SELECT course_code FROM enrollments "
+                "WHERE student_id = students.id ORDER BY rowid)), "
+                "(SELECT json_group_array(course_code) FROM (SELECT course_code FROM completions "
+                "WHERE student_id = students.id ORDER BY rowid)), "
+                "(SELECT json_group_array(course_code) FROM (SELECT course_code FROM waitlist "
+                "WHERE student_id = students.id ORDER BY rowid)) "
+                "FROM students ORDER BY rowid"):
+            yield self._student_dict(row, json.loads(row[3]), json.loads(row[4]), json.loads(row[5]))
+
+    def stream_faculty(self):
+        for row in self._stream(
+                "SELECT id, name, department, "
+                "(SELECT json_group_array(course_code) FROM (SELECT course_code FROM courses "
+                "WHERE faculty_id = faculty.id ORDER BY rowid)) "
+                "FROM faculty ORDER BY rowid"):
+            yield self._faculty_dict(row, json.loads(row[3]))
+
+    def stream_courses(self):
+        for row in self._stream(
+                "SELECT course_code, title, credits, prerequisites, faculty_id, capacity, meetings, "
+                "(SELECT json_group_array(student_id) FROM (SELECT student_id FROM enrollments "
+                "WHERE course_code = courses.course_code ORDER BY rowid)), "
+                "(SELECT json_group_array(json_array(student_id, priority, seq)) FROM (SELECT student_id, priority, "
+                "seq FROM waitlist WHERE course_code = courses.course_code ORDER BY priority, seq)) "
+                "FROM courses ORDER BY rowid"):
+            yield self._course_dict(row, json.loads(row[7]), json.loads(row[8]))
+
+    def _stream(self, sql, params=()):
+        with self._lock:
+            self.flush()
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(self.IN_CHUNK)
+            if not rows:
+                return
+            yield from rows
+
+    def _group(self, sql, params=()):
+        groups = {}
+        for key, value in self._query(sql, params):
+            groups.setdefault(key, []).append(value)
+        return groups
+
+    @staticmethod
+    def _student_dict(row, course_codes, completed_codes, waitlisted_codes):
+        return {"id": row[0], "name": row[1], "major": row[2], "enrolled_courses": course_codes,
+                "completed_courses": completed_codes, "waitlisted_courses": waitlisted_codes, "type": "student"}
+
+    @staticmethod
+    def _faculty_dict(row, course_codes):
+        return {"id": row[0], "name": row[1], "department": row[2],
+                "assigned_courses": course_codes, "type": "faculty"}
+
+    @staticmethod
+    def _course_dict(row, student_ids, waitlist):
+        return {"course_code": row[0], "title": row[1], "credits": row[2],
+                "prerequisites": json.loads(row[3]), "enrolled_students": student_ids,
+                "faculty_id": row[4], "capacity": row[5], "waitlist": waitlist, "meetings": json.loads(row[6])}
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
@@ -0,0 +1,307 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from university import Course, Faculty, Student, University
+import university_io
+
+# ############################################################################
+#
+# WRITE-AHEAD LOG
+#
+# Durability for an in-memory University without a database. Every public
+# mutation is appended to the journal as a ["enroll_...", [args], {kwargs}]
+# record while the call still holds the model's locks, so the journal has
+# conflicting calls in the order they ran. A batch() is a single
+# ["batch", [calls], {}] record and is replayed as a unit or not at all.
+#
+# A writer thread does group commit: records appended while it is busy with
+# one write+fsync go out together in the next one, as one JSON line holding
+# the list of records. Encoding happens there too, once per group. By default
+# mutations do not wait for the fsync (a crash loses at most the groups not
+# yet written); synchronous=True makes each top-level call wait for its record.
+#
+# A directory holds snapshot-<n>.gz (university_io snapshot format) and
+# journal-<n>.log with everything after it. Compaction writes snapshot n+1
+# from the live model and starts journal n+1; recovery loads the newest
+# snapshot and replays its journal, ignoring a torn last line.
+# ############################################################################
+
+SNAPSHOT_NAME = "snapshot-{}.gz"
+JOURNAL_NAME = "journal-{}.log"
+FILE_PATTERN = re.compile(r"(snapshot|journal)-(\d+)\.(gz|log)$")
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+_ENTITY_CLASSES = {"student": Student, "faculty": Faculty, "course": Course}
+
+
+def _entity_hook(value):
+    if len(value) == 1:
+        (key, data), = value.items()
+        if key.startswith("$") and key[1:] in _ENTITY_CLASSES:
+            return _ENTITY_CLASSES[key[1:]].from_dict(data)
+    return value
+
+
+# One journal line -> its list of records
+decode = json.JSONDecoder(object_hook=_entity_hook).decode
+
+
+class WriteAheadLog:
+    def __init__(self, directory, compact_every=250000, synchronous=False):
+        self._directory = directory
+        self._compact_every = compact_every # Journal records before a compaction
+        self._synchronous = synchronous
+        self._university = None
+        self._generation = 0
+        self._file = None
+        self._records = 0 # In the current journal
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)
+        self._buffer = []
+        self._appended = 0 # Tickets: number of records appended so far
+        self._durable = 0 # ... and written and fsynced
+        self._closing = False
+        self._error = None
+        self._writer = None
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def generation(self):
+        return self._generation
+
+    @property
+    def records(self):
+        return self._records
+
+    def _path(self, name, generation):
+        return os.path.join(self._directory, name.format(generation))
+
+    # ------------------------------------------------------------------ recovery
+
+    # Loads the newest snapshot into university, replays the journal after it
+    # and starts appending to that journal. Returns the number of records replayed.
+    def recover(self, university):
+        generations = {}
+        for name in os.listdir(self._directory):
+            match = FILE_PATTERN.match(name)
+            if match:
+                generations.setdefault(int(match.group(2)), set()).add(match.group(1))
+        snapshots = [generation for generation, kinds in generations.items() if "snapshot" in kinds]
+        self._generation = max(snapshots, default=0)
+        if snapshots:
+            university_io.load_snapshot(self._path(SNAPSHOT_NAME, self._generation), university)
+
+        replayed = 0
+        journal_path = self._path(JOURNAL_NAME, self._generation)
+        if os.path.exists(journal_path):
+            good_end = 0
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break # Torn write at the crash, never acknowledged as durable
+                    try:
+                        records = decode(line.decode())
+                    except ValueError:
+                        if f.read(1): # Only the last line may be damaged
+                            raise ValueError(f"{journal_path}: corrupt group after {replayed} records")
+                        break
+                    for record in records:
+                        university.replay(record)
+                    replayed += len(records)
+                    good_end += len(line)
+            if good_end != os.path.getsize(journal_path):
+                with open(journal_path, "r+b") as f:
+                    f.truncate(good_end)
+
+        # Leftovers of an interrupted compaction
+        for generation in generations:
+            if generation != self._generation:
+                self._remove_generation(generation)
+
+        self._records = replayed
+        self._university = university
+        self._file = open(journal_path, "ab")
+        self._writer = threading.Thread(target=self._write_loop, name="university-wal", daemon=True)
+        self._writer.start()
+        return replayed
+
+    def _remove_generation(self, generation):
+        for name in (SNAPSHOT_NAME, JOURNAL_NAME):
+            try:
+                os.remove(self._path(name, generation))
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------------------------------ records
+
+    # (arguments for the call, their journal copy): entities become tagged
+    # dicts and collections lists, as they are before the call changes them
+    def capture(self, args):
+        for arg in args:
+            if type(arg) not in _PLAIN_TYPES:
+                break
+        else:
+            return args, args # Nothing mutable, the common case
+        args = tuple(list(arg) if hasattr(arg, "__next__") else arg for arg in args) # Generators
+        return args, [self._copy(arg) for arg in args]
+
+    @staticmethod
+    def _copy(value):
+        if isinstance(value, Student):
+            return {"$student": value.to_dict()}
+        if isinstance(value, Faculty):
+            return {"$faculty": value.to_dict()}
+        if isinstance(value, Course):
+            return {"$course": value.to_dict()}
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return list(value)
+        if isinstance(value, dict):
+            return dict(value)
+        if type(value) in _PLAIN_TYPES:
+            return value
+        raise TypeError(f"cannot journal a {type(value).__name__}")
+
+    # Queues one record for the writer thread, returns its ticket for wait()
+    def append(self, record):
+        with self._lock:
+            if self._error:
+                raise self._error
+            self._buffer.append(record)
+            self._appended += 1
+            self._records += 1
+            if len(self._buffer) == 1:
+                self._written.notify() # Wake the writer
+            return self._appended
+
+    def append_batch(self, records):
+        return self.append(["batch", records, {}])
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closing:
+                    self._written.wait()
+                if not self._buffer:
+                    return
+                buffer, self._buffer = self._buffer, []
+                ticket = self._appended
+                journal = self._file
+            try:
+                journal.write((self._encode(buffer) + "\n").encode())
+                journal.flush()
+                os.fsync(journal.fileno())
+            except OSError as error:
+                with self._lock:
+                    self._error = error
+                    self._written.notify_all()
+                return
+            with self._lock:
+                self._durable = ticket
+                self._written.notify_all()
+
+    # Blocks until the record with this ticket (0 for everything appended so
+    # far) has been written and fsynced
+    def wait(self, ticket=0):
+        with self._lock:
+            ticket = ticket or self._appended
+            while self._durable < ticket:
+                if self._error:
+                    raise self._error
+                if not self._writer.is_alive():
+                    raise RuntimeError("the journal writer has stopped")
+                self._written.wait()
+
+    def sync(self):
+        self.wait()
+
+    # Called by the University after each top-level call, outside its locks
+    def settle(self, ticket):
+        if self._synchronous and ticket:
+            self.wait(ticket)
+        if self._records >= self._compact_every:
+            self.compact()
+
+    # ------------------------------------------------------------------ compaction
+
+    # Replaces snapshot + journal with a fresh snapshot of the live model and
+    # an empty journal. Mutations wait while the snapshot is written.
+    def compact(self):
+        university = self._university
+        with university.locked():
+            if self._records == 0 and self._generation:
+                return
+            self.sync()
+            generation = self._generation + 1
+            snapshot_path = self._path(SNAPSHOT_NAME, generation)
+            university_io.save_snapshot(university, snapshot_path)
+            with open(snapshot_path, "rb") as f:
+                os.fsync(f.fileno())
+            self._sync_directory()
+            # From here on recovery uses the new snapshot
+            new_file = open(self._path(JOURNAL_NAME, generation), "ab")
+            with self._lock:
+                old_file, self._file = self._file, new_file
+                old_generation, self._generation = self._generation, generation
+                self._records = 0
+            old_file.close()
+            self._remove_generation(old_generation)
+
+    def _sync_directory(self):
+        if hasattr(os, "O_DIRECTORY"): # Makes the renamed snapshot itself durable (POSIX)
+            descriptor = os.open(self._directory, os.O_DIRECTORY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+    def close(self):
+        if self._writer is None:
+            return
+        with self._lock:
+            self._closing = True
+            self._written.notify_all()
+        self._writer.join()
+        self._file.close()
+        self._writer = None
+
+
+# Recovers a University from a journal directory and journals every mutation
+# made to it from then on
+def open_university(directory, thread_safe=False, compact_every=250000, synchronous=False):
+    university = University(thread_safe=thread_safe)
+    journal = WriteAheadLog(directory, compact_every, synchronous)
+    journal.recover(university)
+    university.attach_journal(journal)
+    return university
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or compact a University write-ahead log directory.")
+    parser.add_argument("directory")
+    parser.add_argument("--compact", action="store_true", help="write a fresh snapshot and empty the journal")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    university = University()
+    journal = WriteAheadLog(args.directory)
+    replayed = journal.recover(university)
+    university.attach_journal(journal)
+    print(f"generation {journal.generation}: replayed {replayed} records in {time.perf_counter() - start:.2f}s, "
+          f"{len(university.get_all_students())} students, {len(university.get_all_faculty())} faculty, "
+          f"{len(university.get_all_courses())} courses")
+    if args.compact:
+        journal.compact()
+        print(f"compacted into generation {journal.generation}")
+    university.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())